@@ -0,0 +1,74 @@
+"""
+관리자 명령어 모듈
+
+ADMIN_IDS 에 등록된 사용자만 사용할 수 있으며,
+다른 사용자가 입력하면 아무 응답도 하지 않습니다.
+
+명령어:
+- /top [일수] : 최근 일수(기본 1일, 오늘) 동안 모델 비용이 많은 사용자 10명
+"""
+
+import asyncio
+import logging
+
+from telegram import Update
+from telegram.ext import CommandHandler, ContextTypes, filters
+
+import config
+from bot.outbound import get_messenger
+from services.tracing import traced
+from services.usage import usage_ledger
+
+logger = logging.getLogger(__name__)
+
+# /top 최대 조회 기간 (일)
+MAX_TOP_DAYS = 90
+
+# 관리자만 통과하는 필터 (ADMIN_IDS 가 비어 있으면 아무도 통과하지 않음)
+ADMIN_ONLY = filters.User(user_id=config.ADMIN_IDS)
+
+
+def format_top(rows, days: int) -> str:
+    """비용 상위 사용자 목록 메시지"""
+    period = "오늘" if days == 1 else f"최근 {days}일"
+    if not rows:
+        return f"📊 {period} 모델 사용 기록이 없습니다."
+
+    lines = [f"📊 {period} 모델 비용 상위 사용자 (UTC 기준)", ""]
+    for rank, row in enumerate(rows, 1):
+        lines.append(
+            f"{rank}. {row['telegram_id']} - ${float(row['cost']):.4f} "
+            f"(호출 {int(row['calls'])}회, 입력 {int(row['input_tokens']):,} / 출력 {int(row['output_tokens']):,} 토큰)"
+        )
+    lines.append("")
+    lines.append(f"오늘 전체 비용: ${usage_ledger.spent_today():.4f}")
+    by_tenant = usage_ledger.spent_by_tenant()
+    if len(by_tenant) > 1:
+        # 여러 봇을 실행 중이면 봇별 비용도 표시
+        lines.extend(f"- {tenant}: ${cost:.4f}" for tenant, cost in sorted(by_tenant.items()))
+    return '\n'.join(lines)
+
+
+@traced()
+async def top_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """비용 상위 사용자 조회"""
+    try:
+        days = int(context.args[0]) if context.args else 1
+    except ValueError:
+        days = 1
+    days = min(max(days, 1), MAX_TOP_DAYS)
+
+    try:
+        rows = await asyncio.to_thread(usage_ledger.top, days)
+        text = format_top(rows, days)
+    except Exception as e:
+        logger.error("사용량 조회 실패: %s", e)
+        text = "⚠️ 사용량을 조회하지 못했습니다."
+
+    await get_messenger(context.bot).send_message(update.effective_chat.id, text)
+
+
+# 관리자 명령어 핸들러 (main.py 에서 등록)
+admin_handlers = [
+    CommandHandler("top", top_command, filters=ADMIN_ONLY),
+]
@@ -0,0 +1,139 @@
+"""
+정적 자산 관리 모듈
+
+웰컴 이미지 같은 정적 자산을 텔레그램에 한 번만 업로드하고,
+돌려받은 file_id 를 데이터베이스에 저장해 이후에는 file_id 로만 전송합니다.
+외부 CDN 에서 이미지를 가져오는 과정이 응답 경로에서 빠집니다.
+
+동작 순서:
+1. 시작 시 데이터베이스에 저장된 file_id 를 불러옴
+2. file_id 가 없는 자산은 ASSET_CACHE_CHAT_ID 채팅에 미리 업로드 (설정된 경우)
+3. 그래도 없으면 첫 전송 때 원본 URL 로 보내고 file_id 를 저장
+4. file_id 가 더 이상 유효하지 않으면 삭제 후 원본으로 다시 전송
+"""
+
+import zlib
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional
+
+from telegram.error import BadRequest
+
+from bot.outbound import get_messenger
+from database import get_asset_file_ids, save_asset_file_id
+
+logger = logging.getLogger(__name__)
+
+
+class AssetRegistry:
+    """정적 자산과 봇별 file_id 관리"""
+
+    def __init__(self):
+        self._sources: Dict[str, str] = {}
+        self._keys: Dict[str, str] = {}
+        self._file_ids: Dict[tuple, str] = {}
+        self._loaded = set()
+
+    def register(self, name: str, source: str):
+        """자산 등록 (source: 원본 URL 또는 파일 경로)"""
+        self._sources[name] = source
+        # 원본이 바뀌면 예전 file_id 를 쓰지 않도록 저장 키에 원본 해시를 포함
+        self._keys[name] = f"{name}:{zlib.crc32(source.encode()):08x}"
+
+    def file_id(self, bot, name: str) -> Optional[str]:
+        """저장된 file_id 조회"""
+        return self._file_ids.get((bot.id, self._keys[name]))
+
+    async def _remember(self, bot, name: str, file_id: Optional[str]):
+        key = self._keys[name]
+        if file_id is None:
+            self._file_ids.pop((bot.id, key), None)
+        else:
+            self._file_ids[(bot.id, key)] = file_id
+        try:
+            await asyncio.to_thread(save_asset_file_id, bot.id, key, file_id)
+        except Exception as e:
+            logger.warning("자산 file_id 저장 실패 (무시하고 계속 진행): %s", e)
+
+    async def _load(self, bot):
+        if bot.id in self._loaded:
+            return
+        try:
+            stored = await asyncio.to_thread(get_asset_file_ids, bot.id)
+        except Exception as e:
+            logger.warning("자산 file_id 조회 실패 (무시하고 계속 진행): %s", e)
+            stored = {}
+        for key, file_id in stored.items():
+            self._file_ids[(bot.id, key)] = file_id
+        self._loaded.add(bot.id)
+
+    @staticmethod
+    def _photo_file_id(message) -> Optional[str]:
+        if message is not None and message.photo:
+            # 가장 큰 해상도의 file_id 사용
+            return message.photo[-1].file_id
+        return None
+
+    def _open_source(self, name: str):
+        source = self._sources[name]
+        if source.startswith(('http://', 'https://')):
+            return source
+        with open(source, 'rb') as f:
+            return f.read()
+
+    async def warm(self, bot, upload_chat_id: Optional[int] = None, names: Optional[Iterable[str]] = None):
+        """
+        시작 시 file_id 준비
+
+        Args:
+            bot: 텔레그램 봇 객체
+            upload_chat_id: 미리 업로드할 채팅 ID (없으면 첫 전송 때 업로드)
+            names: 준비할 자산 이름 (없으면 등록된 자산 전체, 여러 봇이 있을 때 봇별 자산만 지정)
+        """
+        await self._load(bot)
+
+        for name in (self._sources if names is None else names):
+            if self.file_id(bot, name) or not upload_chat_id:
+                continue
+            try:
+                message = await get_messenger(bot).send_photo(
+                    upload_chat_id,
+                    photo=self._open_source(name),
+                    disable_notification=True
+                )
+                file_id = self._photo_file_id(message)
+                if file_id:
+                    await self._remember(bot, name, file_id)
+                    logger.info("자산 업로드 완료: %s", name)
+            except Exception as e:
+                logger.warning("자산 업로드 실패 (%s): %s", name, e)
+
+        ready = sum(1 for name in self._sources if self.file_id(bot, name))
+        logger.info("자산 준비 완료: %d/%d", ready, len(self._sources))
+
+    async def send_photo(self, bot, chat_id: int, name: str, **kwargs):
+        """
+        등록된 자산을 사진으로 전송
+
+        file_id 가 있으면 file_id 로 보내고, 없으면 원본으로 보낸 뒤 file_id 를 저장합니다.
+        """
+        await self._load(bot)
+        messenger = get_messenger(bot)
+
+        file_id = self.file_id(bot, name)
+        if file_id:
+            try:
+                return await messenger.send_photo(chat_id, photo=file_id, **kwargs)
+            except BadRequest as e:
+                logger.warning("저장된 file_id 사용 실패, 원본으로 다시 전송 (%s): %s", name, e)
+                await self._remember(bot, name, None)
+
+        message = await messenger.send_photo(chat_id, photo=self._open_source(name), **kwargs)
+        new_file_id = self._photo_file_id(message)
+        if new_file_id:
+            await self._remember(bot, name, new_file_id)
+        return message
+
+
+# 전역 자산 관리자
+assets = AssetRegistry()
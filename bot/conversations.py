@@ -16,18 +16,47 @@
 - 응답 메시지 형식
 """
 
+import time
 import asyncio
+import logging
+from typing import Optional
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
+    ApplicationHandlerStop,
     ContextTypes,
     ConversationHandler,
     CommandHandler,
     MessageHandler,
     filters
 )
+import config
 from bot.messages import ElonStyleMessageFormatter as Elon
-from services.langchain_service import LangChainService
-from database import init_db, save_analysis
+from bot.jobs import RequestCoalescer, input_fingerprint
+from bot.rate_limit import UserThrottle
+from bot.outbound import get_messenger
+from bot.assets import assets
+from bot.flow import FlowEngine, FlowStep, TEXT_INPUT
+from bot.form_parser import parse_form, form_template, decode_form_file, FIELD_LABELS, MAX_FORM_FILE_SIZE
+from bot.renderer import AnalysisRenderer
+from bot.sessions import SessionReaper
+from bot.tenants import Tenant, current_tenant, default_tenant
+from services.admission import admission
+from services.overload import overload, SUMMARY_ONLY, CACHED_ONLY, REJECT
+from services.langchain_service import LangChainService, FORM_FIELDS
+from services.tracing import traced
+from services.usage import usage_ledger, USER_BUDGET
+from services.similarity_index import NearDuplicateIndex
+from database import (
+    init_db,
+    flush,
+    save_analysis,
+    get_recent_analyses,
+    add_save_listener,
+    get_sessions,
+    save_session
+)
+
+logger = logging.getLogger(__name__)
 
 # 데이터베이스 초기화
 init_db()
@@ -35,20 +64,70 @@ init_db()
 # AI 분석 서비스 인스턴스
 langchain_service = LangChainService()
 
+# 유사 제출물 인덱스 (저장된 분석으로 채우고, 새로 저장될 때마다 갱신)
+similarity_index = NearDuplicateIndex(
+    FORM_FIELDS,
+    threshold=config.DEDUP_THRESHOLD,
+    capacity=config.DEDUP_CAPACITY,
+    max_age=config.DEDUP_MAX_AGE_HOURS * 3600
+)
+if config.DEDUP_ENABLED:
+    try:
+        similarity_index.warm(get_recent_analyses(config.DEDUP_CAPACITY))
+    except Exception as e:
+        logger.warning("유사 제출물 인덱스 로드 실패 (무시하고 계속 진행): %s", e)
+    add_save_listener(similarity_index.add)
+
+# 분석 결과 렌더러
+result_renderer = AnalysisRenderer(
+    parse_mode=None if config.RESULT_PARSE_MODE == 'plain' else config.RESULT_PARSE_MODE,
+    compact=config.RESULT_COMPACT
+)
+
+# 기본 봇의 백그라운드 분석 작업 관리자 (봇별 작업은 current_tenant().jobs)
+analysis_jobs = default_tenant.jobs
+
+# 같은 사용자의 같은 입력으로 진행 중인 분석 합치기
+analysis_coalescer = RequestCoalescer()
+
+# 사용자별 요청 제한 (명령어 / 분석)
+command_throttle = UserThrottle(config.COMMAND_RATE_PER_MINUTE / 60, config.COMMAND_BURST)
+analysis_throttle = UserThrottle(config.ANALYSIS_RATE_PER_HOUR / 3600, config.ANALYSIS_BURST)
+
+# 종료 시 끝나지 않은 분석을 저장하는 세션 종류 (다음 시작 시 다시 진행)
+PENDING_ANALYSIS_KIND = 'pending_analysis'
+
+# 진행 상황 메시지 갱신 주기 (초)
+PROGRESS_UPDATE_INTERVAL = 10
+
+# 분석 단계별 진행 상황 문구
+ANALYSIS_STAGES = {
+    'queued': '분석 순서 대기 중',
+    'summary': '1/2 명세서 초안 작성 중',
+    'analysis': '2/2 상세 분석 중',
+    'report': '명세서 초안과 분석 작성 중',
+    'revise_summary': '1/2 바뀐 항목으로 명세서 초안 고치는 중',
+    'revise_analysis': '2/2 바뀐 부분 다시 분석 중'
+}
+
 # 대화 상태 정의
 (WAITING_START,
- IDEA,           # 기술 개요 (자유 입력)
- PROBLEM,        # 기술적 문제점
- MECHANISM,      # 핵심 작동 원리
- DIFFERENCE,     # 기존 기술과의 차별점
- COMPONENTS,     # 구성요소와 작동 방식
- EFFECTS,        # 기술적 효과
- LIMITATIONS,    # 기술적 한계
- INDUSTRY,       # 산업 분야
- SPECIFICATIONS, # 물리적 특성
- STATUS,         # 개발 상태
- ANALYZING,      # AI 분석 중
- HELP_MENU) = range(13)
+ ANALYZING,        # AI 분석 중
+ HELP_MENU,
+ DUPLICATE_CHOICE,  # 유사한 이전 결과 재사용 여부
+ FORM_UPLOAD,       # 한 번에 입력할 양식 대기
+ EDIT_FIELD,        # 수정할 항목 선택
+ EDIT_VALUE         # 수정할 항목의 새 답변 대기
+ ) = range(7)
+
+# 한 번에 입력한 양식으로 인식하는 최소 항목 수 (시작 메뉴에서 일반 텍스트를 보낸 경우)
+ONE_SHOT_MIN_FIELDS = 2
+
+# 양식 파일 (.txt / .md)
+FORM_DOCUMENT = filters.Document.FileExtension('txt') | filters.Document.FileExtension('md')
+
+# 질문 단계의 대화 상태는 흐름 엔진이 이 번호부터 차례로 생성
+FLOW_STATE_BASE = 100
 
 # 키보드 메뉴 정의
 
@@ -139,6 +218,80 @@ START_KEYBOARD = [
     ['📚 가이드']
 ]
 
+# 유사한 이전 결과 재사용 옵션
+DUPLICATE_KEYBOARD = [
+    ['♻️ 이전 결과 보기'],
+    ['🔄 새로 분석하기']
+]
+
+# 항목 수정 취소
+EDIT_CANCEL = '❌ 수정 취소'
+
+# 질문 단계 정의 (순서대로 진행, 마지막 단계 답변 후 분석 시작)
+FORM_STEPS = [
+    FlowStep('idea', Elon.QUESTIONS['idea']),  # 기술 개요 (자유 입력)
+    FlowStep('problem', Elon.QUESTIONS['problem'], PROBLEM_KEYBOARD),  # 기술적 문제점
+    FlowStep('mechanism', Elon.QUESTIONS['mechanism'], MECHANISM_KEYBOARD),  # 핵심 작동 원리
+    FlowStep('difference', Elon.QUESTIONS['difference'], DIFFERENCE_KEYBOARD),  # 기존 기술과의 차별점
+    FlowStep('components', Elon.QUESTIONS['components'], COMPONENTS_KEYBOARD),  # 구성요소와 작동 방식
+    FlowStep('effects', Elon.QUESTIONS['effects'], EFFECTS_KEYBOARD),  # 기술적 효과
+    FlowStep('limitations', Elon.QUESTIONS['limitations'], LIMITATIONS_KEYBOARD),  # 기술적 한계
+    FlowStep('industry', Elon.QUESTIONS['industry'], INDUSTRY_KEYBOARD),  # 산업 분야
+    FlowStep('specifications', Elon.QUESTIONS['specifications'], SPECIFICATIONS_KEYBOARD),  # 물리적 특성
+    FlowStep('status', Elon.QUESTIONS['status'], STATUS_KEYBOARD),  # 개발 상태
+]
+
+async def reply(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, **kwargs):
+    """
+    현재 채팅으로 메시지 전송
+
+    전송 파이프라인을 거치므로 긴 메시지는 나눠서 보내고,
+    전송 제한과 채팅별 순서를 지킵니다.
+    """
+    return await get_messenger(context.bot).send_message(update.effective_chat.id, text, **kwargs)
+
+def format_wait(seconds: float) -> str:
+    """남은 시간을 읽기 쉬운 문구로 변환"""
+    seconds = max(1, int(seconds + 0.999))
+    if seconds < 60:
+        return f"{seconds}초"
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes}분 {seconds}초" if seconds else f"{minutes}분"
+
+async def throttle_commands(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    명령어 요청 제한 핸들러
+
+    대화 핸들러보다 먼저 실행되며, 제한에 걸린 명령어는 여기서 처리를 멈춥니다.
+    안내 메시지는 같은 제한 구간에 한 번만 보냅니다.
+    """
+    user = update.effective_user
+    if user is None:
+        return
+
+    user_key = current_tenant().user_key(user.id)
+    wait = command_throttle.check(user_key)
+    if wait <= 0:
+        return
+
+    if command_throttle.should_notify(user_key, wait):
+        await reply(
+            update, context,
+            f"⏳ 요청이 너무 잦습니다. {format_wait(wait)} 후에 다시 시도해주세요."
+        )
+    raise ApplicationHandlerStop
+
+def throttle_stats() -> dict:
+    """요청 제한 / 분석 합치기 / 비용 한도 통계"""
+    return {
+        'commands': command_throttle.stats(),
+        'analyses': analysis_throttle.stats(),
+        'coalesced': analysis_coalescer.stats(),
+        'usage': usage_ledger.stats(),
+        'admission': admission.stats(),
+    }
+
+@traced()
 async def start_conversation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     대화 시작 핸들러
@@ -146,21 +299,27 @@ async def start_conversation(update: Update, context: ContextTypes.DEFAULT_TYPE)
     사용자가 /start 명령어를 입력했을 때 실행됩니다.
     웰컴 메시지와 시작 버튼을 표시합니다.
     """
+    tenant = current_tenant()
     try:
         # 이미지와 웰컴 메시지 전송
-        await update.message.reply_photo(
-            photo=Elon.WELCOME_IMG_URL,
-            caption=Elon.WELCOME_MESSAGE,
+        # 이미지는 처음 한 번만 업로드하고 이후에는 file_id 로 전송
+        await assets.send_photo(
+            context.bot,
+            update.effective_chat.id,
+            tenant.kind('welcome'),
+            caption=tenant.messages.WELCOME_MESSAGE,
             reply_markup=ReplyKeyboardMarkup(START_KEYBOARD, resize_keyboard=True)
         )
     except Exception as e:
-        print(f"이미지 전송 실패: {e}")
-        await update.message.reply_text(
-            Elon.WELCOME_MESSAGE,
+        logger.warning("이미지 전송 실패: %s", e)
+        await reply(
+            update, context,
+            tenant.messages.WELCOME_MESSAGE,
             reply_markup=ReplyKeyboardMarkup(START_KEYBOARD, resize_keyboard=True)
         )
     return WAITING_START
 
+@traced()
 async def handle_start_response(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     시작 응답 처리 핸들러
@@ -171,8 +330,7 @@ async def handle_start_response(update: Update, context: ContextTypes.DEFAULT_TY
     text = update.message.text
     
     if text == '✨ 시작하기':
-        await update.message.reply_text(Elon.QUESTIONS['idea'])
-        return IDEA
+        return await form_flow.start(update, context)
     elif text == '📚 외부 채널 연결':
         keyboard = [[
             InlineKeyboardButton(
@@ -181,189 +339,541 @@ async def handle_start_response(update: Update, context: ContextTypes.DEFAULT_TY
             )
         ]]
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.message.reply_text(
+        await reply(
+            update, context,
             "✨✨연결 버튼✨✨",
             reply_markup=reply_markup
         )
         return ConversationHandler.END
     else:
-        await update.message.reply_text("안내 메세지 👀")
+        # 여러 항목을 한 번에 입력한 경우 바로 양식으로 처리
+        values = parse_form(text, form_flow.keys)
+        if len(values) >= ONE_SHOT_MIN_FIELDS:
+            return await submit_form(update, context, values)
+
+        await reply(update, context, "안내 메세지 👀")
         return WAITING_START
 
-async def handle_idea(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """
-    기술 개요 입력 처리 핸들러
-    
-    사용자가 입력한 기술 설명을 저장하고
-    다음 단계(기술적 문제점)로 진행합니다.
-    """
-    context.user_data['idea'] = update.message.text
-    reply_markup = ReplyKeyboardMarkup(PROBLEM_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
-        Elon.QUESTIONS['problem'],
-        reply_markup=reply_markup
+def form_guide() -> str:
+    """한 번에 입력하기 안내 문구"""
+    return (
+        "📝 모든 항목을 한 번에 입력할 수 있습니다.\n"
+        "아래 양식을 복사해 내용을 채운 뒤 메시지로 보내거나, "
+        ".txt / .md 파일로 업로드해주세요.\n"
+        "빠진 항목은 이어서 질문드립니다.\n\n"
+        f"{form_template(form_flow.keys)}"
     )
-    return PROBLEM
 
-async def handle_problem(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """
-    기술적 문제점 처리 핸들러
-    
-    사용자가 선택한 문제점을 저장하고
-    다음 단계(핵심 작동 원리)로 진행합니다.
-    """
-    context.user_data['problem'] = update.message.text
-    reply_markup = ReplyKeyboardMarkup(MECHANISM_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
-        Elon.QUESTIONS['mechanism'],
-        reply_markup=reply_markup
-    )
-    return MECHANISM
+async def read_form_document(update: Update) -> str:
+    """업로드한 양식 파일 내용 읽기"""
+    document = update.message.document
+    if document.file_size and document.file_size > MAX_FORM_FILE_SIZE:
+        raise ValueError(f"파일이 너무 큽니다. {MAX_FORM_FILE_SIZE // 1024}KB 이하로 보내주세요.")
+    file = await document.get_file()
+    data = await file.download_as_bytearray()
+    return decode_form_file(bytes(data))
 
-async def handle_mechanism(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@traced()
+async def handle_form_submission(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    핵심 작동 원리 처리 핸들러
-    
-    사용자가 선택한 작동 원리를 저장하고
-    다음 단계(기존 기술과의 차별점)로 진행합니다.
+    한 번에 입력하기 핸들러
+
+    /submit 명령어 뒤의 텍스트, 양식 대기 중 보낸 메시지, 업로드한 .txt / .md 파일을
+    항목별로 나눠 저장하고 빠진 항목만 이어서 질문합니다.
     """
-    context.user_data['mechanism'] = update.message.text
-    reply_markup = ReplyKeyboardMarkup(DIFFERENCE_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
-        Elon.QUESTIONS['difference'],
-        reply_markup=reply_markup
-    )
-    return DIFFERENCE
+    message = update.message
+
+    if message.document:
+        try:
+            text = await read_form_document(update)
+        except ValueError as e:
+            await reply(update, context, f"⚠️ {e}")
+            return FORM_UPLOAD
+        except Exception as e:
+            logger.warning("양식 파일 읽기 실패: %s", e)
+            await reply(update, context, "⚠️ 파일을 읽지 못했습니다. 다시 보내주세요.")
+            return FORM_UPLOAD
+    else:
+        text = message.text or ''
+        if text.startswith('/'):
+            # 명령어 뒤의 내용만 사용 (/submit 기술 개요: ...)
+            parts = text.split(None, 1)
+            text = parts[1] if len(parts) > 1 else ''
+
+    if not text.strip():
+        await reply(update, context, form_guide(), reply_markup=ReplyKeyboardRemove())
+        return FORM_UPLOAD
+
+    values = parse_form(text, form_flow.keys)
+    if not values:
+        await reply(
+            update, context,
+            "⚠️ 입력하신 내용에서 항목을 찾지 못했습니다.\n\n" + form_guide(),
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return FORM_UPLOAD
+
+    return await submit_form(update, context, values)
 
-async def handle_difference(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def submit_form(update: Update, context: ContextTypes.DEFAULT_TYPE, values: dict):
+    """해석한 양식 저장 후 빠진 항목 질문 또는 분석 시작"""
+    missing = [key for key in form_flow.keys if key not in values]
+    summary = f"✅ {len(values)}/{len(form_flow.keys)}개 항목을 입력받았습니다."
+    if missing:
+        labels = ', '.join(FIELD_LABELS.get(key, key) for key in missing)
+        summary += f"\n빠진 항목({labels})만 이어서 질문드릴게요."
+    await reply(update, context, summary, reply_markup=ReplyKeyboardRemove())
+    return await form_flow.fill(update, context, values)
+
+@traced()
+async def handle_form_complete(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    차별점 처리 핸들러
+    입력 완료 처리 핸들러
     
-    사용자가 선택한 차별점을 저장하고
-    다음 단계(구성요소와 작동 방식)로 진행합니다.
+    마지막 질문(개발 상태)까지 답변이 저장되면 AI 분석을 시작합니다.
+    최근에 거의 같은 내용을 분석한 적이 있으면 이전 결과 재사용 여부를 먼저 묻습니다.
     """
-    context.user_data['difference'] = update.message.text
-    reply_markup = ReplyKeyboardMarkup(COMPONENTS_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
-        Elon.QUESTIONS['components'],
-        reply_markup=reply_markup
-    )
-    return COMPONENTS
+    if config.DEDUP_ENABLED:
+        match = similarity_index.find(current_tenant().user_key(update.effective_user.id), context.user_data)
+        if match:
+            similarity, previous_result = match
+            context.user_data['duplicate_result'] = previous_result
+            await reply(
+                update, context,
+                f"♻️ 최근에 분석한 내용과 {similarity:.0%} 유사합니다.\n"
+                "이전 분석 결과를 바로 확인하시겠어요?",
+                reply_markup=ReplyKeyboardMarkup(DUPLICATE_KEYBOARD, resize_keyboard=True)
+            )
+            return DUPLICATE_CHOICE
 
-async def handle_components(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    return await run_analysis(update, context)
+
+@traced()
+async def handle_duplicate_choice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    구성요소 처리 핸들러
+    유사 결과 재사용 선택 처리 핸들러
     
-    사용자가 선택한 구성요소를 저장하고
-    다음 단계(기술적 효과)로 진행합니다.
+    이전 결과 보기를 선택하면 AI 호출 없이 저장된 결과를 바로 보여주고,
+    그 외에는 메모된 단계 결과도 쓰지 않고 새로 분석을 진행합니다.
     """
-    context.user_data['components'] = update.message.text
-    reply_markup = ReplyKeyboardMarkup(EFFECTS_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
-        Elon.QUESTIONS['effects'],
-        reply_markup=reply_markup
+    previous_result = context.user_data.pop('duplicate_result', None)
+
+    if update.message.text == '♻️ 이전 결과 보기' and previous_result:
+        await show_previous_result(update, context, previous_result)
+        return ConversationHandler.END
+
+    return await run_analysis(update, context, fresh=True)
+
+async def show_previous_result(update: Update, context: ContextTypes.DEFAULT_TYPE, previous_result: dict):
+    """AI 호출 없이 이전 분석 결과 전송 (유사 결과 재사용, 과부하 시 캐시 응답)"""
+    formatted_result = {
+        'summary': previous_result.get('summary', ''),
+        'case_studies': previous_result.get('case_studies', []),
+        'feasibility': previous_result.get('feasibility', []),
+        'development_plan': previous_result.get('development_plan', []),
+        'improvements': previous_result.get('improvements', [])
+    }
+    context.user_data['analysis_result'] = formatted_result
+    # 이전 결과를 만든 입력 (/edit 로 항목을 고칠 때 비교 기준)
+    context.user_data['analysis_inputs'] = {
+        key: previous_result.get(key, context.user_data.get(key, '')) for key in FORM_FIELDS
+    }
+
+    await send_analysis_result(
+        context.bot,
+        update.effective_chat.id,
+        formatted_result,
+        reply_markup=ReplyKeyboardRemove()
     )
-    return EFFECTS
+    await send_completion_message(context.bot, update.effective_chat.id)
 
-async def handle_effects(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def send_analysis_result(bot, chat_id: int, result: dict, **kwargs):
     """
-    기술적 효과 처리 핸들러
-    
-    사용자가 선택한 효과를 저장하고
-    다음 단계(기술적 한계)로 진행합니다.
+    분석 결과 전송
+
+    텔레그램 서식(HTML 등)으로 변환하고 길이 제한에 맞게 미리 나눈 조각을 순서대로 보냅니다.
     """
-    context.user_data['effects'] = update.message.text
-    reply_markup = ReplyKeyboardMarkup(LIMITATIONS_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
-        Elon.QUESTIONS['limitations'],
-        reply_markup=reply_markup
+    chunks = result_renderer.render(result)
+    await get_messenger(bot).send_chunks(
+        chat_id,
+        chunks,
+        parse_mode=result_renderer.parse_mode,
+        **kwargs
     )
-    return LIMITATIONS
 
-async def handle_limitations(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """
-    기술적 한계 처리 핸들러
-    
-    사용자가 선택한 한계를 저장하고
-    다음 단계(산업 분야)로 진행합니다.
-    """
-    context.user_data['limitations'] = update.message.text
-    reply_markup = ReplyKeyboardMarkup(INDUSTRY_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
-        Elon.QUESTIONS['industry'],
+async def send_completion_message(bot, chat_id: int):
+    """분석 완료 안내와 인라인 키보드 전송"""
+    keyboard = [
+        [
+            InlineKeyboardButton("외부 링크 연결", url="http://starlenz.notion.site")
+        ],
+        [
+            InlineKeyboardButton("공유하기", url="https://t.me/share/url?url=https://t.me/starlenz_bot&text=✨아이디어 분석 도우미✨"),
+            InlineKeyboardButton("관리자 문의", url="tg://resolve?domain=starlenz_inc")
+        ],
+    ]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    await get_messenger(bot).send_message(
+        chat_id,
+        "분석이 완료되었습니다!",
         reply_markup=reply_markup
     )
-    return INDUSTRY
 
-async def handle_industry(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@traced()
+async def run_analysis(update: Update, context: ContextTypes.DEFAULT_TYPE, previous: Optional[dict] = None,
+                       fresh: bool = False):
     """
-    산업 분야 처리 핸들러
+    AI 분석 시작
     
-    사용자가 선택한 산업 분야를 저장하고
-    다음 단계(물리적 특성)로 진행합니다.
+    분석은 백그라운드 작업으로 실행하고 핸들러는 바로 반환합니다.
+    진행 상황은 안내 메시지를 수정해 보여주고, 결과는 완료되는 대로 전송합니다.
+    사용자당 하나의 분석만 동시에 진행할 수 있습니다.
+
+    previous (이전 결과와 그 입력, /edit) 가 있으면 바뀐 항목의 영향을 받는 부분만 다시 분석합니다.
+    fresh (사용자가 이전 결과 대신 새로 분석하기를 고름) 이면 메모된 결과를 쓰지 않습니다.
     """
-    context.user_data['industry'] = update.message.text
-    reply_markup = ReplyKeyboardMarkup(SPECIFICATIONS_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
-        Elon.QUESTIONS['specifications'],
-        reply_markup=reply_markup
+    tenant = current_tenant()
+    analysis_jobs = tenant.jobs
+    user_id = update.effective_user.id
+    user_key = tenant.user_key(user_id)
+    chat_id = update.effective_chat.id
+
+    # 입력값은 시작 시점 기준으로 고정 (분석 중 새 대화를 시작해도 영향 없음)
+    input_data = dict(context.user_data)
+    request_key = (user_key, input_fingerprint(input_data, FORM_FIELDS))
+
+    # 같은 입력으로 진행 중인 분석이 있으면 (버튼 두 번 누름 등) 그 결과를 기다림
+    if analysis_coalescer.attach(request_key):
+        await reply(
+            update, context,
+            "⏳ 같은 내용의 분석이 이미 진행 중입니다. 완료되면 결과를 보내드립니다.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return ConversationHandler.END
+
+    if not analysis_jobs.accepting:
+        await reply(
+            update, context,
+            "🔧 서버 재시작 중이라 잠시 분석을 받을 수 없습니다. 잠시 후 /start 로 다시 시도해주세요.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return ConversationHandler.END
+
+    if analysis_jobs.is_active(user_id):
+        await reply(
+            update, context,
+            "⏳ 이미 진행 중인 분석이 있습니다. 완료되면 결과를 보내드립니다.\n"
+            "취소하려면 /cancel 을 입력하세요.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return ConversationHandler.END
+
+    # 하루 비용 한도 확인 (넘으면 모델을 호출하지 않음)
+    exceeded = usage_ledger.check(user_key, tenant.daily_budget_usd)
+    if exceeded:
+        await reply(
+            update, context,
+            "💸 오늘 사용할 수 있는 분석 한도를 모두 사용했습니다. 내일 다시 시도해주세요."
+            if exceeded == USER_BUDGET else
+            "💸 오늘 준비된 분석 용량이 모두 소진되었습니다. 내일 다시 시도해주세요.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return ConversationHandler.END
+
+    # 과부하 단계에 따라 분석 수준 낮추기 (요청 제한 횟수를 쓰기 전에 확인)
+    tier = overload.tier()
+    if tier >= CACHED_ONLY:
+        # 이 사용자의 같은 입력의 메모된 결과, 없으면 비슷한 이전 결과 (새로 분석하기를 고른 경우 제외)
+        cached = None
+        if not previous and not fresh:
+            cached = langchain_service.cached_result(input_data, tenant.prompts, user_key)
+            match = None if cached else similarity_index.find(user_key, input_data)
+            if match:
+                cached = match[1]
+        if cached:
+            overload.shed(CACHED_ONLY)
+            await reply(
+                update, context,
+                "🚦 지금 요청이 많아 새로 분석하지 않고 같은(비슷한) 내용의 이전 분석 결과를 보내드립니다."
+            )
+            await show_previous_result(update, context, cached)
+            return ConversationHandler.END
+
+        overload.shed(REJECT)
+        await reply(
+            update, context,
+            f"🚦 지금 분석 요청이 많아 잠시 받을 수 없습니다. {format_wait(overload.retry_after())} 후에 다시 시도해주세요.\n"
+            "입력하신 내용은 /start 로 다시 작성해주세요.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return ConversationHandler.END
+    summary_only = tier == SUMMARY_ONLY and not previous
+    if summary_only:
+        overload.shed(SUMMARY_ONLY)
+
+    wait = analysis_throttle.check(user_key)
+    if wait > 0:
+        await reply(
+            update, context,
+            f"⏳ 분석 요청이 너무 잦습니다. {format_wait(wait)} 후에 다시 시도해주세요.\n"
+            "입력하신 내용은 /start 로 다시 작성해주세요.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return ConversationHandler.END
+
+    try:
+        # 분석 시작 메시지 전송 (진행 상황 표시에 재사용)
+        progress_message = await reply(
+            update, context,
+            tenant.messages.ANALYSIS_START,
+            reply_markup=ReplyKeyboardRemove()
+        )
+    except Exception as e:
+        logger.warning("분석 시작 메시지 전송 실패: %s", e, extra={'user_id': user_id})
+        return ConversationHandler.END
+
+    analysis_jobs.start(
+        user_id,
+        chat_id,
+        analysis_job(
+            context.bot, chat_id, user_id, input_data, context.user_data, progress_message, previous, summary_only,
+            fresh
+        ),
+        payload=pending_payload(chat_id, input_data, previous)
     )
-    return SPECIFICATIONS
+    return ConversationHandler.END
+
+def pending_payload(chat_id: int, input_data: dict, previous: Optional[dict] = None) -> dict:
+    """종료 시 끝나지 않은 분석을 다시 시작하는 데 필요한 정보"""
+    payload = {
+        'chat_id': chat_id,
+        'input_data': {key: input_data[key] for key in form_flow.keys if key in input_data},
+    }
+    if previous:
+        payload['previous'] = previous
+    return payload
+
+def application_tenant(application) -> Tenant:
+    """Application 이 실행하는 봇 (main.build_application 에서 bot_data 에 지정)"""
+    return application.bot_data.get('tenant', default_tenant)
 
-async def handle_specifications(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def drain_analyses(application):
     """
-    물리적 특성 처리 핸들러
-    
-    사용자가 선택한 특성을 저장하고
-    다음 단계(개발 상태)로 진행합니다.
+    종료 시 진행 중인 분석 마무리 (봇별로 호출)
+
+    1. 새 분석 받지 않기
+    2. 진행 중인 분석(AI 호출, 결과 전송)이 끝날 때까지 SHUTDOWN_DRAIN_TIMEOUT 초 대기
+    3. 끝나지 않은 분석은 취소하고 입력값을 저장 (다음 시작 시 다시 진행)
+    4. 대기 중인 데이터베이스 쓰기 반영
     """
-    context.user_data['specifications'] = update.message.text
-    reply_markup = ReplyKeyboardMarkup(STATUS_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
-        Elon.QUESTIONS['status'],
-        reply_markup=reply_markup
-    )
-    return STATUS
+    tenant = application_tenant(application)
+    analysis_jobs = tenant.jobs
+    analysis_jobs.close()
+    active = analysis_jobs.active_count()
+    if active:
+        logger.info("종료 준비: 진행 중인 분석 %d건 완료 대기 (최대 %g초)", active, config.SHUTDOWN_DRAIN_TIMEOUT)
 
-async def handle_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    finished, unfinished = await analysis_jobs.drain(config.SHUTDOWN_DRAIN_TIMEOUT)
+
+    saved = 0
+    for job in unfinished:
+        if not job.payload:
+            logger.warning("종료로 중단된 분석을 저장하지 못했습니다 (입력값 없음)", extra={'user_id': job.user_id})
+            continue
+        try:
+            await asyncio.to_thread(save_session, tenant.kind(PENDING_ANALYSIS_KIND), str(job.user_id), job.payload)
+            saved += 1
+        except Exception as e:
+            logger.error("중단된 분석 저장 실패: %s", e, extra={'user_id': job.user_id})
+            continue
+        try:
+            await get_messenger(application.bot).send_message(
+                job.chat_id,
+                "🔧 서버 재시작으로 분석이 잠시 중단되었습니다. 재시작 후 자동으로 이어서 진행합니다."
+            )
+        except Exception as e:
+            logger.warning("중단 안내 전송 실패: %s", e, extra={'user_id': job.user_id})
+
+    try:
+        await asyncio.to_thread(flush)
+    except Exception as e:
+        logger.error("종료 전 데이터베이스 쓰기 반영 실패: %s", e)
+
+    if finished or unfinished:
+        logger.info(
+            "종료 준비 완료: 완료 %d건, 중단 %d건 (다음 시작 시 재개 %d건, 버림 %d건)",
+            len(finished), len(unfinished), saved, len(unfinished) - saved,
+            extra={
+                'tenant': tenant.name,
+                'drained': len(finished),
+                'resumable': saved,
+                'dropped': len(unfinished) - saved,
+            }
+        )
+
+async def resume_pending_analyses(application):
+    """시작 시 지난 종료 때 중단된 분석 다시 진행 (봇별로 호출)"""
+    tenant = application_tenant(application)
+    try:
+        pending = await asyncio.to_thread(get_sessions, tenant.kind(PENDING_ANALYSIS_KIND))
+    except Exception as e:
+        logger.warning("중단된 분석 조회 실패 (무시하고 계속 진행): %s", e)
+        return
+
+    bot = application.bot
+    resumed = 0
+    for key, payload in pending.items():
+        user_id = int(key)
+        chat_id = payload['chat_id']
+        input_data = payload['input_data']
+        # 저장된 입력은 작업이 시작된 뒤에만 지움 (전송이나 시작에 실패하면 다음 시작 때 다시 시도)
+        try:
+            progress_message = await get_messenger(bot).send_message(
+                chat_id,
+                f"🔄 중단되었던 분석을 다시 진행합니다.\n{tenant.messages.ANALYSIS_START}"
+            )
+        except Exception as e:
+            logger.warning("중단된 분석 재개 실패: %s", e, extra={'user_id': user_id})
+            continue
+
+        job = tenant.jobs.start(
+            user_id,
+            chat_id,
+            analysis_job(
+                bot, chat_id, user_id, input_data, application.user_data[user_id], progress_message,
+                payload.get('previous')
+            ),
+            payload=payload
+        )
+        if not job:
+            logger.warning("중단된 분석 재개 실패: 작업을 시작할 수 없음", extra={'user_id': user_id})
+            continue
+        resumed += 1
+
+        try:
+            await asyncio.to_thread(save_session, tenant.kind(PENDING_ANALYSIS_KIND), key, None)
+        except Exception as e:
+            # 지우지 못하면 다음 시작 때 같은 분석을 한 번 더 진행할 수 있음
+            logger.warning("재개한 분석의 저장된 입력 삭제 실패: %s", e, extra={'user_id': user_id})
+
+    if pending:
+        logger.info("중단된 분석 재개: %d/%d건", resumed, len(pending))
+
+@traced()
+async def analysis_job(
+    bot,
+    chat_id: int,
+    user_id: int,
+    input_data: dict,
+    user_data: dict,
+    progress_message,
+    previous: Optional[dict] = None,
+    summary_only: bool = False,
+    fresh: bool = False
+):
     """
-    개발 상태 처리 핸들러
-    
-    사용자가 선택한 개발 상태를 저장하고
-    AI 분석을 시작합니다.
+    백그라운드 분석 작업
+
+    AI 분석 수행, 결과 저장, 결과 전송을 차례로 진행합니다.
+    작업이 취소되면 진행 중인 API 요청도 함께 중단됩니다.
+    previous ({'inputs': 이전 입력, 'result': 이전 결과}) 가 있으면 이전 결과를 고치고,
+    summary_only 이면 (과부하) 명세서 초안만 작성하고, fresh 이면 메모된 단계 결과를 쓰지 않습니다.
     """
-    context.user_data['status'] = update.message.text
-    
+    tenant = current_tenant()
+    user_key = tenant.user_key(user_id)
+    messenger = get_messenger(bot)
+    started_at = time.monotonic()
+    stage = {'label': ANALYSIS_STAGES['revise_summary' if previous else 'summary']}
+
+    async def show_progress():
+        elapsed = int(time.monotonic() - started_at)
+        try:
+            await messenger.call(
+                chat_id,
+                lambda: progress_message.edit_text(
+                    f"{tenant.messages.ANALYSIS_START}\n⏳ {stage['label']} ({elapsed}초 경과)"
+                )
+            )
+        except Exception as e:
+            # 같은 내용 수정, 메시지 삭제 등은 분석에 영향 없음
+            logger.debug("진행 상황 표시 실패: %s", e)
+
+    async def on_stage(name: str):
+        stage['label'] = ANALYSIS_STAGES.get(name, name)
+        await show_progress()
+
+    async def ticker():
+        while True:
+            await asyncio.sleep(PROGRESS_UPDATE_INTERVAL)
+            await show_progress()
+
+    async def analyze():
+        # 모든 봇이 함께 쓰는 실행 순서에서 차례를 기다린 뒤 분석
+        if not admission.available(tenant.name, tenant.max_concurrent_analyses):
+            await on_stage('queued')
+        on_usage = lambda model, usage: usage_ledger.record(user_key, model, usage)
+        async with admission.admit(tenant.name, tenant.max_concurrent_analyses, tenant.weight):
+            analysis_started = time.monotonic()
+            if previous:
+                result = await langchain_service.revise_startup(
+                    input_data,
+                    previous['inputs'],
+                    previous['result'],
+                    progress=on_stage,
+                    on_usage=on_usage,
+                    prompts=tenant.prompts,
+                    user_key=user_key
+                )
+            else:
+                result = await langchain_service.analyze_startup(
+                    input_data,
+                    progress=on_stage,
+                    on_usage=on_usage,
+                    prompts=tenant.prompts,
+                    summary_only=summary_only,
+                    user_key=user_key,
+                    fresh=fresh
+                )
+            # 과부하 판단에 쓰는 최근 분석 시간
+            overload.observe(time.monotonic() - analysis_started)
+            return result
+
+    ticker_task = asyncio.create_task(ticker())
+    try:
+        # AI 분석 수행 및 결과 대기 (같은 입력으로 진행 중인 분석이 있으면 결과 공유)
+        request_key = (user_key, input_fingerprint(input_data, FORM_FIELDS))
+        analysis_result = await analysis_coalescer.run(request_key, analyze)
+    except asyncio.CancelledError:
+        logger.info("분석 작업 취소됨", extra={'user_id': user_id})
+        raise
+    finally:
+        ticker_task.cancel()
+
     try:
-        # 분석 시작 메시지 전송
-        await update.message.reply_text(
-            Elon.ANALYSIS_START,
-            reply_markup=ReplyKeyboardRemove()
-        )
-        
-        # AI 분석 수행 및 결과 대기
-        analysis_result = await langchain_service.analyze_startup(context.user_data)
-        
         if not analysis_result:
-            await update.message.reply_text(
+            await messenger.send_message(
+                chat_id,
                 "⚠️ 분석 중 오류가 발생했습니다. 다시 시도해주세요."
             )
-            return ConversationHandler.END
-            
+            return
+
         # 분석 결과 저장 (실패해도 분석은 계속 진행)
         try:
-            save_analysis(
-                telegram_id=update.effective_user.id,
-                input_data=context.user_data,
+            await asyncio.to_thread(
+                save_analysis,
+                telegram_id=user_key,
+                input_data=input_data,
                 result=analysis_result
             )
         except Exception as e:
-            print(f"데이터베이스 저장 오류: {e}")
-            await update.message.reply_text(
+            logger.error("데이터베이스 저장 오류: %s", e, extra={'user_id': user_id})
+            await messenger.send_message(
+                chat_id,
                 "⚠️ 분석 중 오류가 발생했습니다. 다시 시도해주세요."
             )
-            return ConversationHandler.END
-        
+            return
+
         # 분석 결과 구조 보존
         formatted_result = {
             'summary': analysis_result.get('summary', ''),
@@ -372,49 +882,44 @@ async def handle_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
             'development_plan': analysis_result.get('development_plan', []),
             'improvements': analysis_result.get('improvements', [])
         }
-        
-        # 디버깅 로그
-        print("\n=== Analysis Result Structure ===")
-        for key, value in formatted_result.items():
-            print(f"\n{key}:")
-            if isinstance(value, list):
-                for item in value:
-                    print(f"  {item}")
-            else:
-                print(f"  {value}")
-        
-        context.user_data['analysis_result'] = formatted_result
-        
+
+        # 디버깅 로그 (섹션별 항목 수만 기록)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "분석 결과 구조",
+                extra={
+                    'user_id': user_id,
+                    'sections': {
+                        key: len(value) if isinstance(value, list) else len(value or '')
+                        for key, value in formatted_result.items()
+                    },
+                }
+            )
+
+        user_data['analysis_result'] = formatted_result
+        # 결과를 만든 입력 (/edit 로 항목을 고칠 때 비교 기준)
+        user_data['analysis_inputs'] = {key: input_data.get(key, '') for key in FORM_FIELDS}
+
         # 분석 결과 메시지 전송
-        formatted_message = Elon.format_analysis_result(formatted_result)
-        await update.message.reply_text(formatted_message)
-        
-        # 분석 완료 후 인라인 키보드 생성
-        keyboard = [
-            [
-                InlineKeyboardButton("외부 링크 연결", url="http://starlenz.notion.site")
-            ],
-            [
-                InlineKeyboardButton("공유하기", url="https://t.me/share/url?url=https://t.me/starlenz_bot&text=✨아이디어 분석 도우미✨"),
-                InlineKeyboardButton("관리자 문의", url="tg://resolve?domain=starlenz_inc")
-            ],
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(
-            "분석이 완료되었습니다!",
-            reply_markup=reply_markup
-        )
-        
-        return ConversationHandler.END
-        
-    except Exception as e:
-        print(f"분석 중 오류 발생: {e}")
-        await update.message.reply_text(
+        await send_analysis_result(bot, chat_id, formatted_result)
+        if analysis_result.get('partial'):
+            await messenger.send_message(
+                chat_id,
+                "🚦 지금 요청이 많아 명세서 초안만 작성했습니다.\n"
+                "상세 분석이 필요하면 잠시 후 /edit 로 항목을 고치거나 /start 로 다시 요청해주세요."
+            )
+
+        # 분석 완료 안내
+        await send_completion_message(bot, chat_id)
+
+    except Exception:
+        logger.exception("분석 결과 전송 중 오류 발생", extra={'user_id': user_id})
+        await messenger.send_message(
+            chat_id,
             "⚠️ 시스템 오류가 발생했습니다. 다시 시도해주세요."
         )
-        return ConversationHandler.END
 
+@traced()
 async def handle_analysis(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     분석 결과 처리 핸들러
@@ -423,16 +928,20 @@ async def handle_analysis(update: Update, context: ContextTypes.DEFAULT_TYPE):
     분석 결과가 없는 경우 오류 메시지를 표시합니다.
     """
     if 'analysis_result' not in context.user_data:
-        await update.message.reply_text(
+        await reply(
+            update, context,
             "❌ 분석 결과를 찾을 수 없습니다. 다시 시작해주세요."
         )
         return ConversationHandler.END
     
-    await update.message.reply_text(
-        Elon.format_analysis_result(context.user_data['analysis_result'])
+    await send_analysis_result(
+        context.bot,
+        update.effective_chat.id,
+        context.user_data['analysis_result']
     )
     return ConversationHandler.END
 
+@traced()
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     도움말 명령어 핸들러
@@ -443,7 +952,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     help_text = (
         "가이드:\n\n"
         "/start | 새로운 분석 시작\n"
-        "/help | 도움말\n\n"
+        "/help | 도움말\n"
+        "/submit | 모든 항목 한 번에 입력 (텍스트 또는 .txt/.md 파일)\n"
+        "/edit | 분석한 내용 중 항목 하나만 고쳐서 다시 분석\n\n"
         "@starlenz_inc | 관리자 연결"
     )
     
@@ -451,9 +962,10 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     reply_markup = ReplyKeyboardMarkup(HELP_KEYBOARD, resize_keyboard=True)
     
     # 텍스트와 기존 키보드를 함께 전송
-    await update.message.reply_text(help_text, reply_markup=reply_markup)
+    await reply(update, context, help_text, reply_markup=reply_markup)
     return HELP_MENU
 
+@traced()
 async def handle_help_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     도움말 메뉴 처리 핸들러
@@ -479,7 +991,8 @@ async def handle_help_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if text in urls:
         keyboard = [[InlineKeyboardButton("✨ 바로가기 ✨", url=urls[text])]]
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.message.reply_text(
+        await reply(
+            update, context,
             "✨✨✨✨✨✨✨✨✨\n✨✨연결 메세지✨✨",
             reply_markup=reply_markup
         )
@@ -487,53 +1000,187 @@ async def handle_help_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # 기본 응답
     reply_markup = ReplyKeyboardMarkup(HELP_KEYBOARD, resize_keyboard=True)
-    await update.message.reply_text(
+    await reply(
+        update, context,
         "메뉴를 선택해주세요. /help",
         reply_markup=reply_markup
     )
     return HELP_MENU
 
+@traced()
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     취소 명령어 핸들러
     
     사용자가 /cancel 명령어를 입력했을 때 실행됩니다.
-    현재 진행 중인 대화를 취소하고 초기 상태로 돌아갑니다.
+    현재 진행 중인 대화와 분석 작업을 취소하고 초기 상태로 돌아갑니다.
     """
-    await update.message.reply_text(
+    current_tenant().jobs.cancel(update.effective_user.id)
+    await reply(
+        update, context,
         "🛑 분석이 취소되었습니다. 새로 시작하려면 /start 를 입력하세요.",
         reply_markup=ReplyKeyboardRemove()
     )
     return ConversationHandler.END
 
-# 대화 핸들러 생성
-analysis_conversation = ConversationHandler(
-    entry_points=[
-        CommandHandler("start", start_conversation),
-        CommandHandler("help", help_command),
-        CommandHandler("cancel", cancel)
-    ],
-    
-    states={
-        WAITING_START: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_start_response)],
-        IDEA: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_idea)],
-        PROBLEM: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_problem)],
-        MECHANISM: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_mechanism)],
-        DIFFERENCE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_difference)],
-        COMPONENTS: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_components)],
-        EFFECTS: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_effects)],
-        LIMITATIONS: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_limitations)],
-        INDUSTRY: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_industry)],
-        SPECIFICATIONS: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_specifications)],
-        STATUS: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_status)],
-        ANALYZING: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_analysis)],
-        HELP_MENU: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_help_menu)]
-    },
-    
-    # 폴백 - 어떤 상태에서든 실행할 수 있는 명령어들
-    fallbacks=[
-        CommandHandler("start", start_conversation), 
-        CommandHandler("help", help_command),
-        CommandHandler("cancel", cancel)
-    ]
-)
+def edit_keyboard() -> ReplyKeyboardMarkup:
+    """수정할 항목 선택 키보드 (항목 이름 두 개씩)"""
+    labels = [FIELD_LABELS.get(key, key) for key in form_flow.keys]
+    rows = [labels[index:index + 2] for index in range(0, len(labels), 2)]
+    return ReplyKeyboardMarkup(rows + [[EDIT_CANCEL]], resize_keyboard=True)
+
+@traced()
+async def edit_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    항목 수정 명령어 핸들러 (/edit)
+
+    분석 결과가 있으면 수정할 항목을 고르게 합니다.
+    새 답변을 받으면 처음부터 다시 분석하지 않고 이전 결과에서 바뀐 부분만 고칩니다.
+    """
+    if 'analysis_result' not in context.user_data or 'analysis_inputs' not in context.user_data:
+        await reply(
+            update, context,
+            "✏️ 수정할 분석 결과가 없습니다. /start 로 먼저 분석을 진행해주세요.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return ConversationHandler.END
+
+    await reply(
+        update, context,
+        "✏️ 수정할 항목을 선택해주세요.\n바뀐 항목의 영향을 받는 부분만 다시 분석합니다.",
+        reply_markup=edit_keyboard()
+    )
+    return EDIT_FIELD
+
+@traced()
+async def handle_edit_field(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """수정할 항목 선택 처리 (선택한 항목의 질문과 현재 답변 표시)"""
+    text = update.message.text
+    if text == EDIT_CANCEL:
+        await reply(update, context, "수정을 취소했습니다.", reply_markup=ReplyKeyboardRemove())
+        return ConversationHandler.END
+
+    key = next((key for key in form_flow.keys if FIELD_LABELS.get(key, key) == text), None)
+    if key is None:
+        await reply(update, context, "아래 버튼에서 수정할 항목을 선택해주세요.", reply_markup=edit_keyboard())
+        return EDIT_FIELD
+
+    context.user_data['edit_field'] = key
+    index = form_flow.position(key)
+    current = context.user_data['analysis_inputs'].get(key, '')
+    await reply(
+        update, context,
+        f"{tenant_question(form_flow.steps[index])}\n\n현재 답변: {current}",
+        reply_markup=form_flow.markup_for(index)
+    )
+    return EDIT_VALUE
+
+@traced()
+async def handle_edit_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """수정한 답변 저장 후 이전 결과에서 바뀐 부분만 다시 분석"""
+    key = context.user_data.pop('edit_field', None)
+    previous_inputs = context.user_data.get('analysis_inputs')
+    previous_result = context.user_data.get('analysis_result')
+    if key is None or previous_inputs is None or previous_result is None:
+        await reply(update, context, "✏️ 수정할 분석 결과가 없습니다. /start 로 다시 시작해주세요.")
+        return ConversationHandler.END
+
+    value = update.message.text
+    if value.strip() == str(previous_inputs.get(key, '')).strip():
+        await reply(update, context, "바뀐 내용이 없어 이전 결과를 그대로 사용합니다.", reply_markup=ReplyKeyboardRemove())
+        return ConversationHandler.END
+
+    # 다른 항목은 이전 결과를 만든 입력 그대로 사용
+    context.user_data.update(previous_inputs)
+    context.user_data[key] = value
+    return await run_analysis(
+        update, context,
+        previous={'inputs': dict(previous_inputs), 'result': dict(previous_result)}
+    )
+
+def tenant_question(step: FlowStep) -> str:
+    """현재 봇의 질문 문구 (봇 설정에서 바꾸지 않았으면 흐름의 기본 질문)"""
+    return current_tenant().questions.get(step.key, step.question)
+
+# 질문 흐름 엔진 (FLOW_CONFIG_PATH 가 있으면 설정 파일의 흐름 사용, 모든 봇이 같은 흐름 사용)
+# 분석 프롬프트가 사용하는 항목(FORM_FIELDS)은 모두 흐름에 포함되어야 합니다.
+if config.FLOW_CONFIG_PATH:
+    form_flow = FlowEngine.from_config(
+        config.FLOW_CONFIG_PATH, Elon.QUESTIONS, reply, handle_form_complete, FLOW_STATE_BASE,
+        question_for=tenant_question
+    )
+else:
+    form_flow = FlowEngine(FORM_STEPS, reply, handle_form_complete, FLOW_STATE_BASE, question_for=tenant_question)
+
+def menu_texts() -> set:
+    """메뉴 버튼 글자 전체 (트래픽 기록 시 익명화하지 않음)"""
+    edit_labels = [[FIELD_LABELS.get(key, key) for key in form_flow.keys], [EDIT_CANCEL]]
+    keyboards = [HELP_KEYBOARD, START_KEYBOARD, DUPLICATE_KEYBOARD, edit_labels] + [step.keyboard for step in form_flow.steps]
+    return {text for keyboard in keyboards for row in keyboard for text in row}
+
+# 명령어 요청 제한 (main.py 에서 대화 핸들러보다 앞선 그룹에 등록)
+command_throttle_handler = MessageHandler(filters.COMMAND, throttle_commands)
+
+def create_conversation(name: str) -> ConversationHandler:
+    """대화 핸들러 생성 (봇마다 대화 상태를 따로 가지도록 봇별로 생성)"""
+    return ConversationHandler(
+        entry_points=[
+            CommandHandler("start", start_conversation),
+            CommandHandler("help", help_command),
+            CommandHandler("cancel", cancel),
+            CommandHandler("submit", handle_form_submission),
+            CommandHandler("edit", edit_command),
+            MessageHandler(FORM_DOCUMENT, handle_form_submission)
+        ],
+
+        states={
+            WAITING_START: [MessageHandler(TEXT_INPUT, handle_start_response)],
+            **form_flow.states(),
+            ANALYZING: [MessageHandler(TEXT_INPUT, handle_analysis)],
+            HELP_MENU: [MessageHandler(TEXT_INPUT, handle_help_menu)],
+            DUPLICATE_CHOICE: [MessageHandler(TEXT_INPUT, handle_duplicate_choice)],
+            FORM_UPLOAD: [MessageHandler(TEXT_INPUT | FORM_DOCUMENT, handle_form_submission)],
+            EDIT_FIELD: [MessageHandler(TEXT_INPUT, handle_edit_field)],
+            EDIT_VALUE: [MessageHandler(TEXT_INPUT, handle_edit_value)]
+        },
+
+        # 폴백 - 어떤 상태에서든 실행할 수 있는 명령어들
+        fallbacks=[
+            CommandHandler("start", start_conversation),
+            CommandHandler("help", help_command),
+            CommandHandler("cancel", cancel),
+            CommandHandler("submit", handle_form_submission),
+            CommandHandler("edit", edit_command),
+            MessageHandler(FORM_DOCUMENT, handle_form_submission)
+        ],
+
+        # 대화 상태 저장 (PERSIST_CONVERSATIONS 사용 시 데이터베이스에 저장)
+        name=name,
+        persistent=config.PERSIST_CONVERSATIONS
+    )
+
+def setup_tenant(tenant: Tenant) -> Tenant:
+    """
+    봇 실행 준비 (웰컴 이미지 등록, 대화 핸들러와 세션 정리 생성)
+
+    main.build_application 에서 봇마다 한 번 호출합니다.
+    """
+    if tenant.conversation is not None:
+        return tenant
+
+    # 정적 자산 등록 (웰컴 이미지)
+    assets.register(tenant.kind('welcome'), tenant.messages.WELCOME_IMG_URL)
+
+    tenant.conversation = create_conversation(tenant.kind('analysis'))
+
+    # 세션 정리 (방치된 대화 종료, 오래된 사용자 데이터 삭제, 전체 메모리 한도)
+    tenant.session_reaper = SessionReaper(
+        tenant.conversation,
+        idle_timeout=config.SESSION_IDLE_TIMEOUT,
+        ttl=config.SESSION_TTL,
+        max_bytes=config.SESSION_MAX_BYTES,
+        interval=config.SESSION_REAP_INTERVAL,
+        is_busy=tenant.jobs.is_active,
+        idle_message="⌛ 한동안 입력이 없어 진행 중이던 대화를 종료했습니다.\n다시 시작하려면 /start 를 입력하세요."
+    )
+    return tenant
@@ -0,0 +1,189 @@
+"""
+대화 흐름 엔진 모듈
+
+질문 순서를 표(단계 목록)로 정의하면
+질문 전송, 답변 저장, 다음 단계 이동, ConversationHandler 상태 생성을 자동으로 처리합니다.
+
+단계 정의:
+- key: 답변을 저장할 context.user_data 키
+- question: 질문 문구
+- keyboard: 선택 버튼 (없으면 자유 입력)
+
+키보드 객체는 엔진 생성 시 한 번만 만들어 재사용하며,
+상태별 핸들러는 미리 만들어 둔 함수를 바로 호출합니다 (상태당 O(1)).
+
+fill 로 여러 항목을 한 번에 채우면 비어 있는 단계만 이어서 질문합니다.
+
+흐름은 JSON 설정 파일로도 불러올 수 있습니다:
+{
+    "steps": [
+        {"key": "idea"},
+        {"key": "problem", "keyboard": [["🔧 성능/효율성", "💡 기술적 한계"], ["✨ 직접 입력"]]},
+        {"key": "custom", "question": "직접 작성한 질문", "keyboard": []}
+    ]
+}
+question 이 없으면 questions 사전에서 key 로 질문을 찾습니다.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from telegram import Update, ReplyKeyboardMarkup
+from telegram.ext import ContextTypes, MessageHandler, filters
+
+from services.tracing import span
+
+# 답변으로 받을 메시지 (명령어 제외 텍스트)
+TEXT_INPUT = filters.TEXT & ~filters.COMMAND
+
+
+@dataclass(frozen=True)
+class FlowStep:
+    """대화 흐름의 한 단계"""
+
+    key: str
+    question: str
+    keyboard: Tuple[Tuple[str, ...], ...] = ()
+
+
+class FlowEngine:
+    """
+    표 기반 대화 흐름 엔진
+
+    Args:
+        steps: 순서대로 정렬된 단계 목록
+        send: 메시지 전송 함수 (update, context, text, reply_markup=...)
+        on_complete: 마지막 단계 답변 저장 후 호출할 핸들러 (다음 상태 반환)
+        first_state: 첫 단계의 대화 상태 번호 (이후 단계는 1씩 증가)
+        question_for: 보낼 질문 문구를 정하는 함수 (봇마다 질문을 바꿀 때, 없으면 단계의 question)
+    """
+
+    def __init__(
+        self,
+        steps: Iterable[FlowStep],
+        send: Callable[..., Awaitable],
+        on_complete: Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[int]],
+        first_state: int = 100,
+        question_for: Optional[Callable[[FlowStep], str]] = None
+    ):
+        self.steps: Tuple[FlowStep, ...] = tuple(steps)
+        if not self.steps:
+            raise ValueError("대화 흐름에는 최소 한 개의 단계가 필요합니다.")
+
+        self.send = send
+        self.on_complete = on_complete
+        self.first_state = first_state
+        self.question_for = question_for
+        self.keys: Tuple[str, ...] = tuple(step.key for step in self.steps)
+        self._positions: Dict[str, int] = {key: index for index, key in enumerate(self.keys)}
+
+        # 키보드 객체는 한 번만 생성 (텔레그램 객체는 생성 후 변경 불가)
+        self._markups: Tuple[Optional[ReplyKeyboardMarkup], ...] = tuple(
+            ReplyKeyboardMarkup(step.keyboard, resize_keyboard=True) if step.keyboard else None
+            for step in self.steps
+        )
+        self._handlers = tuple(self._make_handler(index) for index in range(len(self.steps)))
+
+    @classmethod
+    def from_config(
+        cls,
+        path: str,
+        questions: Dict[str, str],
+        send: Callable[..., Awaitable],
+        on_complete: Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[int]],
+        first_state: int = 100,
+        question_for: Optional[Callable[[FlowStep], str]] = None
+    ) -> 'FlowEngine':
+        """JSON 설정 파일에서 흐름 불러오기"""
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(load_steps(config, questions), send, on_complete, first_state, question_for)
+
+    def state_for(self, index: int) -> int:
+        """단계 번호에 해당하는 대화 상태"""
+        return self.first_state + index
+
+    def position(self, key: str) -> int:
+        """항목 키의 단계 번호"""
+        return self._positions[key]
+
+    def markup_for(self, index: int) -> Optional[ReplyKeyboardMarkup]:
+        """단계의 키보드"""
+        return self._markups[index]
+
+    async def ask(self, update: Update, context: ContextTypes.DEFAULT_TYPE, index: int) -> int:
+        """단계 질문 전송 후 해당 대화 상태 반환"""
+        step = self.steps[index]
+        await self.send(
+            update, context,
+            self.question_for(step) if self.question_for else step.question,
+            reply_markup=self._markups[index]
+        )
+        return self.state_for(index)
+
+    def reset(self, user_data: dict):
+        """이전에 입력한 답변 지우기"""
+        for key in self.keys:
+            user_data.pop(key, None)
+
+    def first_missing(self, user_data: dict, start: int = 0) -> Optional[int]:
+        """start 단계부터 답변이 없는 첫 단계 번호 (모두 있으면 None)"""
+        for index in range(start, len(self.steps)):
+            if not user_data.get(self.keys[index]):
+                return index
+        return None
+
+    async def advance(self, update: Update, context: ContextTypes.DEFAULT_TYPE, start: int) -> int:
+        """start 단계부터 답변이 없는 단계를 질문하고, 모두 있으면 완료 처리"""
+        index = self.first_missing(context.user_data, start)
+        if index is None:
+            return await self.on_complete(update, context)
+        return await self.ask(update, context, index)
+
+    async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """이전 답변을 지우고 첫 단계 질문 전송"""
+        self.reset(context.user_data)
+        return await self.ask(update, context, 0)
+
+    async def fill(self, update: Update, context: ContextTypes.DEFAULT_TYPE, values: Dict[str, str]) -> int:
+        """
+        여러 항목을 한 번에 채우기
+
+        이전 답변을 지우고 values 를 저장한 뒤, 빠진 단계만 순서대로 질문합니다.
+        """
+        self.reset(context.user_data)
+        context.user_data.update({key: value for key, value in values.items() if key in self._positions})
+        return await self.advance(update, context, 0)
+
+    def _make_handler(self, index: int):
+        key = self.steps[index].key
+        next_index = index + 1
+
+        async def handle_step(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+            with span('handle_step', step=key):
+                context.user_data[key] = update.message.text
+                return await self.advance(update, context, next_index)
+
+        handle_step.__name__ = f"handle_{key}"
+        return handle_step
+
+    def states(self) -> Dict[int, List[MessageHandler]]:
+        """ConversationHandler 에 넣을 단계별 상태 정의"""
+        return {
+            self.state_for(index): [MessageHandler(TEXT_INPUT, handler)]
+            for index, handler in enumerate(self._handlers)
+        }
+
+
+def load_steps(config: dict, questions: Dict[str, str]) -> List[FlowStep]:
+    """설정(dict)에서 단계 목록 생성"""
+    steps = []
+    for item in config.get('steps', []):
+        key = item['key']
+        question = item.get('question') or questions.get(item.get('question_key', key))
+        if not question:
+            raise ValueError(f"'{key}' 단계의 질문이 없습니다.")
+        keyboard = tuple(tuple(row) for row in item.get('keyboard', []))
+        steps.append(FlowStep(key=key, question=question, keyboard=keyboard))
+    return steps
@@ -0,0 +1,145 @@
+"""
+한 번에 입력한 양식 해석 모듈
+
+여러 항목을 한 메시지(또는 .txt / .md 파일)로 보낸 내용을
+context.user_data 의 항목 키(idea, problem, ...)에 맞춰 나눕니다.
+
+지원 형식:
+1. "항목 이름: 내용" 줄 (다음 항목 이름이 나올 때까지 이어지는 줄도 같은 내용)
+2. 마크다운 제목 "## 항목 이름" 아래 문단
+항목 이름 앞의 번호, 글머리 기호, 이모지, 굵은 글씨 표시는 무시합니다.
+
+예시:
+    기술 개요: AI 기반 실시간 번역 이어폰
+    문제점: 기존 번역기는 지연이 큼
+    ## 작동 원리
+    음성 인식 후 온디바이스 번역 모델로 변환
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+# 항목별 대표 이름 (양식 안내에 사용)
+FIELD_LABELS = {
+    'idea': '기술 개요',
+    'problem': '문제점',
+    'mechanism': '작동 원리',
+    'difference': '차별점',
+    'components': '구성요소',
+    'effects': '기술적 효과',
+    'limitations': '기술적 한계',
+    'industry': '산업 분야',
+    'specifications': '물리적 특성',
+    'status': '개발 상태',
+}
+
+# 항목별로 함께 인식하는 이름
+FIELD_ALIASES = {
+    'idea': ('기술', '아이디어', '기술 설명', '발명', '발명 개요'),
+    'problem': ('기술적 문제점', '문제', '해결 과제', '해결하려는 문제'),
+    'mechanism': ('핵심 작동 원리', '원리', '메커니즘', '작동 방식'),
+    'difference': ('기존 기술과의 차별점', '차별성', '차이점'),
+    'components': ('주요 구성요소', '구성', '구성 요소'),
+    'effects': ('효과', '기대 효과'),
+    'limitations': ('한계', '제약사항', '제약 사항', '한계점'),
+    'industry': ('적용 분야', '산업', '활용 분야'),
+    'specifications': ('스펙', '상세 스펙', '사양', '물리적 특성 및 상세 스펙', 'specs'),
+    'status': ('개발 단계', '진행 상태', '개발 진행 상태'),
+}
+
+# 양식 파일 최대 크기 (바이트)
+MAX_FORM_FILE_SIZE = 64 * 1024
+
+# "항목 이름: 내용" 줄 (앞의 제목/번호/글머리 기호 표시 허용)
+_LABEL_LINE = re.compile(
+    r'^\s*(?:#{1,6}\s*|[-*•]\s+|\d{1,2}[.)]\s*)?(?:\*\*)?([^:：\n]{1,40}?)(?:\*\*)?\s*[:：]\s*(.*)$'
+)
+
+# 마크다운 제목 줄
+_HEADING_LINE = re.compile(r'^\s*#{1,6}\s*(.+?)\s*$')
+
+# 항목 이름 비교용 정규화 (영문 소문자, 숫자, 한글만 남김)
+_NOT_LABEL_CHAR = re.compile(r'[^0-9a-z가-힣]+')
+
+
+def _normalize(label: str) -> str:
+    return _NOT_LABEL_CHAR.sub('', label.lower())
+
+
+def _label_index(fields: Iterable[str]) -> Dict[str, str]:
+    """정규화된 항목 이름 -> 항목 키"""
+    index = {}
+    for field in fields:
+        names = (field, FIELD_LABELS.get(field, field)) + FIELD_ALIASES.get(field, ())
+        for name in names:
+            index.setdefault(_normalize(name), field)
+    return index
+
+
+def parse_form(text: str, fields: Iterable[str]) -> Dict[str, str]:
+    """
+    한 번에 입력한 양식을 항목별로 나누기
+
+    Args:
+        text: 메시지 또는 파일 내용
+        fields: 인식할 항목 키 목록
+
+    Returns:
+        {항목 키: 내용} (내용이 비어 있는 항목은 제외)
+    """
+    labels = _label_index(fields)
+    values: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+
+    for line in text.replace('\r\n', '\n').split('\n'):
+        field = None
+        rest = ''
+
+        match = _LABEL_LINE.match(line)
+        if match:
+            field = labels.get(_normalize(match.group(1)))
+            rest = match.group(2)
+        if field is None:
+            match = _HEADING_LINE.match(line)
+            if match:
+                field = labels.get(_normalize(match.group(1)))
+                rest = ''
+
+        if field is not None:
+            current = field
+            values.setdefault(field, [])
+            if rest.strip():
+                values[field].append(rest.strip())
+        elif current is not None:
+            values[current].append(line.rstrip())
+
+    parsed = {}
+    for field, lines in values.items():
+        value = '\n'.join(lines).strip()
+        if value:
+            parsed[field] = value
+    return parsed
+
+
+def form_template(fields: Iterable[str]) -> str:
+    """한 번에 입력할 때 사용할 양식 예시"""
+    return '\n'.join(f"{FIELD_LABELS.get(field, field)}: " for field in fields)
+
+
+def label_words(fields: Iterable[str]) -> List[str]:
+    """항목 이름에 쓰이는 단어 목록 (트래픽 기록 시 익명화하지 않음)"""
+    words = []
+    for field in fields:
+        for name in (FIELD_LABELS.get(field, field),) + FIELD_ALIASES.get(field, ()):
+            words.extend(re.findall(r'\w+', name))
+    return words
+
+
+def decode_form_file(data: bytes) -> str:
+    """업로드한 양식 파일 내용을 문자열로 변환 (UTF-8, 실패 시 CP949)"""
+    for encoding in ('utf-8-sig', 'cp949'):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("파일 인코딩을 인식할 수 없습니다. UTF-8 텍스트 파일로 보내주세요.")
@@ -1,6 +1,9 @@
+import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 
+logger = logging.getLogger(__name__)
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """시작 명령어 처리"""
     await update.message.reply_text(
@@ -19,4 +22,4 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def error(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """에러 처리"""
-    print(f'Update {update} caused error {context.error}')
+    logger.error("Update %s caused error %s", update, context.error)
@@ -0,0 +1,142 @@
+"""
+HTTP 서버 모듈
+
+config.PORT 에서 비동기 HTTP 서버를 실행합니다.
+
+제공 경로:
+1. GET  /health  : 상태 확인 (Railway 헬스체크, 로컬 확인용)
+2. GET  /metrics : Prometheus 지표 (enable_metrics 호출 시)
+3. POST 웹훅 경로 : 텔레그램 업데이트 수신 (웹훅 모드)
+
+웹훅 요청은 X-Telegram-Bot-Api-Secret-Token 헤더로 검증합니다.
+로컬 테스트에서는 같은 헤더를 붙여 임의의 업데이트 JSON 을 POST 하면 됩니다.
+"""
+
+import hmac
+import json
+import time
+import logging
+from typing import Awaitable, Callable, Optional
+
+from aiohttp import web
+
+# 텔레그램이 웹훅 요청에 붙이는 비밀 토큰 헤더
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+logger = logging.getLogger(__name__)
+
+
+class HttpServer:
+    """
+    aiohttp 기반 HTTP 서버
+
+    Args:
+        host: 바인딩 주소
+        port: 바인딩 포트
+    """
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 3000):
+        self.host = host
+        self.port = port
+        self.app = web.Application(client_max_size=1024 * 1024)
+        self.app.router.add_get('/health', self._handle_health)
+        self._runner = None
+        self._started_at = time.monotonic()
+        self._health_checks = {}
+        self._secret_token = None
+        self._render_metrics = None
+
+    def add_health_check(self, name: str, check: Callable[[], object]):
+        """/health 응답에 포함할 항목 등록"""
+        self._health_checks[name] = check
+
+    def enable_metrics(self, render: Callable[[], str], path: str = '/metrics'):
+        """
+        지표 경로 등록
+
+        Args:
+            render: Prometheus 텍스트 형식 문자열을 반환하는 함수
+            path: 지표를 제공할 경로
+        """
+        self._render_metrics = render
+        self.app.router.add_get(path, self._handle_metrics)
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self._render_metrics(),
+            content_type='text/plain',
+            charset='utf-8'
+        )
+
+    def enable_webhook(
+        self,
+        path: str,
+        handler: Callable[[dict], Awaitable[None]],
+        secret_token: Optional[str] = None
+    ):
+        """
+        웹훅 경로 등록 (여러 봇을 실행하면 봇마다 다른 경로로 여러 번 등록)
+
+        Args:
+            path: 업데이트를 받을 경로 (예: /webhook)
+            handler: 업데이트 JSON(dict)을 받아 처리하는 코루틴 함수
+            secret_token: 요청 헤더로 검증할 비밀 토큰 (없으면 검증 생략)
+        """
+        self._secret_token = secret_token
+
+        async def handle(request: web.Request) -> web.Response:
+            return await self._handle_webhook(request, handler)
+
+        self.app.router.add_post(path, handle)
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        body = {
+            'status': 'ok',
+            'uptime': round(time.monotonic() - self._started_at, 1),
+        }
+        for name, check in self._health_checks.items():
+            try:
+                body[name] = check()
+            except Exception as e:
+                body['status'] = 'degraded'
+                body[name] = f'error: {e}'
+        return web.json_response(body)
+
+    async def _handle_webhook(
+        self,
+        request: web.Request,
+        handler: Callable[[dict], Awaitable[None]]
+    ) -> web.Response:
+        if self._secret_token:
+            received = request.headers.get(SECRET_HEADER, '')
+            if not hmac.compare_digest(received.encode(), self._secret_token.encode()):
+                return web.Response(status=403, text='forbidden')
+
+        try:
+            data = await request.json(loads=json.loads)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return web.Response(status=400, text='invalid json')
+        if not isinstance(data, dict):
+            return web.Response(status=400, text='invalid update')
+
+        try:
+            await handler(data)
+        except Exception:
+            logger.exception("웹훅 업데이트 처리 실패")
+            return web.Response(status=500, text='error')
+
+        return web.Response(text='ok')
+
+    async def start(self):
+        """서버 시작"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info("HTTP 서버가 시작되었습니다: http://%s:%s", self.host, self.port)
+
+    async def stop(self):
+        """서버 종료"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,231 @@
+"""
+분석 작업 관리 모듈
+
+AI 분석을 핸들러 안에서 기다리지 않고 백그라운드 작업으로 실행합니다.
+
+주요 기능:
+1. 사용자별 진행 중인 분석 작업 추적 (사용자당 1개로 제한)
+2. /cancel 시 작업 취소 (진행 중인 API 요청도 함께 중단)
+3. 작업 상태 조회
+4. 종료 시 새 작업 받지 않기 + 진행 중인 작업 마무리 대기
+5. 같은 사용자의 같은 입력으로 진행 중인 분석 요청 합치기
+"""
+
+import json
+import time
+import asyncio
+import logging
+import hashlib
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from services.metrics import record_error
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisJob:
+    """진행 중인 분석 작업 정보"""
+
+    __slots__ = ('user_id', 'chat_id', 'task', 'payload', 'started_at')
+
+    def __init__(self, user_id: int, chat_id: int, task: asyncio.Task, payload: Optional[dict] = None):
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.task = task
+        self.payload = payload
+        self.started_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+
+class AnalysisJobManager:
+    """
+    분석 작업 관리자
+
+    사용자 ID 별로 하나의 작업만 실행되도록 관리합니다.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[int, AnalysisJob] = {}
+        self.accepting = True
+
+    def is_active(self, user_id: int) -> bool:
+        """진행 중인 작업이 있는지 확인"""
+        job = self._jobs.get(user_id)
+        return job is not None and not job.task.done()
+
+    def get(self, user_id: int) -> Optional[AnalysisJob]:
+        """진행 중인 작업 조회"""
+        return self._jobs.get(user_id)
+
+    def start(
+        self,
+        user_id: int,
+        chat_id: int,
+        coroutine: Awaitable,
+        payload: Optional[dict] = None
+    ) -> Optional[AnalysisJob]:
+        """
+        분석 작업 시작
+
+        Args:
+            payload: 작업을 다시 시작하는 데 필요한 정보 (종료 시 끝나지 않은 작업 저장용)
+
+        Returns:
+            시작된 작업, 이미 진행 중인 작업이 있거나 종료 중이면 None
+        """
+        if self.is_active(user_id) or not self.accepting:
+            coroutine.close()
+            return None
+
+        task = asyncio.create_task(coroutine, name=f"analysis-{user_id}")
+        job = AnalysisJob(user_id, chat_id, task, payload)
+        self._jobs[user_id] = job
+        task.add_done_callback(lambda t: self._on_done(user_id, t))
+        return job
+
+    def _on_done(self, user_id: int, task: asyncio.Task):
+        job = self._jobs.get(user_id)
+        if job is not None and job.task is task:
+            del self._jobs[user_id]
+
+        if not task.cancelled() and task.exception() is not None:
+            record_error('analysis_job', task.exception())
+            logger.error(
+                "분석 작업 오류", exc_info=task.exception(), extra={'user_id': user_id}
+            )
+
+    def cancel(self, user_id: int) -> bool:
+        """
+        진행 중인 작업 취소
+
+        Returns:
+            취소한 작업이 있으면 True
+        """
+        job = self._jobs.get(user_id)
+        if job is None or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+
+    def active_count(self) -> int:
+        """진행 중인 작업 수"""
+        return sum(1 for job in self._jobs.values() if not job.task.done())
+
+    def close(self):
+        """새 작업 받지 않기 (종료 준비)"""
+        self.accepting = False
+
+    async def drain(self, timeout: float) -> Tuple[List[AnalysisJob], List[AnalysisJob]]:
+        """
+        진행 중인 작업이 끝날 때까지 기다림
+
+        timeout 초 안에 끝나지 않은 작업은 취소합니다.
+
+        Returns:
+            (끝까지 완료된 작업 목록, 취소된 작업 목록)
+        """
+        jobs = [job for job in self._jobs.values() if not job.task.done()]
+        if not jobs:
+            return [], []
+
+        done, _ = await asyncio.wait([job.task for job in jobs], timeout=max(0.0, timeout))
+        finished = [job for job in jobs if job.task in done]
+        unfinished = [job for job in jobs if job.task not in done]
+
+        for job in unfinished:
+            job.task.cancel()
+        await asyncio.gather(*(job.task for job in unfinished), return_exceptions=True)
+        return finished, unfinished
+
+
+def input_fingerprint(data: dict, fields: Iterable[str]) -> str:
+    """분석 입력값의 해시 (같은 입력이면 같은 값)"""
+    values = [str(data.get(field, '')).strip() for field in fields]
+    encoded = json.dumps(values, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class _SharedRequest:
+    """합쳐진 요청 하나 (실제 작업과 기다리는 호출 수)"""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    진행 중인 같은 요청 합치기
+
+    같은 키로 진행 중인 요청이 있으면 새로 실행하지 않고 그 결과를 함께 기다립니다.
+    기다리는 호출이 모두 취소되면 실제 작업도 취소됩니다.
+    키는 (사용자 ID, 입력 해시) 처럼 결과가 같아야 하는 요청끼리 같도록 만듭니다.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, _SharedRequest] = {}
+
+        # 통계
+        self.started = 0
+        self.joined = 0
+
+    def is_pending(self, key: Hashable) -> bool:
+        """같은 키로 진행 중인 요청이 있는지 확인"""
+        shared = self._inflight.get(key)
+        return shared is not None and not shared.task.done()
+
+    def attach(self, key: Hashable) -> bool:
+        """
+        진행 중인 요청에 합류 (결과는 먼저 시작한 쪽에서 전달)
+
+        Returns:
+            합류했으면 True, 진행 중인 요청이 없으면 False
+        """
+        if not self.is_pending(key):
+            return False
+        self.joined += 1
+        return True
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable]):
+        """
+        요청 실행 또는 진행 중인 같은 요청의 결과 대기
+
+        Args:
+            key: 요청 키
+            factory: 새로 실행할 때만 호출되는 코루틴 생성 함수
+        """
+        shared = self._inflight.get(key)
+        if shared is None or shared.task.done():
+            task = asyncio.create_task(factory(), name=f"coalesced-{key}")
+            shared = self._inflight[key] = _SharedRequest(task)
+            task.add_done_callback(lambda t: self._on_done(key, t))
+            self.started += 1
+        else:
+            self.joined += 1
+
+        shared.waiters += 1
+        try:
+            return await asyncio.shield(shared.task)
+        finally:
+            shared.waiters -= 1
+            if shared.waiters == 0 and not shared.task.done():
+                # 결과를 기다리는 쪽이 없으면 실제 작업도 중단
+                shared.task.cancel()
+
+    def _on_done(self, key: Hashable, task: asyncio.Task):
+        shared = self._inflight.get(key)
+        if shared is not None and shared.task is task:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        """합치기 통계"""
+        return {
+            'started': self.started,
+            'joined': self.joined,
+            'in_flight': sum(1 for shared in self._inflight.values() if not shared.task.done()),
+        }
@@ -0,0 +1,301 @@
+"""
+메시지 전송 모듈
+
+봇이 보내는 모든 메시지를 하나의 전송 파이프라인으로 처리합니다.
+
+주요 기능:
+1. 텔레그램 글자 수 제한(4096자)에 맞춘 메시지 분할
+   - 섹션 제목과 그 아래 항목이 서로 떨어지지 않도록 문단 단위로 분할
+2. 전체/채팅별 토큰 버킷 속도 제한
+3. 채팅별 전송 순서 보장
+4. 전송 제한(429, RetryAfter) 응답 시 지정된 시간만큼 기다렸다가 재전송
+"""
+
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+from telegram.error import RetryAfter
+
+import config
+from bot.rate_limit import TokenBucket
+from services.metrics import track
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# 텔레그램 메시지 최대 길이
+MAX_MESSAGE_LENGTH = 4096
+
+
+def _is_heading(block: str) -> bool:
+    """제목만 있는 문단인지 확인 (다음 문단과 같은 메시지에 있어야 함)"""
+    lines = block.strip().split('\n')
+    if len(lines) != 1:
+        return False
+    line = lines[0].strip()
+    return line.endswith(':') or line.startswith('📍')
+
+
+def _split_line(line: str, limit: int) -> List[str]:
+    """한 줄이 제한보다 길면 공백 기준으로, 불가능하면 글자 수 기준으로 분할"""
+    parts = []
+    while len(line) > limit:
+        cut = line.rfind(' ', 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(line[:cut].rstrip())
+        line = line[cut:].lstrip()
+    if line:
+        parts.append(line)
+    return parts
+
+
+def _split_block(block: str, limit: int) -> List[str]:
+    """긴 문단을 줄 단위로 분할 (제목 줄이 조각 끝에 남지 않도록 함)"""
+    chunks = []
+    current = []
+    length = 0
+    for line in block.split('\n'):
+        for piece in _split_line(line, limit) or ['']:
+            extra = len(piece) + (1 if current else 0)
+            if current and length + extra > limit:
+                # 조각 마지막 줄이 제목이면 다음 조각으로 넘김
+                carry = []
+                if len(current) > 1 and _is_heading(current[-1]):
+                    carry = [current.pop()]
+                chunks.append('\n'.join(current))
+                current = carry
+                length = sum(len(x) for x in current) + max(0, len(current) - 1)
+                extra = len(piece) + (1 if current else 0)
+            current.append(piece)
+            length += extra
+    if current:
+        chunks.append('\n'.join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    메시지를 제한 길이 이하의 조각으로 분할
+
+    분할 규칙:
+    1. 빈 줄로 구분된 문단 단위로 최대한 채워서 묶음
+    2. 제목만 있는 문단은 다음 문단과 함께 묶음
+    3. 문단 하나가 제한보다 길면 줄 단위로, 줄이 길면 단어 단위로 분할
+
+    Returns:
+        분할된 메시지 목록 (제한 이하이면 원본 하나)
+    """
+    if len(text) <= limit:
+        return [text]
+
+    # 문단 나누기 + 제목 문단은 다음 문단과 합치기
+    blocks = []
+    pending_heading = None
+    for block in text.split('\n\n'):
+        if not block.strip():
+            continue
+        if pending_heading is not None:
+            block = pending_heading + '\n\n' + block
+            pending_heading = None
+        if _is_heading(block):
+            pending_heading = block
+            continue
+        blocks.append(block)
+    if pending_heading is not None:
+        blocks.append(pending_heading)
+
+    chunks = []
+    current = ''
+    for block in blocks:
+        if len(block) > limit:
+            if current:
+                chunks.append(current)
+                current = ''
+            pieces = _split_block(block, limit)
+            chunks.extend(pieces[:-1])
+            current = pieces[-1] if pieces else ''
+            continue
+        candidate = f"{current}\n\n{block}" if current else block
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = block
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class _ChatState:
+    """채팅별 전송 순서 잠금과 속도 제한"""
+
+    __slots__ = ('lock', 'bucket', 'paused_until')
+
+    def __init__(self, rate: float, burst: float):
+        self.lock = asyncio.Lock()
+        self.bucket = TokenBucket(rate, burst)
+        self.paused_until = 0.0
+
+
+class OutboundMessenger:
+    """
+    전송 파이프라인
+
+    같은 채팅으로 가는 메시지는 요청된 순서대로 전송되며,
+    여러 조각으로 나뉜 메시지는 다른 메시지가 끼어들지 않도록 연속으로 전송됩니다.
+
+    Args:
+        bot: 텔레그램 봇 객체
+        global_rate: 봇 전체 초당 전송 수
+        global_burst: 봇 전체 순간 전송 허용량
+        chat_rate: 채팅별 초당 전송 수
+        chat_burst: 채팅별 순간 전송 허용량
+        max_retries: 전송 제한 응답 시 최대 재시도 횟수
+    """
+
+    # 채팅 상태를 정리하기 시작하는 개수
+    PRUNE_THRESHOLD = 1000
+
+    def __init__(
+        self,
+        bot,
+        global_rate: float = 25,
+        global_burst: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        max_retries: int = 5
+    ):
+        self.bot = bot
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._chats = {}
+
+        # 통계
+        self.sent = 0
+        self.flood_waits = 0
+        self.failed = 0
+
+    def _chat(self, chat_id: int) -> _ChatState:
+        state = self._chats.get(chat_id)
+        if state is None:
+            if len(self._chats) >= self.PRUNE_THRESHOLD:
+                self._prune()
+            state = self._chats[chat_id] = _ChatState(self.chat_rate, self.chat_burst)
+        return state
+
+    def _prune(self):
+        """오래 사용하지 않은 채팅 상태 정리"""
+        for chat_id in [
+            chat_id for chat_id, state in self._chats.items()
+            if not state.lock.locked() and state.bucket.is_full()
+        ]:
+            del self._chats[chat_id]
+
+    async def _send(self, chat_id: int, state: _ChatState, factory: Callable[[], Awaitable]):
+        """속도 제한과 재시도를 적용해 한 번 전송 (채팅 잠금을 가진 상태에서 호출)"""
+        attempt = 0
+        while True:
+            pause = state.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await state.bucket.acquire()
+            await self.global_bucket.acquire()
+
+            try:
+                with track('telegram_send'), span('telegram.send', chat_id=chat_id, attempt=attempt):
+                    result = await factory()
+                self.sent += 1
+                return result
+            except RetryAfter as e:
+                attempt += 1
+                self.flood_waits += 1
+                retry_after = e.retry_after
+                delay = retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+                logger.warning(
+                    "전송 제한 응답: %s초 후 재시도 (%d/%d)",
+                    delay, attempt, self.max_retries, extra={'chat_id': chat_id}
+                )
+                if attempt > self.max_retries:
+                    self.failed += 1
+                    raise
+                state.paused_until = time.monotonic() + delay
+                state.bucket.drain()
+                self.global_bucket.drain()
+            except Exception:
+                self.failed += 1
+                raise
+
+    async def call(self, chat_id: int, factory: Callable[[], Awaitable]):
+        """
+        임의의 봇 API 호출을 순서/속도 제한을 지켜 실행
+
+        Args:
+            chat_id: 대상 채팅 ID
+            factory: 호출할 때마다 새 코루틴을 만드는 함수 (재시도 시 다시 호출됨)
+        """
+        state = self._chat(chat_id)
+        async with state.lock:
+            return await self._send(chat_id, state, factory)
+
+    async def send_chunks(self, chat_id: int, chunks: List[str], reply_markup=None, **kwargs):
+        """
+        미리 나뉜 메시지 조각을 순서대로 연속 전송
+
+        reply_markup 은 마지막 조각에만 붙습니다.
+
+        Returns:
+            마지막으로 전송된 메시지
+        """
+        state = self._chat(chat_id)
+        message = None
+        async with state.lock:
+            for index, chunk in enumerate(chunks):
+                markup = reply_markup if index == len(chunks) - 1 else None
+                message = await self._send(
+                    chat_id,
+                    state,
+                    lambda chunk=chunk, markup=markup: self.bot.send_message(
+                        chat_id, chunk, reply_markup=markup, **kwargs
+                    )
+                )
+        return message
+
+    async def send_message(self, chat_id: int, text: str, reply_markup=None, **kwargs):
+        """메시지를 길이 제한에 맞게 나눠 전송"""
+        return await self.send_chunks(chat_id, split_message(text), reply_markup=reply_markup, **kwargs)
+
+    async def send_photo(self, chat_id: int, photo, **kwargs):
+        """사진 전송"""
+        return await self.call(chat_id, lambda: self.bot.send_photo(chat_id, photo, **kwargs))
+
+    def stats(self) -> dict:
+        """전송 통계"""
+        return {
+            'sent': self.sent,
+            'flood_waits': self.flood_waits,
+            'failed': self.failed,
+            'waiting_chats': sum(1 for state in self._chats.values() if state.lock.locked()),
+        }
+
+
+# 봇별 전송 파이프라인 (텔레그램 전송 제한은 봇 단위로 적용됨)
+_messengers = {}
+
+
+def get_messenger(bot) -> OutboundMessenger:
+    """봇의 전송 파이프라인 반환 (최초 호출 시 생성)"""
+    messenger = _messengers.get(bot.token)
+    if messenger is None:
+        messenger = _messengers[bot.token] = OutboundMessenger(
+            bot,
+            global_rate=config.OUTBOUND_GLOBAL_RATE,
+            global_burst=config.OUTBOUND_GLOBAL_RATE,
+            chat_rate=config.OUTBOUND_CHAT_RATE,
+            chat_burst=config.OUTBOUND_CHAT_BURST
+        )
+    return messenger
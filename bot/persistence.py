@@ -0,0 +1,110 @@
+"""
+대화 상태 저장 모듈
+
+ConversationHandler 의 대화 상태와 사용자별 입력값(user_data)을
+데이터베이스의 sessions 테이블에 저장합니다.
+
+프로세스가 재시작되거나 여러 작업 프로세스로 나눠 실행해도
+진행 중이던 질문 단계와 입력값이 그대로 이어집니다.
+
+저장 형식:
+- kind = 'conversation:<대화 이름>', key = [chat_id, user_id] (JSON)
+- kind = 'user_data', key = 사용자 ID
+  (여러 봇을 함께 실행하면 봇마다 'user_data:<봇 이름>' 으로 나눠 저장)
+"""
+
+import json
+import asyncio
+from copy import deepcopy
+from typing import Dict, Optional
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from database import get_sessions, save_session
+
+# 사용자 입력값 저장 종류
+USER_DATA_KIND = 'user_data'
+
+
+class DatabasePersistence(BasePersistence):
+    """
+    데이터베이스 기반 대화 상태 저장소
+
+    대화 상태와 user_data 만 저장합니다 (chat_data, bot_data 는 사용하지 않음).
+
+    Args:
+        update_interval: 변경된 데이터를 저장하는 주기 (초)
+        user_data_kind: user_data 저장 종류 (봇마다 다르게 지정)
+    """
+
+    def __init__(self, update_interval: float = 1.0, user_data_kind: str = USER_DATA_KIND):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.user_data_kind = user_data_kind
+
+    @staticmethod
+    def _conversation_kind(name: str) -> str:
+        return f"conversation:{name}"
+
+    async def get_user_data(self) -> Dict[int, dict]:
+        """저장된 사용자 입력값 불러오기"""
+        stored = await asyncio.to_thread(get_sessions, self.user_data_kind)
+        return {int(user_id): data for user_id, data in stored.items()}
+
+    async def get_chat_data(self) -> Dict[int, dict]:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self) -> Optional[tuple]:
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        """저장된 대화 상태 불러오기"""
+        stored = await asyncio.to_thread(get_sessions, self._conversation_kind(name))
+        return {tuple(json.loads(key)): state for key, state in stored.items()}
+
+    async def update_conversation(self, name: str, key: tuple, new_state: Optional[object]):
+        """대화 상태 저장 (대화가 끝나면 삭제)"""
+        await asyncio.to_thread(
+            save_session,
+            self._conversation_kind(name),
+            json.dumps(list(key)),
+            new_state
+        )
+
+    async def update_user_data(self, user_id: int, data: dict):
+        """사용자 입력값 저장"""
+        # 저장 중에 핸들러가 값을 바꿔도 영향이 없도록 복사본 저장
+        await asyncio.to_thread(save_session, self.user_data_kind, str(user_id), deepcopy(data))
+
+    async def update_chat_data(self, chat_id: int, data: dict):
+        pass
+
+    async def update_bot_data(self, data: dict):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_chat_data(self, chat_id: int):
+        pass
+
+    async def drop_user_data(self, user_id: int):
+        """사용자 입력값 삭제"""
+        await asyncio.to_thread(save_session, self.user_data_kind, str(user_id), None)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict):
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict):
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict):
+        pass
+
+    async def flush(self):
+        pass
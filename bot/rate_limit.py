@@ -0,0 +1,139 @@
+"""
+속도 제한 모듈
+
+토큰 버킷 방식의 속도 제한기를 제공합니다.
+텔레그램 전송 제한, 사용자별 요청 제한 등에 공통으로 사용합니다.
+"""
+
+import time
+import asyncio
+
+
+class TokenBucket:
+    """
+    토큰 버킷
+
+    초당 rate 개의 토큰이 채워지고, 최대 capacity 개까지 쌓입니다.
+    요청 하나당 토큰 하나를 사용합니다.
+
+    Args:
+        rate: 초당 충전되는 토큰 수
+        capacity: 최대 토큰 수 (순간적으로 허용되는 요청 수)
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate 는 0 보다 크고 capacity 는 1 이상이어야 합니다.")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        토큰 사용 시도
+
+        Returns:
+            0 이면 사용 성공, 그 외에는 토큰이 채워질 때까지 기다려야 하는 시간(초)
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    async def acquire(self, tokens: float = 1):
+        """토큰을 사용할 수 있을 때까지 기다린 뒤 사용"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def drain(self):
+        """남은 토큰을 모두 비움 (전송 제한 응답을 받았을 때 속도를 낮추기 위해 사용)"""
+        self._refill()
+        self.tokens = 0
+
+    def is_full(self) -> bool:
+        """토큰이 가득 찼는지 (한동안 사용되지 않았는지) 확인"""
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class UserThrottle:
+    """
+    사용자별 요청 제한
+
+    사용자마다 토큰 버킷을 하나씩 두고, 요청마다 토큰 하나를 사용합니다.
+    제한에 걸린 사용자에게는 안내 메시지를 제한 시간마다 한 번만 보내도록
+    should_notify 로 확인할 수 있습니다.
+
+    Args:
+        rate: 사용자별 초당 허용 요청 수
+        burst: 사용자별 순간 허용 요청 수
+    """
+
+    # 사용자 상태를 정리하기 시작하는 개수
+    PRUNE_THRESHOLD = 10000
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._notified_until = {}
+
+        # 통계
+        self.allowed = 0
+        self.throttled = 0
+
+    def check(self, user_id: int) -> float:
+        """
+        요청 허용 여부 확인 (허용되면 토큰 사용)
+
+        Returns:
+            0 이면 허용, 그 외에는 다시 요청할 수 있을 때까지 남은 시간(초)
+        """
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.PRUNE_THRESHOLD:
+                self._prune()
+            bucket = self._buckets[user_id] = TokenBucket(self.rate, self.burst)
+
+        wait = bucket.try_acquire()
+        if wait > 0:
+            self.throttled += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def should_notify(self, user_id: int, wait: float) -> bool:
+        """제한 안내를 보내야 하는지 확인 (같은 제한 구간에는 한 번만)"""
+        now = time.monotonic()
+        if self._notified_until.get(user_id, 0) > now:
+            return False
+        self._notified_until[user_id] = now + wait
+        return True
+
+    def _prune(self):
+        """한동안 요청이 없는 사용자 상태 정리"""
+        now = time.monotonic()
+        for user_id in [user_id for user_id, bucket in self._buckets.items() if bucket.is_full()]:
+            del self._buckets[user_id]
+        for user_id in [user_id for user_id, until in self._notified_until.items() if until <= now]:
+            del self._notified_until[user_id]
+
+    def stats(self) -> dict:
+        """제한 통계"""
+        return {
+            'allowed': self.allowed,
+            'throttled': self.throttled,
+            'tracked_users': len(self._buckets),
+        }
@@ -0,0 +1,257 @@
+"""
+운영 트래픽 기록 모듈
+
+들어온 업데이트와 모델 응답을 익명화해서 추가 전용 로그(JSON 한 줄씩)에 기록합니다.
+기록한 로그는 replay.py 로 실제 Application 에 다시 흘려보내
+성능 변화를 오프라인에서 재현하는 데 사용합니다.
+
+기록 형식 (한 줄에 이벤트 하나, .gz 로 끝나면 gzip 으로 압축):
+- {"k": "u", "t": 받은 시각, "u": 업데이트 JSON}
+- {"k": "m", "t": 호출 시각, "s": 단계(구간 이름), "l": 응답 시간, "i": 입력 토큰, "o": 출력 토큰, "x": 응답 텍스트}
+  (구조화된 응답(tool use)이면 "x" 대신 "j": 도구 입력 JSON)
+
+익명화:
+- 사용자가 입력한 글(text, caption, 파일 이름)의 단어는 같은 길이의 의미 없는 단어로 바꿈
+  (같은 단어는 같은 단어로 바뀌므로 중복 제출 판단이 그대로 재현됨)
+- 명령어, 메뉴 버튼 글자, 양식 항목 이름, 모델 응답의 제목 줄(# ...)은 그대로 유지
+- 이름/사용자명은 지우고, 사용자/채팅 ID 는 다른 숫자로 바꿈
+"""
+
+import re
+import gzip
+import hmac
+import json
+import time
+import queue
+import atexit
+import hashlib
+import logging
+import secrets
+import threading
+from typing import Iterable, Optional
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from services.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+# 익명화할 단어
+_WORD = re.compile(r'\w+')
+
+# 바꿀 단어에 사용할 글자
+_ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+# 익명화할 글자 필드와 지울 이름 필드
+_TEXT_FIELDS = frozenset({'text', 'caption', 'file_name'})
+_NAME_FIELDS = frozenset({'first_name', 'last_name', 'username', 'title'})
+
+# ID 를 바꿀 객체 (보낸 사람, 채팅)
+_ID_OWNERS = frozenset({'from', 'chat', 'user', 'sender_chat'})
+
+
+class Anonymizer:
+    """
+    사용자 글과 식별 정보 익명화
+
+    Args:
+        keep_texts: 그대로 둘 메시지 전체 (메뉴 버튼 글자 등)
+        keep_words: 그대로 둘 단어 (양식 항목 이름, 파일 확장자 등)
+        salt: 단어/ID 변환 키 (미지정 시 실행마다 새로 생성 - 원문 추측 방지)
+    """
+
+    def __init__(self, keep_texts: Iterable[str] = (), keep_words: Iterable[str] = (), salt: Optional[bytes] = None):
+        self.keep_texts = frozenset(keep_texts)
+        self.keep_words = frozenset(word.lower() for word in keep_words)
+        self.salt = salt or secrets.token_bytes(16)
+
+    def _digest(self, value: str) -> bytes:
+        return hmac.new(self.salt, value.encode(), hashlib.blake2b).digest()
+
+    def _word(self, match: re.Match) -> str:
+        word = match.group(0)
+        if word.lower() in self.keep_words or word.isdigit():
+            return word
+        digest = self._digest(word)
+        return ''.join(_ALPHABET[digest[index % len(digest)] % len(_ALPHABET)] for index in range(len(word)))
+
+    def text(self, text: Optional[str]) -> Optional[str]:
+        """사용자 글 익명화 (길이와 줄 구성은 유지)"""
+        if not text or text in self.keep_texts:
+            return text
+        if text.startswith('/'):
+            command, _, rest = text.partition(' ')
+            return f"{command} {_WORD.sub(self._word, rest)}" if rest else command
+        return _WORD.sub(self._word, text)
+
+    def model_text(self, text: str) -> str:
+        """모델 응답 익명화 (제목 줄은 결과 파싱에 필요하므로 유지)"""
+        return '\n'.join(
+            line if line.lstrip().startswith('#') else _WORD.sub(self._word, line)
+            for line in text.split('\n')
+        )
+
+    def model_data(self, data):
+        """구조화된 모델 응답 익명화 (키는 유지하고 글자 값만 익명화)"""
+        if isinstance(data, dict):
+            return {key: self.model_data(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [self.model_data(item) for item in data]
+        if isinstance(data, str):
+            return self.model_text(data)
+        return data
+
+    def user_id(self, value: int) -> int:
+        """사용자/채팅 ID 변환 (부호 유지 - 그룹 채팅은 음수)"""
+        pseudo = int.from_bytes(self._digest(str(value))[:4], 'big') % 1_000_000_000 + 1
+        return -pseudo if value < 0 else pseudo
+
+    def update(self, data, owner: Optional[str] = None):
+        """업데이트 JSON 익명화 (새 객체 반환)"""
+        if isinstance(data, list):
+            return [self.update(item, owner) for item in data]
+        if not isinstance(data, dict):
+            return data
+
+        result = {}
+        for key, value in data.items():
+            if key in _TEXT_FIELDS and isinstance(value, str):
+                result[key] = self.text(value)
+            elif key in _NAME_FIELDS and isinstance(value, str):
+                result[key] = 'anon'
+            elif key == 'id' and owner in _ID_OWNERS and isinstance(value, int):
+                result[key] = self.user_id(value)
+            else:
+                result[key] = self.update(value, key)
+        return result
+
+
+class TrafficRecorder:
+    """
+    업데이트/모델 응답 기록기
+
+    이벤트 루프에서는 익명화 후 큐에 넣기만 하고, 파일 쓰기는 백그라운드 스레드에서 합니다.
+    큐가 가득 차면 해당 이벤트를 버립니다.
+
+    Args:
+        path: 기록 파일 경로 (.gz 로 끝나면 gzip 압축)
+        anonymizer: 익명화 도구
+    """
+
+    def __init__(self, path: str, anonymizer: Anonymizer):
+        self.path = path
+        self.anonymizer = anonymizer
+        self.recorded = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._write_loop, name="traffic-recorder", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _put(self, event: dict):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _open(self):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, 'at', encoding='utf-8')
+        return open(self.path, 'a', encoding='utf-8')
+
+    def _write_loop(self):
+        with self._open() as output:
+            while True:
+                event = self._queue.get()
+                if event is None:
+                    return
+                lines = [event]
+                # 쌓여 있는 이벤트는 한 번에 기록
+                while len(lines) < 500:
+                    try:
+                        event = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if event is None:
+                        break
+                    lines.append(event)
+                try:
+                    output.write(''.join(json.dumps(line, ensure_ascii=False, separators=(',', ':')) + '\n' for line in lines))
+                    output.flush()
+                    self.recorded += len(lines)
+                except Exception as e:
+                    self.dropped += len(lines)
+                    logger.warning("트래픽 기록 실패 (%d건 버림): %s", len(lines), e)
+                if event is None:
+                    return
+
+    async def record_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """업데이트 기록 (TypeHandler 콜백, 다른 핸들러보다 먼저 실행)"""
+        self._put({'k': 'u', 't': time.time(), 'u': self.anonymizer.update(update.to_dict())})
+
+    def record_model(self, stage: str, started_at: float, latency: float, response):
+        """모델 응답 기록"""
+        usage = getattr(response, 'usage', None)
+        event = {
+            'k': 'm',
+            't': started_at,
+            's': stage,
+            'l': round(latency, 4),
+            'i': getattr(usage, 'input_tokens', 0) or 0,
+            'o': getattr(usage, 'output_tokens', 0) or 0,
+        }
+        block = response.content[0]
+        if getattr(block, 'type', None) == 'tool_use':
+            event['j'] = self.anonymizer.model_data(block.input)
+        else:
+            event['x'] = self.anonymizer.model_text(block.text)
+        self._put(event)
+
+    def wrap_model_client(self, client):
+        """messages.create 응답을 기록하는 모델 클라이언트로 감쌈"""
+        return _RecordingClient(client, self)
+
+    def close(self, timeout: float = 5.0):
+        """남은 이벤트를 기록하고 종료"""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        """기록 상태"""
+        return {'path': self.path, 'recorded': self.recorded, 'dropped': self.dropped}
+
+
+class _RecordingMessages:
+    def __init__(self, messages, recorder: TrafficRecorder):
+        self._messages = messages
+        self._recorder = recorder
+
+    async def create(self, **kwargs):
+        # 단계 이름은 호출을 감싼 추적 구간에서 가져옴 (model.summary / model.analysis)
+        current = current_span()
+        stage = current.name if current is not None else 'model'
+        started_at = time.time()
+        started = time.perf_counter()
+        response = await self._messages.create(**kwargs)
+        try:
+            self._recorder.record_model(stage, started_at, time.perf_counter() - started, response)
+        except Exception as e:
+            logger.warning("모델 응답 기록 실패: %s", e)
+        return response
+
+
+class _RecordingClient:
+    """모델 클라이언트 대리 객체 (messages.create 만 가로채고 나머지는 그대로 전달)"""
+
+    def __init__(self, client, recorder: TrafficRecorder):
+        self._client = client
+        self.messages = _RecordingMessages(client.messages, recorder)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
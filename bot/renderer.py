@@ -0,0 +1,246 @@
+"""
+분석 결과 렌더링 모듈
+
+분석 결과(dict)를 텔레그램 서식(HTML / MarkdownV2 / 일반 텍스트)으로 변환합니다.
+
+동작 방식:
+1. 모든 섹션을 한 번만 훑으면서 줄 단위 토큰(섹션 제목, 소제목, 항목, 본문)으로 분류
+2. 토큰마다 서식에 맞게 이스케이프 후 바로 출력 줄로 변환
+3. 출력 줄을 텔레그램 길이 제한 안에서 메시지 조각으로 묶어서 반환
+   (제목 줄이 조각 끝에 혼자 남지 않도록 다음 줄과 함께 묶음)
+
+줄마다 서식 태그가 열리고 닫히므로 조각 경계에서 태그가 깨지지 않습니다.
+"""
+
+import re
+import html
+from typing import Callable, Iterator, List, Tuple
+
+from telegram.constants import ParseMode
+
+# 텔레그램 메시지 최대 길이
+MAX_MESSAGE_LENGTH = 4096
+
+# 한 줄 최대 길이 (서식 변환 후 길이 기준, 이보다 긴 줄은 나눠서 출력)
+MAX_LINE_LENGTH = 3500
+
+# 결과 제목과 섹션 구성 (출력 순서)
+RESULT_TITLE = "📝 특허 명세서 초안이 작성되었습니다!"
+SECTIONS = (
+    ('summary', "📋 기술 요약"),
+    ('case_studies', "📚 선행기술 분석"),
+    ('feasibility', "⚙️ 기술적 실현성"),
+    ('development_plan', "📈 기술 발전성"),
+    ('improvements', "🔧 보완 사항"),
+)
+
+# 토큰 종류
+TITLE, SECTION, SUBHEADER, BULLET, TEXT = range(5)
+
+# MarkdownV2 에서 이스케이프가 필요한 문자 (\\ 를 가장 먼저 바꿔야 함)
+_MARKDOWN_V2_SPECIAL = '\\_*[]()~`>#+-=|{}.!'
+
+# 이스케이프한 줄에서 모델 출력의 굵은 글씨 표기(**강조**) 찾기
+# (HTML 은 * 를 이스케이프하지 않고, MarkdownV2 는 \* 로 이스케이프함)
+_BOLD_HTML = re.compile(r'\*\*(.+?)\*\*')
+_BOLD_MARKDOWN_V2 = re.compile(r'\\\*\\\*(.+?)\\\*\\\*')
+
+
+def escape_html(text: str) -> str:
+    """HTML 서식용 이스케이프"""
+    if '&' in text or '<' in text or '>' in text:
+        return html.escape(text, quote=False)
+    return text
+
+
+def escape_markdown_v2(text: str) -> str:
+    """MarkdownV2 서식용 이스케이프 (한국어 본문에서는 정규식이나 translate 보다 replace 가 빠름)"""
+    for char in _MARKDOWN_V2_SPECIAL:
+        if char in text:
+            text = text.replace(char, '\\' + char)
+    return text
+
+
+def _tokenize(result: dict) -> Iterator[Tuple[int, str]]:
+    """분석 결과를 (토큰 종류, 내용) 순서로 한 번에 훑기"""
+    yield TITLE, RESULT_TITLE
+
+    for key, title in SECTIONS:
+        value = result.get(key)
+        if not value:
+            if key != 'summary':
+                continue
+            value = '분석 중...'
+
+        # 요약은 여러 줄 텍스트, 나머지는 '# '/'- ' 로 시작하는 항목 목록
+        lines = value.split('\n') if isinstance(value, str) else value
+        is_summary = isinstance(value, str)
+
+        yield SECTION, title
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('# '):
+                subheader = line[2:].strip()
+                if subheader.endswith(':'):
+                    subheader = subheader[:-1].strip()
+                yield SUBHEADER, subheader
+            elif line.startswith('- '):
+                yield BULLET, line[2:].strip()
+            elif is_summary:
+                yield TEXT, line
+
+
+def _split_long(text: str, measure: Callable[[str], int], limit: int) -> List[str]:
+    """
+    출력 길이가 limit 이하가 되도록 긴 줄을 공백 기준으로 분할
+
+    이스케이프하면 길이가 늘어나므로(& → &amp;) 원문 길이가 아니라
+    measure(서식 변환 후 길이)로 잽니다. 원문을 자르므로 이스케이프나 태그가 잘리지 않습니다.
+    """
+    parts = []
+    while True:
+        # 변환 후 길이가 limit 이하인 앞부분 (이스케이프로 늘어난 비율만큼 줄여가며 찾음)
+        end = min(len(text), limit)
+        length = measure(text[:end])
+        if end == len(text) and length <= limit:
+            break
+        while length > limit and end > 1:
+            end = max(1, min(end - 1, end * limit // length))
+            length = measure(text[:end])
+        cut = text.rfind(' ', 0, end + 1)
+        # 짝이 잘린 **강조** 는 기호 그대로 출력되어 길어질 수 있으므로 다시 확인
+        if cut <= 0 or measure(text[:cut].rstrip()) > limit:
+            cut = end
+        parts.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    parts.append(text)
+    return parts
+
+
+class AnalysisRenderer:
+    """
+    분석 결과 렌더러
+
+    Args:
+        parse_mode: ParseMode.HTML, ParseMode.MARKDOWN_V2 또는 None(일반 텍스트)
+        compact: True 이면 섹션/소제목 사이 빈 줄을 생략
+        limit: 메시지 조각 최대 길이
+    """
+
+    def __init__(self, parse_mode=ParseMode.HTML, compact: bool = False, limit: int = MAX_MESSAGE_LENGTH):
+        if parse_mode not in (ParseMode.HTML, ParseMode.MARKDOWN_V2, None):
+            raise ValueError(f"지원하지 않는 서식입니다: {parse_mode}")
+        self.parse_mode = parse_mode
+        self.compact = compact
+        self.limit = limit
+
+        if parse_mode == ParseMode.HTML:
+            self._escape = escape_html
+            self._bold_open, self._bold_close = '<b>', '</b>'
+            self._bold_pattern = _BOLD_HTML
+        elif parse_mode == ParseMode.MARKDOWN_V2:
+            self._escape = escape_markdown_v2
+            self._bold_open, self._bold_close = '*', '*'
+            self._bold_pattern = _BOLD_MARKDOWN_V2
+        else:
+            self._escape = str
+            self._bold_open, self._bold_close = '', ''
+            self._bold_pattern = None
+
+    def _inline(self, text: str) -> str:
+        """본문 이스케이프 (**강조** 는 굵은 글씨로 변환)"""
+        escaped = self._escape(text)
+        if '**' not in text or not self.parse_mode:
+            return escaped
+        # 줄 전체를 한 번에 이스케이프한 뒤 이스케이프된 강조 표기만 서식으로 바꿈
+        bold_open, bold_close = self._bold_open, self._bold_close
+        return self._bold_pattern.sub(lambda match: bold_open + match.group(1) + bold_close, escaped)
+
+    def _bold(self, text: str) -> str:
+        return self._bold_open + self._escape(text) + self._bold_close
+
+    def render(self, result: dict) -> List[str]:
+        """
+        분석 결과를 메시지 조각 목록으로 변환
+
+        Returns:
+            길이 제한 이하의 메시지 조각 목록
+        """
+        if not result or not isinstance(result, dict):
+            return [self._escape("분석 중 오류가 발생했습니다.")]
+
+        bold_open, bold_close = self._bold_open, self._bold_close
+        escape = self._escape
+        inline = self._inline
+        gap = not self.compact
+        line_limit = min(MAX_LINE_LENGTH, self.limit)
+
+        # 출력 줄과 "다음 줄과 같은 조각에 있어야 하는지" 표시
+        lines = []
+        sticky = []
+        for kind, content in _tokenize(result):
+            if kind == BULLET or kind == TEXT:
+                prefix = '• ' if kind == BULLET else ''
+                line = prefix + inline(content)
+                if len(line) <= line_limit:
+                    lines.append(line)
+                    sticky.append(False)
+                    continue
+                pieces = _split_long(content, lambda piece: len(inline(piece)), line_limit - len(prefix))
+                lines.append(prefix + inline(pieces[0]))
+                sticky.append(False)
+                for piece in pieces[1:]:
+                    lines.append(inline(piece))
+                    sticky.append(False)
+                continue
+
+            if kind == SECTION:
+                content = content + ':'
+            elif kind == SUBHEADER:
+                content = '📍 ' + content
+            if gap and kind != TITLE:
+                lines.append('')
+                sticky.append(True)
+            line = bold_open + escape(content) + bold_close
+            if len(line) <= line_limit:
+                lines.append(line)
+                sticky.append(True)
+                continue
+            # 너무 긴 소제목은 나눈 줄마다 굵은 글씨로 (마지막 줄만 다음 줄과 묶음)
+            pieces = _split_long(content, lambda piece: len(self._bold(piece)), line_limit)
+            for piece in pieces:
+                lines.append(self._bold(piece))
+                sticky.append(False)
+            sticky[-1] = True
+
+        # 전체가 한 조각에 들어가면 그대로 반환
+        total = sum(map(len, lines)) + len(lines) - 1
+        if total <= self.limit:
+            return ['\n'.join(lines)]
+
+        chunks = []
+        start = 0
+        length = -1
+        for index, line in enumerate(lines):
+            extra = len(line) + 1
+            if index > start and length + extra > self.limit:
+                # 조각 끝의 제목 줄(과 빈 줄)은 다음 조각으로 넘김
+                cut = index
+                while cut - 1 > start and sticky[cut - 1]:
+                    cut -= 1
+                chunks.append('\n'.join(lines[start:cut]).strip('\n'))
+                start = cut
+                while start < index and not lines[start]:
+                    start += 1
+                length = sum(len(x) + 1 for x in lines[start:index]) - 1
+            length += extra
+        chunks.append('\n'.join(lines[start:]).strip('\n'))
+        return [chunk for chunk in chunks if chunk]
+
+
+def render_analysis(result: dict, parse_mode=ParseMode.HTML, compact: bool = False,
+                    limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """분석 결과를 텔레그램 서식의 메시지 조각 목록으로 변환"""
+    return AnalysisRenderer(parse_mode, compact, limit).render(result)
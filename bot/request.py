@@ -0,0 +1,171 @@
+"""
+봇 API 요청 모듈
+
+업데이트 수신(get_updates 롱 폴링)과 봇 API 호출(메시지 전송 등)에
+각각 따로 설정한 연결 풀을 사용합니다.
+롱 폴링은 연결 하나를 오래 붙잡고 있고, 전송은 짧은 요청이 한꺼번에 몰리므로
+풀 크기, 유휴 연결 유지 시간, HTTP/2 사용, 풀 대기 시간을 용도별로 따로 정합니다.
+
+설정 (용도: BOT / UPDATES):
+- TELEGRAM_<용도>_POOL_SIZE: 최대 연결 수
+- TELEGRAM_<용도>_KEEPALIVE: 유휴 연결을 닫지 않고 유지하는 시간 (초)
+- TELEGRAM_<용도>_HTTP2: HTTP/2 사용 (연결 하나로 여러 요청을 동시에 보냄)
+- TELEGRAM_<용도>_POOL_TIMEOUT: 빈 연결을 기다리는 최대 시간 (초, 넘기면 보내지 않고 TimedOut)
+
+지표 (tenant, pool 레이블):
+- bot_telegram_requests_in_flight: 진행 중인 요청 수 (빈 연결을 기다리는 요청 포함)
+- bot_telegram_requests_waiting: 풀 크기를 넘어 빈 연결을 기다리는 요청 수 (HTTP/1.1 기준 추정)
+- bot_telegram_pool_size: 최대 연결 수
+- bot_telegram_request_duration_seconds: 요청 시간 (연결 대기 포함)
+- bot_telegram_pool_timeouts_total: 빈 연결을 기다리다 보내지 못한 요청 수
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from telegram.error import TimedOut
+from telegram.request import HTTPXRequest
+
+import config
+from services.metrics import REGISTRY
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'bot_telegram_request_duration_seconds', '봇 API 요청 시간 (초, 연결 대기 포함)', ['tenant', 'pool']
+)
+POOL_TIMEOUTS = REGISTRY.counter(
+    'bot_telegram_pool_timeouts_total', '빈 연결을 기다리다 보내지 못한 봇 API 요청 수', ['tenant', 'pool']
+)
+
+# 만든 요청 객체 (지표 수집용)
+_requests: List['PooledRequest'] = []
+
+
+class PooledRequest(HTTPXRequest):
+    """
+    연결 풀 설정과 지표를 더한 봇 API 요청 객체
+
+    Args:
+        tenant: 지표에 표시할 봇 이름
+        pool: 용도 ('bot' / 'updates')
+        pool_size: 최대 연결 수
+        keepalive: 유휴 연결 유지 시간 (초)
+        http2: HTTP/2 사용 여부
+        pool_timeout: 빈 연결을 기다리는 최대 시간 (초)
+        connect_timeout, read_timeout, write_timeout: 연결/읽기/쓰기 제한 시간 (초)
+    """
+
+    def __init__(
+        self,
+        tenant: str,
+        pool: str,
+        pool_size: int,
+        keepalive: float,
+        http2: bool = False,
+        pool_timeout: Optional[float] = 1.0,
+        connect_timeout: Optional[float] = 30.0,
+        read_timeout: Optional[float] = 30.0,
+        write_timeout: Optional[float] = 30.0
+    ):
+        super().__init__(
+            connection_pool_size=pool_size,
+            read_timeout=read_timeout,
+            write_timeout=write_timeout,
+            connect_timeout=connect_timeout,
+            pool_timeout=pool_timeout,
+            http_version='2' if http2 else '1.1'
+        )
+        # HTTPXRequest 는 유휴 연결 유지 시간을 받지 않으므로 연결 제한을 바꿔 클라이언트를 다시 만듦
+        self._client_kwargs['limits'] = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=keepalive
+        )
+        self._client = self._build_client()
+
+        self.tenant = tenant
+        self.pool = pool
+        self.pool_size = pool_size
+        self.http2 = http2
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._duration = REQUEST_DURATION.labels(tenant, pool)
+        self._pool_timeouts = POOL_TIMEOUTS.labels(tenant, pool)
+        _requests.append(self)
+
+    @property
+    def waiting(self) -> int:
+        """풀 크기를 넘어 빈 연결을 기다리는 요청 수 (HTTP/2 는 연결 하나에 여러 요청을 보내므로 0)"""
+        return 0 if self.http2 else max(0, self.in_flight - self.pool_size)
+
+    async def do_request(self, *args, **kwargs) -> Tuple[int, bytes]:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started_at = time.perf_counter()
+        try:
+            return await super().do_request(*args, **kwargs)
+        except TimedOut as e:
+            if isinstance(e.__cause__, httpx.PoolTimeout):
+                self._pool_timeouts.inc()
+            raise
+        finally:
+            self.in_flight -= 1
+            self._duration.observe(time.perf_counter() - started_at)
+
+    def stats(self) -> dict:
+        """연결 풀 상태"""
+        return {
+            'pool_size': self.pool_size,
+            'http2': self.http2,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'peak_in_flight': self.peak_in_flight,
+        }
+
+
+def bot_request(tenant: str) -> PooledRequest:
+    """봇 API 호출(메시지 전송 등)용 요청 객체"""
+    return PooledRequest(
+        tenant, 'bot',
+        pool_size=config.TELEGRAM_BOT_POOL_SIZE,
+        keepalive=config.TELEGRAM_BOT_KEEPALIVE,
+        http2=config.TELEGRAM_BOT_HTTP2,
+        pool_timeout=config.TELEGRAM_BOT_POOL_TIMEOUT,
+        connect_timeout=config.TELEGRAM_CONNECT_TIMEOUT,
+        read_timeout=config.TELEGRAM_READ_TIMEOUT,
+        write_timeout=config.TELEGRAM_WRITE_TIMEOUT
+    )
+
+
+def updates_request(tenant: str) -> PooledRequest:
+    """업데이트 수신(get_updates 롱 폴링)용 요청 객체"""
+    return PooledRequest(
+        tenant, 'updates',
+        pool_size=config.TELEGRAM_UPDATES_POOL_SIZE,
+        keepalive=config.TELEGRAM_UPDATES_KEEPALIVE,
+        http2=config.TELEGRAM_UPDATES_HTTP2,
+        pool_timeout=config.TELEGRAM_UPDATES_POOL_TIMEOUT,
+        connect_timeout=config.TELEGRAM_CONNECT_TIMEOUT,
+        read_timeout=config.TELEGRAM_READ_TIMEOUT,
+        write_timeout=config.TELEGRAM_WRITE_TIMEOUT
+    )
+
+
+def request_stats() -> Dict[str, Dict[str, dict]]:
+    """봇별, 용도별 연결 풀 상태"""
+    stats: Dict[str, Dict[str, dict]] = {}
+    for request in _requests:
+        stats.setdefault(request.tenant, {})[request.pool] = request.stats()
+    return stats
+
+
+def _pool_gauge(name: str, documentation: str, attribute: str):
+    REGISTRY.gauge(
+        name, documentation, ['tenant', 'pool'],
+        callback=lambda: {(request.tenant, request.pool): getattr(request, attribute) for request in _requests}
+    )
+
+
+_pool_gauge('bot_telegram_requests_in_flight', '진행 중인 봇 API 요청 수 (빈 연결 대기 포함)', 'in_flight')
+_pool_gauge('bot_telegram_requests_waiting', '빈 연결을 기다리는 봇 API 요청 수 (추정)', 'waiting')
+_pool_gauge('bot_telegram_pool_size', '봇 API 연결 풀 최대 연결 수', 'pool_size')
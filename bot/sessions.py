@@ -0,0 +1,204 @@
+"""
+사용자 세션 정리 모듈
+
+context.user_data 와 대화 상태는 한 번 만들어지면 직접 지우기 전까지 메모리에 남으므로
+오래 실행하면 사용자 수만큼 계속 늘어납니다. 이 모듈은 주기적으로 세션을 정리합니다.
+
+정리 기준:
+1. 작성 중 방치: 대화 중인 사용자가 idle_timeout 동안 입력이 없으면 대화를 끝내고 안내
+2. 사용 종료 후 보관 기간: 대화가 끝난 사용자의 데이터는 마지막 입력 후 ttl 이 지나면 삭제
+3. 전체 메모리 한도: 세션 크기 합계가 max_bytes 를 넘으면 가장 오래 입력이 없던 사용자부터 삭제
+분석이 진행 중인 사용자는 정리하지 않습니다.
+
+마지막 입력 시각은 모든 업데이트보다 먼저 실행되는 핸들러(touch_update)로 기록합니다.
+"""
+
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from telegram import Update, ReplyKeyboardRemove
+from telegram.ext import ContextTypes, ConversationHandler
+
+from bot.outbound import get_messenger
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# 정리 사유별 세션 수
+SESSIONS_EVICTED = REGISTRY.counter(
+    'bot_sessions_evicted_total', '정리된 사용자 세션 수', ['reason']
+)
+
+# 정리 사유
+IDLE = 'idle'
+TTL = 'ttl'
+MEMORY = 'memory'
+
+
+def session_size(data: dict) -> int:
+    """세션 데이터 크기 추정 (JSON 으로 변환한 바이트 수)"""
+    try:
+        return len(json.dumps(data, ensure_ascii=False, default=str).encode())
+    except (TypeError, ValueError):
+        return 0
+
+
+class SessionReaper:
+    """
+    사용자 세션 정리
+
+    Args:
+        conversation: 대화 상태를 정리할 ConversationHandler
+        idle_timeout: 대화 중 입력이 없을 때 대화를 끝내기까지의 시간 (초)
+        ttl: 대화가 끝난 사용자 데이터를 보관하는 시간 (초)
+        max_bytes: 전체 세션 크기 한도 (바이트, 0 이면 제한 없음)
+        interval: 정리 주기 (초)
+        is_busy: 정리하면 안 되는 사용자인지 확인하는 함수 (예: 분석 진행 중)
+        idle_message: 방치된 대화를 끝낼 때 보낼 안내 메시지
+    """
+
+    def __init__(
+        self,
+        conversation: ConversationHandler,
+        idle_timeout: float,
+        ttl: float,
+        max_bytes: int = 0,
+        interval: float = 60.0,
+        is_busy: Optional[Callable[[int], bool]] = None,
+        idle_message: str = ""
+    ):
+        self.conversation = conversation
+        self.idle_timeout = idle_timeout
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.is_busy = is_busy or (lambda user_id: False)
+        self.idle_message = idle_message
+
+        # 사용자 ID -> 마지막 입력 시각 (오래된 순서)
+        self._last_seen: "OrderedDict[int, float]" = OrderedDict()
+
+        # 마지막 정리 시점의 상태
+        self.live_sessions = 0
+        self.active_conversations = 0
+        self.bytes_held = 0
+
+    def touch(self, user_id: int, now: Optional[float] = None):
+        """사용자의 마지막 입력 시각 갱신"""
+        self._last_seen[user_id] = time.monotonic() if now is None else now
+        self._last_seen.move_to_end(user_id)
+
+    async def touch_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """모든 업데이트에서 마지막 입력 시각 기록 (TypeHandler 콜백)"""
+        if update.effective_user:
+            self.touch(update.effective_user.id)
+
+    def _conversations(self) -> Dict[tuple, object]:
+        # ConversationHandler 는 대화를 밖에서 끝내는 공개 API 가 없어 내부 상태를 직접 사용
+        return self.conversation._conversations
+
+    def _end_conversation(self, key: tuple):
+        # 영구 저장을 사용하면 다음 저장 주기에 삭제가 반영됨
+        self.conversation._update_state(ConversationHandler.END, key)
+
+    async def _notify_idle(self, bot, chat_id: int):
+        if not self.idle_message:
+            return
+        try:
+            await get_messenger(bot).send_message(chat_id, self.idle_message, reply_markup=ReplyKeyboardRemove())
+        except Exception as e:
+            logger.warning("세션 종료 안내 전송 실패: %s", e, extra={'chat_id': chat_id})
+
+    async def _evict(self, application, user_id: int, reason: str, chats: Dict[int, list]):
+        """사용자 세션 삭제 (대화 중이면 대화를 끝내고 안내)"""
+        for key in chats.pop(user_id, []):
+            self._end_conversation(key)
+            await self._notify_idle(application.bot, key[0])
+        application.drop_user_data(user_id)
+        self._last_seen.pop(user_id, None)
+        SESSIONS_EVICTED.labels(reason).inc()
+
+    async def reap(self, application) -> Dict[str, int]:
+        """
+        세션 한 번 정리
+
+        Returns:
+            사유별 정리한 세션 수
+        """
+        now = time.monotonic()
+        evicted = {IDLE: 0, TTL: 0, MEMORY: 0}
+
+        # 사용자별 진행 중인 대화 (처리 중인 상태는 제외)
+        chats: Dict[int, list] = {}
+        for key, state in list(self._conversations().items()):
+            if isinstance(state, int):
+                chats.setdefault(key[-1], []).append(key)
+
+        # 재시작 후 불러온 세션 등 입력 기록이 없는 사용자는 지금부터 계산
+        for user_id in list(application.user_data) + list(chats):
+            if user_id not in self._last_seen:
+                self.touch(user_id, now)
+
+        for user_id, last_seen in list(self._last_seen.items()):
+            if self.is_busy(user_id):
+                continue
+            idle = now - last_seen
+            if user_id in chats:
+                if idle >= self.idle_timeout:
+                    await self._evict(application, user_id, IDLE, chats)
+                    evicted[IDLE] += 1
+            elif idle >= self.ttl:
+                await self._evict(application, user_id, TTL, chats)
+                evicted[TTL] += 1
+
+        # 전체 크기 한도 (오래 입력이 없던 사용자부터)
+        sizes = {user_id: session_size(data) for user_id, data in list(application.user_data.items())}
+        total = sum(sizes.values())
+        if self.max_bytes and total > self.max_bytes:
+            for user_id in list(self._last_seen):
+                if total <= self.max_bytes:
+                    break
+                if self.is_busy(user_id):
+                    continue
+                total -= sizes.pop(user_id, 0)
+                await self._evict(application, user_id, MEMORY, chats)
+                evicted[MEMORY] += 1
+
+        # 데이터도 대화도 없는 사용자는 기록에서 제거
+        for user_id in list(self._last_seen):
+            if user_id not in application.user_data and user_id not in chats:
+                self._last_seen.pop(user_id, None)
+
+        self.live_sessions = len(application.user_data)
+        self.active_conversations = sum(len(keys) for keys in chats.values())
+        self.bytes_held = total
+
+        if any(evicted.values()):
+            logger.info(
+                "세션 정리: 방치 %d, 보관 기간 만료 %d, 메모리 한도 %d",
+                evicted[IDLE], evicted[TTL], evicted[MEMORY],
+                extra={'live_sessions': self.live_sessions, 'bytes_held': self.bytes_held}
+            )
+        return evicted
+
+    async def run(self, application):
+        """주기적으로 세션 정리"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reap(application)
+            except Exception as e:
+                logger.exception("세션 정리 중 오류 발생: %s", e)
+
+    def stats(self) -> dict:
+        """세션 상태 (마지막 정리 시점 기준)"""
+        return {
+            'live_sessions': self.live_sessions,
+            'active_conversations': self.active_conversations,
+            'bytes_held': self.bytes_held,
+            'tracked_users': len(self._last_seen),
+        }
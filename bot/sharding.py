@@ -0,0 +1,270 @@
+"""
+작업 프로세스 분산 모듈
+
+업데이트를 받는 입구 프로세스 하나와 대화를 처리하는 작업 프로세스 N 개로 나눠 실행합니다.
+
+동작 방식:
+1. 입구 프로세스가 폴링 또는 웹훅으로 업데이트(JSON)를 받음
+2. chat_id 의 해시로 작업 프로세스를 골라 해당 프로세스의 큐에 넣음
+   (같은 채팅은 항상 같은 작업 프로세스에서 순서대로 처리)
+3. 작업 프로세스는 큐에서 업데이트를 꺼내 자신의 Application 으로 처리
+4. 대화 상태는 데이터베이스에 저장되므로 작업 프로세스가 재시작되어도 이어서 진행
+
+한 대의 리눅스 서버 안에서 multiprocessing 큐를 메시지 브로커 대신 사용합니다.
+"""
+
+import time
+import zlib
+import queue
+import signal
+import asyncio
+import logging
+import multiprocessing
+from typing import Callable, List, Optional
+
+from telegram import Update
+from telegram.error import NetworkError
+
+import config
+
+# 작업 프로세스 큐 최대 길이
+WORKER_QUEUE_SIZE = 10000
+
+# 작업 프로세스 상태 확인 주기 (초)
+SUPERVISE_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(chat_id: int, shards: int) -> int:
+    """채팅 ID 로 작업 프로세스 번호 선택"""
+    return zlib.crc32(str(chat_id).encode()) % shards
+
+
+def update_chat_id(data: dict) -> int:
+    """
+    업데이트 JSON 에서 채팅 ID 추출
+
+    채팅이 없는 업데이트(인라인 쿼리 등)는 보낸 사용자 ID 를 사용합니다.
+    """
+    for key, value in data.items():
+        if key == 'update_id' or not isinstance(value, dict):
+            continue
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat:
+            return chat['id']
+        sender = value.get('from') or value.get('user')
+        if sender:
+            return sender['id']
+    return 0
+
+
+def _worker_main(index: int, shards: int, updates, build_application: Callable):
+    """작업 프로세스 진입점"""
+    # 종료는 입구 프로세스가 큐로 알려줌 (Ctrl+C 는 무시)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # 봇 전체 전송 제한을 작업 프로세스 수로 나눠서 적용
+    config.OUTBOUND_GLOBAL_RATE = config.OUTBOUND_GLOBAL_RATE / shards
+
+    # 상태 확인/지표 서버는 입구 프로세스 다음 포트부터 차례로 사용 (PORT+1, PORT+2, ...)
+    config.PORT = config.PORT + 1 + index
+
+    asyncio.run(_serve_worker(index, updates, build_application(with_updater=False)))
+
+
+async def _serve_worker(index: int, updates, application):
+    """큐에서 업데이트를 꺼내 처리"""
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+
+    def next_update():
+        try:
+            return updates.get(timeout=1.0)
+        except queue.Empty:
+            return ()
+
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        logger.info("작업 프로세스 %d 시작", index)
+
+        while not stopping.is_set():
+            data = await loop.run_in_executor(None, next_update)
+            if data == ():
+                continue
+            if data is None:
+                break
+            await application.update_queue.put(Update.de_json(data, application.bot))
+    finally:
+        if application.running:
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        logger.info("작업 프로세스 %d 종료", index)
+
+
+class ShardRouter:
+    """
+    작업 프로세스 관리 및 업데이트 분배
+
+    Args:
+        shards: 작업 프로세스 수
+        build_application: 작업 프로세스에서 Application 을 만드는 함수
+            (build_application(with_updater=False) 형태로 호출, 모듈 최상위 함수여야 함)
+    """
+
+    def __init__(self, shards: int, build_application: Callable):
+        if shards < 1:
+            raise ValueError("작업 프로세스 수는 1 이상이어야 합니다.")
+        self.shards = shards
+        self.build_application = build_application
+        self._context = multiprocessing.get_context('spawn')
+        self._queues = [self._context.Queue(WORKER_QUEUE_SIZE) for _ in range(shards)]
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * shards
+        self._stopping = False
+
+        # 통계
+        self.routed = [0] * shards
+        self.dropped = 0
+        self.restarts = 0
+
+    def _spawn(self, index: int):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.shards, self._queues[index], self.build_application),
+            name=f"bot-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self._processes[index] = process
+
+    def start(self):
+        """작업 프로세스 모두 시작"""
+        for index in range(self.shards):
+            self._spawn(index)
+
+    def route(self, data: dict):
+        """업데이트를 담당 작업 프로세스 큐에 넣음"""
+        index = shard_for(update_chat_id(data), self.shards)
+        try:
+            self._queues[index].put_nowait(data)
+            self.routed[index] += 1
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(
+                "작업 프로세스 %d 큐가 가득 차 업데이트를 버립니다",
+                index, extra={'update_id': data.get('update_id')}
+            )
+
+    def _replace_queue(self, index: int) -> int:
+        """
+        종료된 작업 프로세스의 큐를 새 큐로 교체
+
+        프로세스가 큐를 읽는 도중 종료되면 큐 내부 잠금이 풀리지 않으므로
+        남은 업데이트를 옮길 수 있는 만큼 옮긴 뒤 새 큐를 사용합니다.
+
+        Returns:
+            옮긴 업데이트 수
+        """
+        old = self._queues[index]
+        new = self._context.Queue(WORKER_QUEUE_SIZE)
+        moved = 0
+        while True:
+            try:
+                new.put_nowait(old.get_nowait())
+                moved += 1
+            except queue.Empty:
+                break
+        self._queues[index] = new
+        return moved
+
+    async def supervise(self):
+        """종료된 작업 프로세스 재시작 (큐에 쌓인 업데이트는 새 프로세스가 이어서 처리)"""
+        while not self._stopping:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            for index, process in enumerate(self._processes):
+                if self._stopping or process is None or process.is_alive():
+                    continue
+                moved = self._replace_queue(index)
+                logger.error(
+                    "작업 프로세스 %d 종료됨 (exitcode=%s), 대기 중인 업데이트 %d건과 함께 다시 시작합니다.",
+                    index, process.exitcode, moved
+                )
+                self.restarts += 1
+                self._spawn(index)
+
+    def stop(self, timeout: float = 30.0):
+        """작업 프로세스에 종료를 알리고 기다림 (큐에 남은 업데이트는 처리 후 종료)"""
+        self._stopping = True
+        for updates in self._queues:
+            try:
+                updates.put(None, timeout=1.0)
+            except queue.Full:
+                pass
+
+        deadline = time.monotonic() + timeout
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("작업 프로세스 %d 가 제시간에 끝나지 않아 강제 종료합니다.", index)
+                process.terminate()
+                process.join(5)
+
+    def stats(self) -> dict:
+        """작업 프로세스 상태"""
+        return {
+            'workers': [
+                {
+                    'alive': process is not None and process.is_alive(),
+                    'routed': self.routed[index],
+                }
+                for index, process in enumerate(self._processes)
+            ],
+            'dropped': self.dropped,
+            'restarts': self.restarts,
+        }
+
+
+async def poll_updates(bot, handler: Callable[[dict], None], stop_event: asyncio.Event, timeout: int = 30):
+    """
+    입구 프로세스용 폴링 루프
+
+    받은 업데이트를 JSON(dict)으로 handler 에 넘깁니다.
+    stop_event 가 설정되거나 작업이 취소되면 마지막 업데이트를 확인 처리한 뒤 끝납니다.
+    """
+    await bot.delete_webhook()
+    offset = None
+    while not stop_event.is_set():
+        try:
+            updates = await bot.get_updates(
+                offset=offset,
+                timeout=timeout,
+                read_timeout=timeout + 10,
+                allowed_updates=Update.ALL_TYPES
+            )
+        except asyncio.CancelledError:
+            break
+        except NetworkError as e:
+            logger.warning("업데이트 수신 실패, 잠시 후 다시 시도: %s", e)
+            await asyncio.sleep(1)
+            continue
+
+        for update in updates:
+            handler(update.to_dict())
+            offset = update.update_id + 1
+
+    # 마지막으로 받은 업데이트까지 처리했다고 알림 (재시작 시 중복 수신 방지)
+    if offset is not None:
+        try:
+            await bot.get_updates(offset=offset, timeout=0)
+        except NetworkError as e:
+            logger.warning("마지막 업데이트 확인 실패: %s", e)
@@ -0,0 +1,187 @@
+"""
+봇(테넌트) 구성 모듈
+
+한 프로세스에서 여러 브랜드의 봇을 함께 실행할 때 봇마다 다른 설정을 관리합니다.
+모델 클라이언트, 데이터베이스 연결, 분석 실행 순서(admission)는 모든 봇이 함께 사용하고,
+토큰, 메시지, 프롬프트, 분석 작업, 대화 상태, 비용 한도는 봇마다 따로 가집니다.
+
+BOTS_CONFIG 파일 (JSON):
+{
+    "bots": [
+        {"name": "patent", "token": "123:abc"},
+        {
+            "name": "lab",
+            "token_env": "LAB_TELEGRAM_TOKEN",
+            "messages": {"WELCOME_MESSAGE": "...", "QUESTIONS": {"idea": "..."}},
+            "prompts": {"summary": "...", "analysis": "...", "report": "..."},
+            "daily_budget_usd": 5,
+            "max_concurrent_analyses": 2,
+            "weight": 1
+        }
+    ]
+}
+- messages: ElonStyleMessageFormatter 의 항목 중 바꿀 것만 지정 (QUESTIONS 는 항목별로 덮어씀)
+- prompts: 단계별 시스템 프롬프트 (지정하지 않은 단계는 기본 프롬프트)
+- token_env: 토큰을 설정 파일 대신 환경 변수에서 읽을 때 사용
+
+BOTS_CONFIG 가 없으면 TELEGRAM_TOKEN 으로 기본 봇 하나만 실행하며,
+이때는 사용자 ID, 세션 종류 등 저장 키가 기존과 같습니다.
+(기존 봇의 기록을 이어서 사용하려면 BOTS_CONFIG 에서 그 봇의 이름을 default 로 지정)
+
+업데이트를 처리하는 동안의 현재 봇은 contextvars 로 전달되므로
+핸들러와 핸들러가 만든 분석 작업에서는 current_tenant() 로 조회합니다.
+"""
+
+import os
+import re
+import json
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import config
+from bot.jobs import AnalysisJobManager
+from bot.messages import ElonStyleMessageFormatter
+# 기본 봇 이름 (사용자 키에 봇 이름이 없으면 이 봇으로 집계)
+from services.usage import DEFAULT_TENANT
+
+# 봇 이름 형식 (저장 키, 지표 레이블, 웹훅 경로에 사용)
+_NAME = re.compile(r'^[a-z0-9][a-z0-9_-]{0,31}$')
+
+
+def message_set(name: str, overrides: Optional[dict] = None) -> type:
+    """기본 메시지에서 일부만 바꾼 메시지 클래스"""
+    if not overrides:
+        return ElonStyleMessageFormatter
+    attributes = dict(overrides)
+    if 'QUESTIONS' in attributes:
+        attributes['QUESTIONS'] = {**ElonStyleMessageFormatter.QUESTIONS, **attributes['QUESTIONS']}
+    return type(f"{name.title().replace('-', '').replace('_', '')}Messages", (ElonStyleMessageFormatter,), attributes)
+
+
+class Tenant:
+    """
+    봇 하나의 구성과 실행 상태
+
+    Args:
+        name: 봇 이름 (영문 소문자, 숫자, -, _)
+        token: 텔레그램 봇 토큰
+        messages: 메시지 클래스 (ElonStyleMessageFormatter 와 같은 항목)
+        prompts: 단계별 시스템 프롬프트 ('summary' / 'analysis' / 'report')
+        daily_budget_usd: 봇 전체의 하루 비용 한도 (0 이면 제한 없음)
+        max_concurrent_analyses: 동시에 실행할 최대 분석 수 (0 이면 전체 한도만 적용)
+        weight: 분석 대기열에서의 상대적 몫 (클수록 더 자주 차례가 옴)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        token: Optional[str],
+        messages: type = ElonStyleMessageFormatter,
+        prompts: Optional[Dict[str, str]] = None,
+        daily_budget_usd: float = 0.0,
+        max_concurrent_analyses: int = 0,
+        weight: int = 1
+    ):
+        if not _NAME.match(name):
+            raise ValueError(f"봇 이름은 영문 소문자, 숫자, -, _ 로 32자 이내여야 합니다: {name}")
+        self.name = name
+        self.token = token
+        self.messages = messages
+        self.prompts = dict(prompts or {})
+        self.daily_budget_usd = daily_budget_usd
+        self.max_concurrent_analyses = max_concurrent_analyses
+        self.weight = max(1, weight)
+        # 기본 메시지와 다른 질문 문구 (질문 흐름은 모든 봇이 같이 쓰고 문구만 바꿈)
+        self.questions = {
+            key: question for key, question in messages.QUESTIONS.items()
+            if question != ElonStyleMessageFormatter.QUESTIONS.get(key)
+        }
+
+        # 봇별 분석 작업 (사용자당 1개 제한, 종료 시 봇마다 마무리)
+        self.jobs = AnalysisJobManager()
+
+        # 봇을 실행할 때 채워짐 (대화 핸들러, 세션 정리, Application)
+        self.conversation = None
+        self.session_reaper = None
+        self.application = None
+
+    @property
+    def is_default(self) -> bool:
+        return self.name == DEFAULT_TENANT
+
+    def user_key(self, user_id) -> str:
+        """
+        저장/집계용 사용자 키
+
+        기본 봇은 사용자 ID 그대로, 다른 봇은 '봇이름:사용자ID' 로 구분합니다
+        (같은 사람이 여러 봇을 사용해도 사용량, 분석 기록, 요청 제한이 섞이지 않도록).
+        """
+        return str(user_id) if self.is_default else f"{self.name}:{user_id}"
+
+    def kind(self, kind: str) -> str:
+        """세션 저장 종류 (기본 봇은 그대로, 다른 봇은 '종류:봇이름')"""
+        return kind if self.is_default else f"{kind}:{self.name}"
+
+    def __repr__(self) -> str:
+        return f"Tenant({self.name!r})"
+
+
+def load_tenants(path: str) -> List[Tenant]:
+    """BOTS_CONFIG 파일에서 봇 목록 불러오기"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    tenants = []
+    for item in data.get('bots', []):
+        name = item.get('name', '')
+        token = item.get('token') or os.getenv(item.get('token_env', ''), '')
+        if not token:
+            raise ValueError(f"봇 토큰이 없습니다: {name}")
+        tenants.append(Tenant(
+            name,
+            token,
+            messages=message_set(name, item.get('messages')),
+            prompts=item.get('prompts'),
+            daily_budget_usd=float(item.get('daily_budget_usd', 0)),
+            max_concurrent_analyses=int(item.get('max_concurrent_analyses', 0)),
+            weight=int(item.get('weight', 1))
+        ))
+
+    if not tenants:
+        raise ValueError(f"BOTS_CONFIG 에 봇이 없습니다: {path}")
+    names = [tenant.name for tenant in tenants]
+    tokens = [tenant.token for tenant in tenants]
+    if len(set(names)) != len(names) or len(set(tokens)) != len(tokens):
+        raise ValueError("BOTS_CONFIG 의 봇 이름과 토큰은 서로 달라야 합니다.")
+    return tenants
+
+
+# 기본 봇 (BOTS_CONFIG 가 없을 때, 그리고 현재 봇이 지정되지 않았을 때 사용)
+default_tenant = Tenant(DEFAULT_TENANT, config.TELEGRAM_TOKEN)
+
+
+def configured_tenants() -> List[Tenant]:
+    """실행할 봇 목록 (BOTS_CONFIG 가 없으면 기본 봇 하나)"""
+    if config.BOTS_CONFIG:
+        return load_tenants(config.BOTS_CONFIG)
+    return [default_tenant]
+
+
+# 현재 처리 중인 봇
+_current_tenant: contextvars.ContextVar[Tenant] = contextvars.ContextVar('current_tenant', default=default_tenant)
+
+
+def current_tenant() -> Tenant:
+    """현재 처리 중인 봇 (지정되지 않았으면 기본 봇)"""
+    return _current_tenant.get()
+
+
+@contextmanager
+def use_tenant(tenant: Tenant):
+    """with 블록 안에서 현재 봇 지정 (안에서 만든 태스크도 같은 봇을 사용)"""
+    token = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
@@ -0,0 +1,144 @@
+"""
+업데이트 처리 모듈
+
+여러 채팅의 업데이트는 동시에 처리하되,
+같은 채팅의 업데이트는 들어온 순서대로 하나씩 처리합니다.
+
+ConversationHandler 는 채팅/사용자별 상태를 가지므로
+같은 채팅의 업데이트가 동시에 처리되면 상태가 꼬일 수 있습니다.
+이 모듈은 채팅별 잠금으로 순서를 보장하고,
+전체 동시 처리 개수는 설정값으로 제한합니다.
+
+여러 봇을 함께 실행하면 봇(Application)마다 처리기를 하나씩 만들고,
+처리하는 동안 해당 봇을 현재 봇(current_tenant)으로 지정합니다.
+
+제공 지표:
+- in_flight: 현재 처리 중인 업데이트 수
+- queued: 처리 순서를 기다리는 업데이트 수
+- max_chat_queue_depth: 현재 가장 많이 밀려 있는 채팅의 대기 길이
+- peak_chat_queue_depth: 실행 이후 최대 채팅 대기 길이
+"""
+
+import asyncio
+from typing import Any, Awaitable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from bot.tenants import Tenant, default_tenant, use_tenant
+from services.metrics import REGISTRY, track
+from services.tracing import span
+
+# 봇별 처리한 업데이트 수
+UPDATES_PROCESSED = REGISTRY.counter('bot_updates_processed_total', '처리한 업데이트 수', ['tenant'])
+
+
+class _ChatSlot:
+    """채팅별 잠금과 대기 길이"""
+
+    __slots__ = ('lock', 'depth')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    채팅별 순서를 보장하는 동시 업데이트 처리기
+
+    Args:
+        max_concurrent_updates: 동시에 실행할 최대 업데이트 수
+        max_pending_updates: 대기 중인 업데이트를 포함한 최대 업데이트 수
+        tenant: 업데이트를 처리할 봇 (미지정 시 기본 봇)
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pending_updates: int = 4096, tenant: Optional[Tenant] = None):
+        # 기본 세마포어는 대기 중인 업데이트 수만 제한하고,
+        # 실제 동시 실행 수는 채팅 잠금을 얻은 뒤 별도 세마포어로 제한합니다.
+        # (같은 채팅의 순서를 기다리는 업데이트가 실행 슬롯을 차지하지 않도록)
+        super().__init__(max(max_pending_updates, max_concurrent_updates, 2))
+        if max_concurrent_updates < 1:
+            raise ValueError("max_concurrent_updates 는 1 이상이어야 합니다.")
+        self.concurrency = max_concurrent_updates
+        self.tenant = tenant or default_tenant
+        self._processed_counter = UPDATES_PROCESSED.labels(self.tenant.name)
+        self._running = asyncio.Semaphore(max_concurrent_updates)
+        self._chats = {}
+        self.in_flight = 0
+        self.processed = 0
+        self.peak_chat_queue_depth = 0
+
+    @staticmethod
+    def _chat_key(update: object) -> Optional[int]:
+        """업데이트의 순서 보장 단위 (채팅 ID, 없으면 사용자 ID)"""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat:
+            return update.effective_chat.id
+        if update.effective_user:
+            return update.effective_user.id
+        return None
+
+    def _span(self, update: object):
+        """업데이트 처리 추적 구간 (업데이트마다 새 trace 시작)"""
+        if not isinstance(update, Update):
+            return span('telegram.update', tenant=self.tenant.name)
+        return span(
+            'telegram.update',
+            tenant=self.tenant.name,
+            update_id=update.update_id,
+            chat_id=update.effective_chat.id if update.effective_chat else None,
+            user_id=update.effective_user.id if update.effective_user else None
+        )
+
+    async def _run(self, update: object, coroutine: Awaitable[Any]):
+        async with self._running:
+            self.in_flight += 1
+            try:
+                with use_tenant(self.tenant), track('handler_dispatch'), self._span(update):
+                    await coroutine
+            finally:
+                self.in_flight -= 1
+                self.processed += 1
+                self._processed_counter.inc()
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._chat_key(update)
+        if key is None:
+            await self._run(update, coroutine)
+            return
+
+        slot = self._chats.get(key)
+        if slot is None:
+            slot = self._chats[key] = _ChatSlot()
+        slot.depth += 1
+        if slot.depth > self.peak_chat_queue_depth:
+            self.peak_chat_queue_depth = slot.depth
+
+        try:
+            # asyncio.Lock 은 대기 순서대로 깨우므로 채팅 내 순서가 유지됨
+            async with slot.lock:
+                await self._run(update, coroutine)
+        finally:
+            slot.depth -= 1
+            if slot.depth == 0:
+                self._chats.pop(key, None)
+
+    async def initialize(self) -> None:
+        """초기화할 자원 없음"""
+
+    async def shutdown(self) -> None:
+        """정리할 자원 없음"""
+
+    def stats(self) -> dict:
+        """현재 처리 상태 지표"""
+        depths = [slot.depth for slot in self._chats.values()]
+        return {
+            'in_flight': self.in_flight,
+            'queued': max(0, sum(depths) - self.in_flight),
+            'active_chats': len(depths),
+            'max_chat_queue_depth': max(depths, default=0),
+            'peak_chat_queue_depth': self.peak_chat_queue_depth,
+            'processed': self.processed,
+        }
@@ -18,3 +18,156 @@ ERROR_MESSAGES = {
 # Railway 환경 설정
 IS_PRODUCTION = os.getenv('RAILWAY_ENVIRONMENT') == 'production'
 PORT = int(os.getenv('PORT', 3000))
+
+# 데이터베이스 설정
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# 저장소 백엔드 (postgres / sqlite) - 미지정 시 DATABASE_URL 유무로 결정
+DB_BACKEND = os.getenv('DB_BACKEND', 'postgres' if DATABASE_URL else 'sqlite').lower()
+
+# SQLite 설정 (DB_BACKEND=sqlite 일 때 사용)
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/bot.db')
+SQLITE_BATCH_SIZE = int(os.getenv('SQLITE_BATCH_SIZE', 20))
+SQLITE_FLUSH_INTERVAL = float(os.getenv('SQLITE_FLUSH_INTERVAL', 1.0))
+
+# PostgreSQL 연결 풀 (프로세스 안의 모든 봇이 함께 사용)
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 10))
+# 풀의 연결을 모두 사용 중일 때 반납을 기다리는 최대 시간 (초, 넘기면 오류)
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+
+# 유사 제출물 재사용 설정
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', 0.8))
+DEDUP_MAX_AGE_HOURS = float(os.getenv('DEDUP_MAX_AGE_HOURS', 72))
+DEDUP_CAPACITY = int(os.getenv('DEDUP_CAPACITY', 2000))
+
+# 동시 업데이트 처리 개수 (1 이면 순차 처리, 같은 채팅은 항상 순서대로 처리)
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', 32))
+
+# 실행 모드 (polling / webhook)
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+
+# 웹훅 설정 (BOT_MODE=webhook 일 때 사용)
+# WEBHOOK_URL 이 없으면 Railway 공개 도메인을 사용하고, 둘 다 없으면 웹훅 등록을 생략
+_RAILWAY_DOMAIN = os.getenv('RAILWAY_PUBLIC_DOMAIN')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL') or (f"https://{_RAILWAY_DOMAIN}" if _RAILWAY_DOMAIN else None)
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+
+# 메시지 전송 속도 제한 (초당 전송 수)
+OUTBOUND_GLOBAL_RATE = float(os.getenv('OUTBOUND_GLOBAL_RATE', 25))
+OUTBOUND_CHAT_RATE = float(os.getenv('OUTBOUND_CHAT_RATE', 1))
+OUTBOUND_CHAT_BURST = float(os.getenv('OUTBOUND_CHAT_BURST', 3))
+
+# 봇 API 요청 제한 시간 (초, 연결 / 읽기 / 쓰기)
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv('TELEGRAM_CONNECT_TIMEOUT', 30))
+TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', 30))
+TELEGRAM_WRITE_TIMEOUT = float(os.getenv('TELEGRAM_WRITE_TIMEOUT', 30))
+
+# 봇 API 호출(메시지 전송 등) 연결 풀 (최대 연결 수, 유휴 연결 유지 시간 - 초, HTTP/2 사용, 빈 연결 대기 시간 - 초)
+TELEGRAM_BOT_POOL_SIZE = int(os.getenv('TELEGRAM_BOT_POOL_SIZE', 256))
+TELEGRAM_BOT_KEEPALIVE = float(os.getenv('TELEGRAM_BOT_KEEPALIVE', 30))
+TELEGRAM_BOT_HTTP2 = os.getenv('TELEGRAM_BOT_HTTP2', 'false').lower() == 'true'
+TELEGRAM_BOT_POOL_TIMEOUT = float(os.getenv('TELEGRAM_BOT_POOL_TIMEOUT', 5))
+
+# 업데이트 수신(get_updates 롱 폴링) 연결 풀 (웹훅 모드에서는 사용하지 않음)
+TELEGRAM_UPDATES_POOL_SIZE = int(os.getenv('TELEGRAM_UPDATES_POOL_SIZE', 1))
+TELEGRAM_UPDATES_KEEPALIVE = float(os.getenv('TELEGRAM_UPDATES_KEEPALIVE', 60))
+TELEGRAM_UPDATES_HTTP2 = os.getenv('TELEGRAM_UPDATES_HTTP2', 'false').lower() == 'true'
+TELEGRAM_UPDATES_POOL_TIMEOUT = float(os.getenv('TELEGRAM_UPDATES_POOL_TIMEOUT', 5))
+
+# 정적 자산을 미리 업로드할 채팅 ID (비워두면 첫 전송 때 업로드)
+ASSET_CACHE_CHAT_ID = int(os.getenv('ASSET_CACHE_CHAT_ID')) if os.getenv('ASSET_CACHE_CHAT_ID') else None
+
+# 질문 흐름 설정 파일 경로 (JSON, 비워두면 기본 흐름 사용)
+FLOW_CONFIG_PATH = os.getenv('FLOW_CONFIG_PATH')
+
+# 분석 결과 서식 (HTML / MarkdownV2 / plain) 및 간결 모드
+RESULT_PARSE_MODE = os.getenv('RESULT_PARSE_MODE', 'HTML')
+RESULT_COMPACT = os.getenv('RESULT_COMPACT', 'false').lower() == 'true'
+
+# 사용자별 요청 제한 (명령어: 분당 횟수, 분석: 시간당 횟수, 각각 순간 허용량)
+COMMAND_RATE_PER_MINUTE = float(os.getenv('COMMAND_RATE_PER_MINUTE', 20))
+COMMAND_BURST = float(os.getenv('COMMAND_BURST', 5))
+ANALYSIS_RATE_PER_HOUR = float(os.getenv('ANALYSIS_RATE_PER_HOUR', 10))
+ANALYSIS_BURST = float(os.getenv('ANALYSIS_BURST', 3))
+
+# 작업 프로세스 수 (2 이상이면 입구 프로세스가 chat_id 별로 작업 프로세스에 업데이트 분배)
+WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', 1))
+
+# 대화 상태 데이터베이스 저장 여부 (미지정 시 작업 프로세스 분산 모드에서만 사용) 및 저장 주기 (초)
+PERSIST_CONVERSATIONS = os.getenv('PERSIST_CONVERSATIONS', 'true' if WORKER_PROCESSES > 1 else 'false').lower() == 'true'
+PERSISTENCE_INTERVAL = float(os.getenv('PERSISTENCE_INTERVAL', 1.0))
+
+# 종료 시 진행 중인 분석을 기다리는 최대 시간 (초, 넘기면 입력값을 저장하고 다음 시작 시 재개)
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', 20))
+
+# 로그 설정 (기본 레벨, 모듈별 레벨 "모듈=레벨,...", 출력 형식 json / text, DEBUG 로그 기록 비율)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVELS = os.getenv('LOG_LEVELS', 'httpx=WARNING,apscheduler=WARNING')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 1.0))
+
+# 요청 추적 (내보내기: file / zipkin / 비워두면 내보내지 않음, trace_id 는 항상 기록)
+TRACE_EXPORT = os.getenv('TRACE_EXPORT', '').lower()
+TRACE_FILE = os.getenv('TRACE_FILE', 'data/traces.jsonl')
+TRACE_ZIPKIN_URL = os.getenv('TRACE_ZIPKIN_URL')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 1.0))
+TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'telegram-analysis-bot')
+
+# 모델 비용 (토큰 100만 개당 USD, 기본값은 claude-3-haiku 가격)
+MODEL_INPUT_PRICE = float(os.getenv('MODEL_INPUT_PRICE', 0.25))
+MODEL_OUTPUT_PRICE = float(os.getenv('MODEL_OUTPUT_PRICE', 1.25))
+
+# 분석 방식 (two_stage: 명세서 초안 후 상세 분석 두 번 호출 / single: 구조화된 응답으로 한 번에 호출)
+PIPELINE_MODE = os.getenv('PIPELINE_MODE', 'two_stage').lower()
+
+# 단계 결과 메모 크기 (같은 사용자의 단계 입력이 같으면 모델을 다시 호출하지 않음, 0 이면 메모하지 않음)
+STAGE_MEMO_SIZE = int(os.getenv('STAGE_MEMO_SIZE', 512))
+
+# 하루 비용 한도 (USD, UTC 기준, 0 이면 제한 없음) 및 사용량 기록 주기 (초)
+USER_DAILY_BUDGET_USD = float(os.getenv('USER_DAILY_BUDGET_USD', 0))
+GLOBAL_DAILY_BUDGET_USD = float(os.getenv('GLOBAL_DAILY_BUDGET_USD', 0))
+USAGE_FLUSH_INTERVAL = float(os.getenv('USAGE_FLUSH_INTERVAL', 10))
+
+# 관리자 텔레그램 사용자 ID (쉼표로 구분, /top 등 관리자 명령어 사용 가능)
+ADMIN_IDS = {int(user_id) for user_id in os.getenv('ADMIN_IDS', '').split(',') if user_id.strip()}
+
+# 이벤트 루프 지연 감시 (기준 시간 이상 멈추면 멈춘 코드의 스택을 기록)
+LOOP_MONITOR = os.getenv('LOOP_MONITOR', 'false').lower() == 'true'
+LOOP_LAG_THRESHOLD = float(os.getenv('LOOP_LAG_THRESHOLD', 0.25))
+LOOP_MONITOR_INTERVAL = float(os.getenv('LOOP_MONITOR_INTERVAL', 0.1))
+LOOP_STALL_LOG_INTERVAL = float(os.getenv('LOOP_STALL_LOG_INTERVAL', 60))
+
+# 이벤트 루프 샘플링 프로파일 저장 경로 (접힌 스택 형식, 비워두면 사용 안 함) 및 샘플링 주기 (초)
+LOOP_PROFILE_FILE = os.getenv('LOOP_PROFILE_FILE', '')
+LOOP_PROFILE_INTERVAL = float(os.getenv('LOOP_PROFILE_INTERVAL', 0.01))
+
+# 사용자 세션 정리 (작성 중 방치 시 대화 종료까지의 시간, 대화 종료 후 데이터 보관 시간 - 초)
+SESSION_IDLE_TIMEOUT = float(os.getenv('SESSION_IDLE_TIMEOUT', 1800))
+SESSION_TTL = float(os.getenv('SESSION_TTL', 6 * 3600))
+# 전체 세션 크기 한도 (바이트, 0 이면 제한 없음) 및 정리 주기 (초)
+SESSION_MAX_BYTES = int(os.getenv('SESSION_MAX_BYTES', 50 * 1024 * 1024))
+SESSION_REAP_INTERVAL = float(os.getenv('SESSION_REAP_INTERVAL', 60))
+
+# 트래픽 기록 파일 (업데이트/모델 응답을 익명화해서 추가, .gz 이면 압축, 비워두면 기록 안 함)
+RECORD_FILE = os.getenv('RECORD_FILE', '')
+# 익명화 키 (여러 작업 프로세스가 같은 단어를 같게 바꾸도록 고정할 때 지정, 비워두면 실행마다 새로 생성)
+RECORD_SALT = os.getenv('RECORD_SALT', '')
+
+# 여러 봇을 한 프로세스에서 실행할 때의 봇 목록 파일 (JSON, 비워두면 TELEGRAM_TOKEN 으로 봇 하나만 실행)
+BOTS_CONFIG = os.getenv('BOTS_CONFIG', '')
+# 동시에 실행할 최대 분석 수 (모든 봇 합계, 0 이면 제한 없음 - 넘으면 봇별로 돌아가며 실행)
+ANALYSIS_CONCURRENCY = int(os.getenv('ANALYSIS_CONCURRENCY', 0))
+
+# 과부하 제어 (진행 중인 분석 수와 최근 분석 시간에 따라 full → summary_only → cached_only → reject 로 낮춤)
+OVERLOAD_CONTROL = os.getenv('OVERLOAD_CONTROL', 'false').lower() == 'true'
+# 단계별 기준값 (summary_only, cached_only, reject 순서, 쉼표로 구분, 0 이면 그 단계는 이 신호로 올라가지 않음)
+OVERLOAD_DEPTH_LEVELS = tuple(float(value) for value in os.getenv('OVERLOAD_DEPTH_LEVELS', '16,32,64').split(','))
+OVERLOAD_LATENCY_LEVELS = tuple(float(value) for value in os.getenv('OVERLOAD_LATENCY_LEVELS', '60,120,180').split(','))
+# 한 단계 내려가기 전에 낮은 부하가 유지되어야 하는 시간 (초) 및 분석 시간 p90 을 계산할 최근 건수
+OVERLOAD_COOLDOWN = float(os.getenv('OVERLOAD_COOLDOWN', 60))
+OVERLOAD_LATENCY_WINDOW = int(os.getenv('OVERLOAD_LATENCY_WINDOW', 50))
+# 분석 시간 p90 에 넣는 기록의 최대 나이 (초)
+OVERLOAD_LATENCY_MAX_AGE = float(os.getenv('OVERLOAD_LATENCY_MAX_AGE', 300))
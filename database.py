@@ -1,80 +1,889 @@
 """
-PostgreSQL 데이터베이스 연결 및 쿼리 처리
+데이터베이스 연결 및 쿼리 처리
 심플한 구조로 분석 결과 저장/조회
+
+저장소 백엔드:
+1. PostgreSQL (DATABASE_URL 사용, Railway 배포용)
+2. SQLite (내장 파일 DB, 단일 노드/테스트용 - WAL 모드 + 배치 쓰기)
+
+DB_BACKEND 환경 변수로 선택하며, 지정하지 않으면
+DATABASE_URL 이 있을 때 PostgreSQL, 없을 때 SQLite 를 사용합니다.
 """
 
 import os
 import json
-import psycopg2
+import atexit
+import logging
+import sqlite3
+import threading
 from datetime import datetime
-from psycopg2.extras import RealDictCursor
+
+import config
+from services.metrics import track, record_error
+from services.tracing import span, current_trace_id
+
+logger = logging.getLogger(__name__)
 
 # 데이터베이스 URL
-DATABASE_URL = os.getenv('DATABASE_URL')
+DATABASE_URL = config.DATABASE_URL
 
-def init_db():
-    """데이터베이스 테이블 생성"""
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
+
+class BaseStorage:
+    """
+    저장소 인터페이스
+
+    모든 백엔드는 아래 메서드를 구현해야 합니다.
+    """
+
+    def init_db(self):
+        """테이블 생성"""
+        raise NotImplementedError
+
+    def save_analysis(self, telegram_id: str, input_data: dict, result: dict, trace_id: str = None):
+        """분석 결과 저장 (trace_id: 분석 요청의 추적 ID)"""
+        raise NotImplementedError
+
+    def get_user_analyses(self, telegram_id: str, limit: int = 5):
+        """사용자의 최근 분석 결과 조회"""
+        raise NotImplementedError
+
+    def get_recent_analyses(self, limit: int = 1000):
+        """전체 사용자의 최근 분석 결과 조회 (오래된 것부터 반환)"""
+        raise NotImplementedError
+
+    def get_asset_file_ids(self, bot_id: str) -> dict:
+        """봇의 정적 자산 file_id 목록 조회 ({자산 이름: file_id})"""
+        raise NotImplementedError
+
+    def save_asset_file_id(self, bot_id: str, name: str, file_id: str):
+        """정적 자산 file_id 저장 (file_id 가 None 이면 삭제)"""
+        raise NotImplementedError
+
+    def get_sessions(self, kind: str) -> dict:
+        """대화 세션 데이터 조회 ({키: 데이터})"""
+        raise NotImplementedError
+
+    def save_session(self, kind: str, key: str, data):
+        """대화 세션 데이터 저장 (data 가 None 이면 삭제)"""
+        raise NotImplementedError
+
+    def add_usage(self, rows):
+        """
+        사용자별/일별 모델 사용량 누적
+
+        rows: (telegram_id, day, calls, input_tokens, output_tokens, cost) 목록
+        """
+        raise NotImplementedError
+
+    def get_daily_usage(self, day: str) -> dict:
+        """하루 동안의 사용자별 비용 조회 ({telegram_id: cost})"""
+        raise NotImplementedError
+
+    def get_top_usage(self, since_day: str, limit: int = 10):
+        """since_day 이후 비용이 많은 사용자 조회 (비용 내림차순)"""
+        raise NotImplementedError
+
+    def flush(self):
+        """대기 중인 쓰기 작업 반영 (배치 쓰기를 하지 않는 백엔드는 무시)"""
+
+    def close(self):
+        """연결 종료"""
+
+
+class _PooledConnection:
+    """
+    연결 풀에서 빌린 연결
+
+    close() 를 호출하면 연결을 닫지 않고 풀에 돌려줍니다.
+    커밋하지 않은 트랜잭션은 되돌리고, 끊어진 연결은 풀에서 버립니다.
+    """
+
+    __slots__ = ('_conn', '_storage')
+
+    def __init__(self, conn, storage: 'PostgresStorage'):
+        self._conn = conn
+        self._storage = storage
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._storage._release(conn)
+
+    def __del__(self):
+        # 예외로 close() 를 건너뛴 경우에도 풀에 반납
+        self.close()
+
+
+class PostgresStorage(BaseStorage):
+    """
+    PostgreSQL 저장소 (기존 동작 유지)
+
+    연결은 프로세스 안에서 함께 쓰는 풀(DB_POOL_MIN ~ DB_POOL_MAX)에서 빌려 사용하며,
+    풀의 연결을 모두 사용 중이면 반납될 때까지 최대 pool_timeout 초 기다립니다.
+    풀은 처음 연결할 때 만들므로 데이터베이스에 연결할 수 없어도 시작은 계속됩니다
+    (만들지 못하면 다음 연결 때 다시 시도).
+    """
+
+    def __init__(self, database_url: str, pool_min: int = 1, pool_max: int = 10, pool_timeout: float = 30.0):
+        # psycopg2 는 PostgreSQL 백엔드를 사용할 때만 필요
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+
+        self._psycopg2 = psycopg2
+        self._dict_cursor = RealDictCursor
+        self.database_url = database_url
+        self.pool_max = max(1, pool_max)
+        self.pool_min = min(pool_min, self.pool_max)
+        self.pool_timeout = pool_timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # 풀은 연결이 모자라면 바로 오류를 내므로 빌릴 수 있는 수를 세마포어로 제한
+        self._available = threading.BoundedSemaphore(self.pool_max)
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    from psycopg2.pool import ThreadedConnectionPool
+                    self._pool = ThreadedConnectionPool(self.pool_min, self.pool_max, self.database_url)
+        return self._pool
+
+    def _connect(self):
+        if not self._available.acquire(timeout=self.pool_timeout):
+            raise TimeoutError(
+                f"데이터베이스 연결을 {self.pool_timeout:g}초 동안 얻지 못했습니다 "
+                f"(연결 {self.pool_max}개 모두 사용 중, DB_POOL_MAX / DB_POOL_TIMEOUT 확인)"
+            )
+        try:
+            return _PooledConnection(self._get_pool().getconn(), self)
+        except Exception:
+            self._available.release()
+            raise
+
+    def _release(self, conn):
+        try:
+            broken = bool(conn.closed)
+            if not broken:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            self._pool.putconn(conn, close=broken)
+        except Exception as e:
+            logger.warning("데이터베이스 연결 반납 실패: %s", e)
+        finally:
+            self._available.release()
+
+    def close(self):
+        """풀의 연결 모두 종료"""
+        if self._pool is not None:
+            self._pool.closeall()
+
+    def init_db(self):
+        """데이터베이스 테이블 생성"""
+        try:
+            conn = self._connect()
+            cur = conn.cursor()
+
+            # analyses 테이블 생성
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id SERIAL PRIMARY KEY,
+                    telegram_id TEXT,
+                    input_data JSONB,
+                    result JSONB,
+                    trace_id TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # 추적 ID 컬럼이 없던 기존 테이블 보완
+            cur.execute("ALTER TABLE analyses ADD COLUMN IF NOT EXISTS trace_id TEXT")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_analyses_trace ON analyses (trace_id)")
+
+            # assets 테이블 생성 (텔레그램에 업로드된 정적 자산의 file_id)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS assets (
+                    bot_id TEXT,
+                    name TEXT,
+                    file_id TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (bot_id, name)
+                )
+            """)
+
+            # model_usage 테이블 생성 (사용자별/일별 모델 토큰 사용량과 비용)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS model_usage (
+                    telegram_id TEXT,
+                    day DATE,
+                    calls INTEGER DEFAULT 0,
+                    input_tokens BIGINT DEFAULT 0,
+                    output_tokens BIGINT DEFAULT 0,
+                    cost DOUBLE PRECISION DEFAULT 0,
+                    PRIMARY KEY (telegram_id, day)
+                )
+            """)
+
+            # sessions 테이블 생성 (대화 상태, 사용자 입력값 등 프로세스 재시작 후에도 유지할 데이터)
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    kind TEXT,
+                    key TEXT,
+                    data JSONB,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (kind, key)
+                )
+            """)
+
+            conn.commit()
+            cur.close()
+            conn.close()
+            logger.info("데이터베이스 초기화 성공 (PostgreSQL)")
+        except Exception as e:
+            logger.error("데이터베이스 초기화 실패 (무시하고 계속 진행): %s", e)
+
+    def save_analysis(self, telegram_id: str, input_data: dict, result: dict, trace_id: str = None):
+        """분석 결과 저장"""
+        try:
+            conn = self._connect()
+            cur = conn.cursor()
+
+            cur.execute(
+                """
+                INSERT INTO analyses (telegram_id, input_data, result, trace_id)
+                VALUES (%s, %s, %s, %s)
+                """,
+                (str(telegram_id), json.dumps(input_data), json.dumps(result), trace_id)
+            )
+
+            conn.commit()
+            cur.close()
+            conn.close()
+            logger.debug("분석 결과 저장 성공")
+        except Exception as e:
+            record_error('save_analysis', e)
+            logger.error("분석 결과 저장 실패 (무시하고 계속 진행): %s", e)
+
+    def get_user_analyses(self, telegram_id: str, limit: int = 5):
+        """사용자의 최근 분석 결과 조회"""
+        conn = self._connect()
+        cur = conn.cursor(cursor_factory=self._dict_cursor)
+
+        cur.execute(
+            """
+            SELECT * FROM analyses
+            WHERE telegram_id = %s
+            ORDER BY created_at DESC
+            LIMIT %s
+            """,
+            (str(telegram_id), limit)
+        )
+
+        results = cur.fetchall()
+
+        cur.close()
+        conn.close()
+
+        return results
+
+    def get_recent_analyses(self, limit: int = 1000):
+        """전체 사용자의 최근 분석 결과 조회 (오래된 것부터 반환)"""
+        conn = self._connect()
+        cur = conn.cursor(cursor_factory=self._dict_cursor)
+
+        # created_at 은 세션 시간대의 현지 시각(CURRENT_TIMESTAMP)으로 저장되므로 UTC 로 바꿔서 반환
+        # (SQLite 저장소와 같이 UTC 기준)
+        cur.execute(
+            """
+            SELECT * FROM (
+                SELECT id, telegram_id, input_data, result, trace_id,
+                       (created_at AT TIME ZONE current_setting('TimeZone')) AT TIME ZONE 'UTC' AS created_at
+                FROM analyses
+                ORDER BY analyses.created_at DESC
+                LIMIT %s
+            ) recent
+            ORDER BY created_at ASC
+            """,
+            (limit,)
+        )
+
+        results = cur.fetchall()
+
+        cur.close()
+        conn.close()
+
+        return results
+
+    def get_asset_file_ids(self, bot_id: str) -> dict:
+        """봇의 정적 자산 file_id 목록 조회"""
+        conn = self._connect()
+        cur = conn.cursor()
+
+        cur.execute("SELECT name, file_id FROM assets WHERE bot_id = %s", (str(bot_id),))
+        results = dict(cur.fetchall())
+
+        cur.close()
+        conn.close()
+
+        return results
+
+    def save_asset_file_id(self, bot_id: str, name: str, file_id: str):
+        """정적 자산 file_id 저장 (file_id 가 None 이면 삭제)"""
+        conn = self._connect()
         cur = conn.cursor()
-        
-        # analyses 테이블 생성
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS analyses (
-                id SERIAL PRIMARY KEY,
-                telegram_id TEXT,
-                input_data JSONB,
-                result JSONB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+
+        if file_id is None:
+            cur.execute("DELETE FROM assets WHERE bot_id = %s AND name = %s", (str(bot_id), name))
+        else:
+            cur.execute(
+                """
+                INSERT INTO assets (bot_id, name, file_id, updated_at)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (bot_id, name)
+                DO UPDATE SET file_id = EXCLUDED.file_id, updated_at = EXCLUDED.updated_at
+                """,
+                (str(bot_id), name, file_id)
             )
-        """)
-        
+
         conn.commit()
         cur.close()
         conn.close()
-        print("데이터베이스 초기화 성공")
-    except Exception as e:
-        print(f"데이터베이스 초기화 실패 (무시하고 계속 진행): {e}")
-
-def save_analysis(telegram_id: str, input_data: dict, result: dict):
-    """분석 결과 저장"""
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
+
+    def get_sessions(self, kind: str) -> dict:
+        """대화 세션 데이터 조회"""
+        conn = self._connect()
+        cur = conn.cursor()
+
+        cur.execute("SELECT key, data FROM sessions WHERE kind = %s", (kind,))
+        results = dict(cur.fetchall())
+
+        cur.close()
+        conn.close()
+
+        return results
+
+    def save_session(self, kind: str, key: str, data):
+        """대화 세션 데이터 저장 (data 가 None 이면 삭제)"""
+        conn = self._connect()
         cur = conn.cursor()
-        
-        cur.execute(
+
+        if data is None:
+            cur.execute("DELETE FROM sessions WHERE kind = %s AND key = %s", (kind, key))
+        else:
+            cur.execute(
+                """
+                INSERT INTO sessions (kind, key, data, updated_at)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (kind, key)
+                DO UPDATE SET data = EXCLUDED.data, updated_at = EXCLUDED.updated_at
+                """,
+                (kind, key, json.dumps(data))
+            )
+
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    def add_usage(self, rows):
+        """사용자별/일별 모델 사용량 누적"""
+        conn = self._connect()
+        cur = conn.cursor()
+
+        cur.executemany(
             """
-            INSERT INTO analyses (telegram_id, input_data, result)
-            VALUES (%s, %s, %s)
+            INSERT INTO model_usage (telegram_id, day, calls, input_tokens, output_tokens, cost)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (telegram_id, day)
+            DO UPDATE SET
+                calls = model_usage.calls + EXCLUDED.calls,
+                input_tokens = model_usage.input_tokens + EXCLUDED.input_tokens,
+                output_tokens = model_usage.output_tokens + EXCLUDED.output_tokens,
+                cost = model_usage.cost + EXCLUDED.cost
             """,
-            (str(telegram_id), json.dumps(input_data), json.dumps(result))
+            rows
         )
-        
+
         conn.commit()
         cur.close()
         conn.close()
-        print("분석 결과 저장 성공")
-    except Exception as e:
-        print(f"분석 결과 저장 실패 (무시하고 계속 진행): {e}")
+
+    def get_daily_usage(self, day: str) -> dict:
+        """하루 동안의 사용자별 비용 조회"""
+        conn = self._connect()
+        cur = conn.cursor()
+
+        cur.execute("SELECT telegram_id, cost FROM model_usage WHERE day = %s", (day,))
+        results = dict(cur.fetchall())
+
+        cur.close()
+        conn.close()
+
+        return results
+
+    def get_top_usage(self, since_day: str, limit: int = 10):
+        """since_day 이후 비용이 많은 사용자 조회"""
+        conn = self._connect()
+        cur = conn.cursor(cursor_factory=self._dict_cursor)
+
+        cur.execute(
+            """
+            SELECT telegram_id,
+                   SUM(calls) AS calls,
+                   SUM(input_tokens) AS input_tokens,
+                   SUM(output_tokens) AS output_tokens,
+                   SUM(cost) AS cost
+            FROM model_usage
+            WHERE day >= %s
+            GROUP BY telegram_id
+            ORDER BY cost DESC
+            LIMIT %s
+            """,
+            (since_day, limit)
+        )
+
+        results = cur.fetchall()
+
+        cur.close()
+        conn.close()
+
+        return results
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    SQLite 저장소
+
+    외부 서비스 없이 로컬 파일 하나로 동작합니다.
+
+    성능 설정:
+    1. WAL 저널 모드 (읽기와 쓰기가 서로 막지 않음)
+    2. synchronous=NORMAL, 메모리 임시 저장소, 큰 페이지 캐시, mmap
+    3. 배치 쓰기: save_analysis 는 버퍼에만 추가하고,
+       백그라운드 스레드가 batch_size 개 또는 flush_interval 초마다
+       하나의 트랜잭션으로 모아서 기록
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-20000",
+        "PRAGMA mmap_size=134217728",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA foreign_keys=ON",
+    )
+
+    def __init__(self, path: str, batch_size: int = 20, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        if path != ':memory:':
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        # 하나의 연결을 여러 스레드에서 공유 (접근은 락으로 직렬화)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            self._conn.execute(pragma)
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="sqlite-flusher", daemon=True)
+        self._flusher.start()
+
+    def init_db(self):
+        """데이터베이스 테이블 생성"""
+        try:
+            with self._lock:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS analyses (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        telegram_id TEXT,
+                        input_data TEXT,
+                        result TEXT,
+                        trace_id TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                # 추적 ID 컬럼이 없던 기존 테이블 보완
+                columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(analyses)")}
+                if 'trace_id' not in columns:
+                    self._conn.execute("ALTER TABLE analyses ADD COLUMN trace_id TEXT")
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_analyses_user "
+                    "ON analyses (telegram_id, created_at DESC)"
+                )
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_analyses_trace ON analyses (trace_id)"
+                )
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS assets (
+                        bot_id TEXT,
+                        name TEXT,
+                        file_id TEXT,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (bot_id, name)
+                    )
+                """)
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS model_usage (
+                        telegram_id TEXT,
+                        day TEXT,
+                        calls INTEGER DEFAULT 0,
+                        input_tokens INTEGER DEFAULT 0,
+                        output_tokens INTEGER DEFAULT 0,
+                        cost REAL DEFAULT 0,
+                        PRIMARY KEY (telegram_id, day)
+                    )
+                """)
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        kind TEXT,
+                        key TEXT,
+                        data TEXT,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (kind, key)
+                    )
+                """)
+            logger.info("데이터베이스 초기화 성공 (SQLite: %s)", self.path)
+        except Exception as e:
+            logger.error("데이터베이스 초기화 실패 (무시하고 계속 진행): %s", e)
+
+    def save_analysis(self, telegram_id: str, input_data: dict, result: dict, trace_id: str = None):
+        """분석 결과를 쓰기 버퍼에 추가 (실제 기록은 백그라운드에서 배치 처리)"""
+        try:
+            row = (
+                str(telegram_id),
+                json.dumps(input_data, ensure_ascii=False),
+                json.dumps(result, ensure_ascii=False),
+                trace_id,
+                datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f'),
+            )
+        except Exception as e:
+            logger.error("분석 결과 저장 실패 (무시하고 계속 진행): %s", e)
+            return
+
+        with self._cond:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def _take_pending(self):
+        with self._cond:
+            rows, self._pending = self._pending, []
+        return rows
+
+    def _write_rows(self, rows):
+        if not rows:
+            return
+        try:
+            with track('save_batch'), self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        """
+                        INSERT INTO analyses (telegram_id, input_data, result, trace_id, created_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        rows
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            logger.debug("분석 결과 저장 성공 (%d건)", len(rows))
+        except Exception as e:
+            logger.error("분석 결과 저장 실패 (무시하고 계속 진행): %s", e)
+
+    def _flush_loop(self):
+        """백그라운드 배치 쓰기 루프"""
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            self._write_rows(self._take_pending())
+            if closed:
+                return
+
+    def flush(self):
+        """버퍼에 남은 결과를 즉시 기록"""
+        self._write_rows(self._take_pending())
+
+    def get_user_analyses(self, telegram_id: str, limit: int = 5):
+        """사용자의 최근 분석 결과 조회"""
+        # 방금 저장한 결과도 조회되도록 버퍼를 먼저 비움
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT * FROM analyses
+                WHERE telegram_id = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+                """,
+                (str(telegram_id), limit)
+            ).fetchall()
+
+        return [self._decode_row(row) for row in rows]
+
+    def get_recent_analyses(self, limit: int = 1000):
+        """전체 사용자의 최근 분석 결과 조회 (오래된 것부터 반환)"""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT * FROM (
+                    SELECT * FROM analyses
+                    ORDER BY created_at DESC
+                    LIMIT ?
+                )
+                ORDER BY created_at ASC
+                """,
+                (limit,)
+            ).fetchall()
+
+        return [self._decode_row(row) for row in rows]
+
+    def get_asset_file_ids(self, bot_id: str) -> dict:
+        """봇의 정적 자산 file_id 목록 조회"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, file_id FROM assets WHERE bot_id = ?", (str(bot_id),)
+            ).fetchall()
+        return {row['name']: row['file_id'] for row in rows}
+
+    def save_asset_file_id(self, bot_id: str, name: str, file_id: str):
+        """정적 자산 file_id 저장 (file_id 가 None 이면 삭제, 배치 없이 바로 기록)"""
+        with self._lock:
+            if file_id is None:
+                self._conn.execute(
+                    "DELETE FROM assets WHERE bot_id = ? AND name = ?", (str(bot_id), name)
+                )
+            else:
+                self._conn.execute(
+                    """
+                    INSERT INTO assets (bot_id, name, file_id, updated_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT (bot_id, name)
+                    DO UPDATE SET file_id = excluded.file_id, updated_at = excluded.updated_at
+                    """,
+                    (str(bot_id), name, file_id)
+                )
+
+    def get_sessions(self, kind: str) -> dict:
+        """대화 세션 데이터 조회"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, data FROM sessions WHERE kind = ?", (kind,)
+            ).fetchall()
+        return {row['key']: json.loads(row['data']) for row in rows}
+
+    def save_session(self, kind: str, key: str, data):
+        """대화 세션 데이터 저장 (data 가 None 이면 삭제, 배치 없이 바로 기록)"""
+        with self._lock:
+            if data is None:
+                self._conn.execute(
+                    "DELETE FROM sessions WHERE kind = ? AND key = ?", (kind, key)
+                )
+            else:
+                self._conn.execute(
+                    """
+                    INSERT INTO sessions (kind, key, data, updated_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT (kind, key)
+                    DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+                    """,
+                    (kind, key, json.dumps(data, ensure_ascii=False))
+                )
+
+    def add_usage(self, rows):
+        """사용자별/일별 모델 사용량 누적 (사용량 집계기가 이미 모아서 호출하므로 바로 기록)"""
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO model_usage (telegram_id, day, calls, input_tokens, output_tokens, cost)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (telegram_id, day)
+                DO UPDATE SET
+                    calls = calls + excluded.calls,
+                    input_tokens = input_tokens + excluded.input_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens,
+                    cost = cost + excluded.cost
+                """,
+                rows
+            )
+
+    def get_daily_usage(self, day: str) -> dict:
+        """하루 동안의 사용자별 비용 조회"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT telegram_id, cost FROM model_usage WHERE day = ?", (day,)
+            ).fetchall()
+        return {row['telegram_id']: row['cost'] for row in rows}
+
+    def get_top_usage(self, since_day: str, limit: int = 10):
+        """since_day 이후 비용이 많은 사용자 조회"""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT telegram_id,
+                       SUM(calls) AS calls,
+                       SUM(input_tokens) AS input_tokens,
+                       SUM(output_tokens) AS output_tokens,
+                       SUM(cost) AS cost
+                FROM model_usage
+                WHERE day >= ?
+                GROUP BY telegram_id
+                ORDER BY cost DESC
+                LIMIT ?
+                """,
+                (since_day, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _decode_row(row) -> dict:
+        item = dict(row)
+        item['input_data'] = json.loads(item['input_data']) if item['input_data'] else None
+        item['result'] = json.loads(item['result']) if item['result'] else None
+        return item
+
+    def close(self):
+        """버퍼를 비우고 연결 종료"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._flusher.join(timeout=5)
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+# 설정에 따라 생성된 저장소 인스턴스
+_storage = None
+_storage_lock = threading.Lock()
+
+# 분석 결과 저장 시 호출되는 콜백 목록 (예: 유사 제출물 인덱스 갱신)
+_save_listeners = []
+
+
+def create_storage(backend: str = None) -> BaseStorage:
+    """설정값으로 저장소 백엔드 생성"""
+    backend = (backend or config.DB_BACKEND).lower()
+    if backend == 'sqlite':
+        return SQLiteStorage(
+            config.SQLITE_PATH,
+            batch_size=config.SQLITE_BATCH_SIZE,
+            flush_interval=config.SQLITE_FLUSH_INTERVAL
+        )
+    if backend == 'postgres':
+        return PostgresStorage(
+            DATABASE_URL,
+            pool_min=config.DB_POOL_MIN,
+            pool_max=config.DB_POOL_MAX,
+            pool_timeout=config.DB_POOL_TIMEOUT
+        )
+    raise ValueError(f"지원하지 않는 DB_BACKEND 입니다: {backend}")
+
+
+def get_storage() -> BaseStorage:
+    """현재 저장소 인스턴스 반환 (최초 호출 시 생성)"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+                atexit.register(_storage.close)
+    return _storage
+
+
+def init_db():
+    """데이터베이스 테이블 생성"""
+    get_storage().init_db()
+
+
+def flush():
+    """대기 중인 쓰기 작업 반영"""
+    get_storage().flush()
+
+
+def add_save_listener(listener):
+    """
+    분석 결과 저장 콜백 등록
+
+    listener(telegram_id, input_data, result) 형태로 호출됩니다.
+    """
+    _save_listeners.append(listener)
+
+
+def save_analysis(telegram_id: str, input_data: dict, result: dict, trace_id: str = None):
+    """
+    분석 결과 저장
+
+    trace_id 를 지정하지 않으면 현재 추적 구간의 trace_id 를 함께 저장합니다.
+    """
+    if trace_id is None:
+        trace_id = current_trace_id()
+    with track('save_analysis'), span('db.save_analysis', backend=config.DB_BACKEND):
+        get_storage().save_analysis(telegram_id, input_data, result, trace_id)
+
+    for listener in _save_listeners:
+        try:
+            listener(telegram_id, input_data, result)
+        except Exception as e:
+            logger.warning("저장 콜백 실행 실패 (무시하고 계속 진행): %s", e)
+
 
 def get_user_analyses(telegram_id: str, limit: int = 5):
     """사용자의 최근 분석 결과 조회"""
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cur.execute(
-        """
-        SELECT * FROM analyses 
-        WHERE telegram_id = %s 
-        ORDER BY created_at DESC 
-        LIMIT %s
-        """,
-        (str(telegram_id), limit)
-    )
-    
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
-    
-    return results
+    return get_storage().get_user_analyses(telegram_id, limit)
+
+
+def get_recent_analyses(limit: int = 1000):
+    """전체 사용자의 최근 분석 결과 조회 (오래된 것부터 반환)"""
+    return get_storage().get_recent_analyses(limit)
+
+
+def get_asset_file_ids(bot_id: str) -> dict:
+    """봇의 정적 자산 file_id 목록 조회"""
+    return get_storage().get_asset_file_ids(bot_id)
+
+
+def save_asset_file_id(bot_id: str, name: str, file_id: str):
+    """정적 자산 file_id 저장 (file_id 가 None 이면 삭제)"""
+    get_storage().save_asset_file_id(bot_id, name, file_id)
+
+
+def get_sessions(kind: str) -> dict:
+    """대화 세션 데이터 조회 ({키: 데이터})"""
+    return get_storage().get_sessions(kind)
+
+
+def save_session(kind: str, key: str, data):
+    """대화 세션 데이터 저장 (data 가 None 이면 삭제)"""
+    get_storage().save_session(kind, key, data)
+
+
+def add_usage(rows):
+    """사용자별/일별 모델 사용량 누적"""
+    get_storage().add_usage(rows)
+
+
+def get_daily_usage(day: str) -> dict:
+    """하루 동안의 사용자별 비용 조회"""
+    return get_storage().get_daily_usage(day)
+
+
+def get_top_usage(since_day: str, limit: int = 10):
+    """since_day 이후 비용이 많은 사용자 조회"""
+    return get_storage().get_top_usage(since_day, limit)
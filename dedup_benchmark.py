@@ -0,0 +1,219 @@
+"""
+유사 제출물 인덱스 벤치마크
+
+합성한 발명 양식으로 NearDuplicateIndex 의 판정 정확도와 조회 시간을 측정합니다.
+
+1. 정확도 (precision / recall)
+   - 유사 쌍: 원본 양식을 문구만 바꾼 재제출
+     (띄어쓰기/문장부호, 동의어 치환, 문장 순서 변경, 문장 추가/삭제를 섞어서 적용)
+   - 다른 쌍: 같은 분야의 다른 발명 (분야 어휘를 많이 공유하는 어려운 경우 포함)
+   쌍마다 다른 사용자로 원본을 인덱스에 넣고 비교 양식으로 조회해서
+   임계값별 precision / recall 과 변형 종류별 recall 을 계산합니다.
+
+2. 조회 시간
+   인덱스 크기(전체 항목 수)별로 find() 의 p50 / p99 를 측정합니다.
+   항목은 여러 사용자에게 나눠 넣고 (사용자당 최대 --per-user 건),
+   이전 제출이 있는 사용자의 재제출(일치)과 새 제출(불일치)을 섞어서 조회합니다.
+
+사용법:
+    python dedup_benchmark.py
+    python dedup_benchmark.py --pairs 500 --sizes 100,1000,2000,10000 --json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Dict, List, Tuple
+
+import config
+from bot.form_parser import FIELD_LABELS
+from services.similarity_index import NearDuplicateIndex
+from replay import percentile
+
+FIELDS = tuple(FIELD_LABELS)
+
+# 분야별 어휘 (같은 분야의 다른 발명은 이 어휘를 공유)
+DOMAINS = {
+    '배터리': ['리튬', '음극재', '양극재', '전해질', '셀', '충전', '방전', '열관리', '실리콘', '분리막', '수명', '용량'],
+    '음성': ['음성 인식', '번역', '마이크', '잡음 제거', '화자', '온디바이스', '모델', '지연 시간', '언어', '자막', '억양', '단어'],
+    '의료': ['센서', '혈당', '심박', '웨어러블', '진단', '영상', '환자', '측정', '알림', '병원', '데이터', '정확도'],
+    '물류': ['드론', '배송', '경로', '창고', '로봇', '재고', '바코드', '적재', '운송', '추적', '시간', '비용'],
+    '농업': ['토양', '수분', '작물', '온실', '관개', '비료', '드론', '병해충', '수확', '기후', '센서', '생산량'],
+}
+VERBS = ['개선한다', '줄인다', '높인다', '자동화한다', '예측한다', '측정한다', '제어한다', '결합한다', '최적화한다', '감지한다']
+CONNECTORS = ['이를 통해', '또한', '특히', '그 결과', '동시에', '기존과 달리']
+# 재제출할 때 흔히 바꾸는 표현
+SYNONYMS = {
+    '개선한다': '향상시킨다', '줄인다': '감소시킨다', '높인다': '증가시킨다', '측정한다': '계측한다',
+    '제어한다': '조절한다', '예측한다': '추정한다', '결합한다': '통합한다', '감지한다': '탐지한다',
+    '또한': '그리고', '특히': '무엇보다', '그 결과': '결과적으로', '동시에': '함께',
+}
+
+
+def sentence(rng: random.Random, words: List[str], number: int) -> str:
+    a, b, c = rng.sample(words, 3)
+    return f"{rng.choice(CONNECTORS)} {a} 와 {b} 를 이용해 {c} 를 {rng.choice(VERBS)} ({number})"
+
+
+def make_form(rng: random.Random, domain: str) -> Dict[str, List[str]]:
+    """항목별 문장 목록으로 된 발명 양식"""
+    words = DOMAINS[domain]
+    return {
+        field: [sentence(rng, words, rng.randint(1, 999)) for _ in range(rng.randint(1, 3))]
+        for field in FIELDS
+    }
+
+
+def render(form: Dict[str, List[str]]) -> Dict[str, str]:
+    return {field: ' '.join(sentences) for field, sentences in form.items()}
+
+
+def rephrase(rng: random.Random, form: Dict[str, List[str]], domain: str) -> Tuple[str, Dict[str, List[str]]]:
+    """원본 양식을 재제출처럼 고치기 (변형 종류, 고친 양식)"""
+    kind = rng.choice(['spacing', 'synonyms', 'reorder', 'edit_sentence', 'mixed'])
+    edited = {field: list(sentences) for field, sentences in form.items()}
+    fields = rng.sample(FIELDS, 3)
+
+    if kind in ('spacing', 'mixed'):
+        for field in fields:
+            edited[field] = [s.replace(' 를 ', '를 ').replace(' 와 ', '와 ') + '.' for s in edited[field]]
+    if kind in ('synonyms', 'mixed'):
+        for field in fields:
+            for source, target in SYNONYMS.items():
+                edited[field] = [s.replace(source, target) for s in edited[field]]
+    if kind in ('reorder', 'mixed'):
+        for field in FIELDS:
+            rng.shuffle(edited[field])
+    if kind in ('edit_sentence', 'mixed'):
+        # 한 항목에 문장을 하나 더하거나 바꿈
+        field = rng.choice(FIELDS)
+        extra = sentence(rng, DOMAINS[domain], rng.randint(1, 999))
+        if len(edited[field]) > 1 and rng.random() < 0.5:
+            edited[field][rng.randrange(len(edited[field]))] = extra
+        else:
+            edited[field].append(extra)
+    return kind, edited
+
+
+def labeled_pairs(count: int, seed: int) -> List[Tuple[str, Dict[str, str], Dict[str, str], bool]]:
+    """(종류, 원본, 비교 양식, 유사 여부) 목록 (유사 / 다른 쌍 절반씩)"""
+    rng = random.Random(seed)
+    pairs = []
+    for index in range(count):
+        domain = rng.choice(list(DOMAINS))
+        original = make_form(rng, domain)
+        if index % 2 == 0:
+            kind, other = rephrase(rng, original, domain)
+            pairs.append((kind, render(original), render(other), True))
+        else:
+            # 같은 분야의 다른 발명 (일부 항목은 그대로 복사한 어려운 경우 포함)
+            other = make_form(rng, domain)
+            kind = 'distinct'
+            if rng.random() < 0.3:
+                kind = 'distinct_shared'
+                for field in rng.sample(FIELDS, 3):
+                    other[field] = list(original[field])
+            pairs.append((kind, render(original), render(other), False))
+    return pairs
+
+
+def accuracy(pairs, threshold: float) -> dict:
+    """임계값에서의 precision / recall 과 변형 종류별 판정 비율"""
+    index = NearDuplicateIndex(FIELDS, threshold=threshold, capacity=len(pairs) + 1)
+    for user, (_, original, _, _) in enumerate(pairs):
+        index.add(user, original, {'summary': str(user)})
+
+    true_positive = false_positive = false_negative = 0
+    by_kind: Dict[str, List[int]] = {}
+    for user, (kind, _, other, duplicate) in enumerate(pairs):
+        found = index.find(user, other) is not None
+        by_kind.setdefault(kind, []).append(int(found))
+        if found and duplicate:
+            true_positive += 1
+        elif found:
+            false_positive += 1
+        elif duplicate:
+            false_negative += 1
+
+    return {
+        'threshold': threshold,
+        'precision': round(true_positive / (true_positive + false_positive), 3) if true_positive + false_positive else 1.0,
+        'recall': round(true_positive / (true_positive + false_negative), 3) if true_positive + false_negative else 1.0,
+        'matched_by_kind': {kind: round(sum(values) / len(values), 3) for kind, values in sorted(by_kind.items())},
+    }
+
+
+def lookup_latency(size: int, per_user: int, queries: int, seed: int) -> dict:
+    """인덱스 크기별 find() 시간 (밀리초)"""
+    rng = random.Random(seed)
+    index = NearDuplicateIndex(FIELDS, threshold=config.DEDUP_THRESHOLD, capacity=size)
+    stored = []
+    for entry in range(size):
+        domain = rng.choice(list(DOMAINS))
+        form = make_form(rng, domain)
+        user = entry // per_user
+        index.add(user, render(form), {'summary': str(entry)})
+        stored.append((user, domain, form))
+
+    seconds = []
+    for query in range(queries):
+        user, domain, form = rng.choice(stored)
+        if query % 2 == 0:
+            _, form = rephrase(rng, form, domain)
+        else:
+            form = make_form(rng, domain)
+        query_form = render(form)
+        started_at = time.perf_counter()
+        index.find(user, query_form)
+        seconds.append(time.perf_counter() - started_at)
+
+    return {
+        'size': size,
+        'p50_ms': round(percentile(seconds, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(seconds, 0.99) * 1000, 2),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="유사 제출물 인덱스 정확도 / 조회 시간 측정")
+    parser.add_argument('--pairs', type=int, default=1000, help="정확도 측정에 쓸 양식 쌍 수 (유사 / 다른 쌍 절반씩)")
+    parser.add_argument('--thresholds', default='0.5,0.6,0.7,0.8,0.9', help="정확도를 비교할 임계값 (쉼표로 구분)")
+    parser.add_argument('--sizes', default=f'100,1000,{config.DEDUP_CAPACITY},10000', help="조회 시간을 측정할 인덱스 크기")
+    parser.add_argument('--per-user', type=int, default=20, help="사용자당 저장된 분석 수")
+    parser.add_argument('--queries', type=int, default=500, help="인덱스 크기별 조회 횟수")
+    parser.add_argument('--seed', type=int, default=7, help="합성 양식 난수 시드")
+    parser.add_argument('--json', action='store_true', help="결과를 JSON 으로 출력")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    pairs = labeled_pairs(args.pairs, args.seed)
+    thresholds = sorted({float(value) for value in args.thresholds.split(',')} | {config.DEDUP_THRESHOLD})
+    report = {
+        'dedup_threshold': config.DEDUP_THRESHOLD,
+        'accuracy': [accuracy(pairs, threshold) for threshold in thresholds],
+        'latency': [
+            lookup_latency(int(size), args.per_user, args.queries, args.seed)
+            for size in args.sizes.split(',')
+        ],
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(f"양식 쌍 {len(pairs)}개 (유사 / 다른 쌍 절반씩), DEDUP_THRESHOLD={config.DEDUP_THRESHOLD}")
+    for row in report['accuracy']:
+        marker = ' *' if row['threshold'] == config.DEDUP_THRESHOLD else '  '
+        kinds = ', '.join(f"{kind} {ratio:.0%}" for kind, ratio in row['matched_by_kind'].items())
+        print(f"{marker}임계값 {row['threshold']:.2f}: precision {row['precision']:.3f} / recall {row['recall']:.3f}  (일치 판정: {kinds})")
+    print(f"\n조회 시간 (사용자당 최대 {args.per_user}건, 조회 {args.queries}회)")
+    for row in report['latency']:
+        print(f"  항목 {row['size']:>6}: p50 {row['p50_ms']:.2f}ms / p99 {row['p99_ms']:.2f}ms")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,787 @@
+"""
+부하 테스트 도구
+
+가짜 텔레그램 서버와 가짜 모델로 실제 Application 또는 봇 API 요청 계층에 부하를 주고 측정합니다.
+
+1. overload: 과부하 제어 시험
+   동시 호출이 많을수록 느려지는 가짜 모델로 Application 에
+   /submit 분석 요청을 일정 비율(포아송 도착)로 몰아넣고
+   요청부터 마지막 응답(완료 안내, 거절 안내, 오류)까지 걸린 시간의 분포와 과부하 단계 변화를 측정합니다.
+   요청을 다 보낸 뒤에는 회복 단계로, 밀린 분석이 모두 끝나는 시간과
+   과부하 단계가 full 로 돌아오는 시간을 (요청을 멈춘 시점부터) 측정합니다.
+
+   가짜 모델 응답 시간 = base × (1 + 동시 호출 수 / knee)
+   (모델 제공자가 부하를 받으면 느려지는 상황: 요청이 쌓일수록 응답이 느려지고, 느려질수록 더 쌓임)
+
+2. send: 메시지 전송 처리량 측정
+   로컬에 띄운 가짜 봇 API HTTP 서버로 여러 전송 작업이 동시에 sendMessage 를 보내고
+   연결 풀 크기별 초당 전송 수, 요청 시간, 풀 대기 시간 초과 수를 측정합니다
+   (전송 속도 제한 없이 요청 계층만 측정).
+
+3. pipeline: 분석 방식(PIPELINE_MODE) 비교
+   같은 입력을 두 단계 방식(two_stage)과 한 번 호출 방식(single)으로 분석하고
+   방식별 분석 시간 p50 / p90, 모델 호출 수, 입력/출력 토큰, 비용을 비교합니다.
+   가짜 모델은 두 방식 모두 같은 내용을 쓰며 (두 단계 방식은 마크다운, 한 번 호출 방식은 도구 입력 JSON),
+   토큰 수는 실제 요청/응답 글자 수로 추정하고 (한국어는 --chars-per-token, 영문/기호는 약 4글자당 1토큰)
+   응답 시간은 첫 토큰까지의 시간 + 출력 토큰 / 초당 출력 토큰으로 정합니다.
+   (두 단계 방식은 초안을 상세 분석의 입력으로 다시 보내고, 한 번 호출 방식은 도구 정의와 JSON 형식만큼 더 씀)
+
+4. render: 분석 결과 렌더링 비교
+   합성한 큰 분석 결과를 서식(HTML / MarkdownV2 / 일반 텍스트)마다 렌더링해서
+   기존 방식(ElonStyleMessageFormatter.format_analysis_result 후 split_message 로 분할)과 렌더링 시간을 비교하고
+   렌더러의 모든 메시지 조각이 텔레그램 길이 제한(4096자) 이하인지 확인합니다.
+   이스케이프할 문자(& < > . 등)만으로 된 긴 줄처럼 이스케이프 후 길이가 크게 늘어나는 결과도 포함합니다.
+
+사용법:
+    # 과부하 제어 없이 / 켜고 실행
+    python loadtest.py overload --rate 8 --duration 30
+    python loadtest.py overload --rate 8 --duration 30 --overload
+
+    # 두 경우를 차례로 실행해서 비교 (과부하 제어를 켰을 때 p99 가 기준을 넘으면 종료 코드 1)
+    python loadtest.py overload --rate 8 --duration 30 --compare --max-p99 20
+
+    # 연결 풀 크기별 전송 처리량 (가짜 서버 응답 지연 50ms)
+    python loadtest.py send --messages 2000 --senders 64 --pool-sizes 1,8,32,256 --latency 0.05
+
+    # 분석 방식 비교 (입력 20개)
+    python loadtest.py pipeline --inputs 20
+
+    # 분석 결과 렌더링 시간 비교 (렌더러 조각이 길이 제한을 넘으면 종료 코드 1)
+    python loadtest.py render --sizes 10000,100000,500000
+
+overload 의 --repeat 비율만큼은 이전 요청이 끝난 사용자가 같은 내용을 다시 보내
+유사 결과 재사용(이전 결과 보기를 고름)과 cached_only 단계의 메모 결과 응답도 확인합니다
+(메모와 유사 결과는 사용자별이므로 다른 사용자의 같은 내용은 새로 분석).
+과부하 기준값은 OVERLOAD_* 환경 변수 대신 --depth-levels, --latency-levels, --cooldown, --latency-max-age 로 지정합니다
+(실제 운영 값보다 짧은 시간 척도로 실험하도록).
+send 의 가짜 서버는 HTTP/1.1 만 지원하므로 HTTP/2 는 측정하지 않습니다.
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import subprocess
+from typing import Dict, List
+
+from replay import _REPLAY_ENV, fake_result, fake_telegram, percentile
+
+# 부하 테스트 중에는 요청 제한과 전송 속도 제한을 끄고 분석 수준만 과부하 제어로 조절
+_LOADTEST_ENV = {
+    **_REPLAY_ENV,
+    'PIPELINE_MODE': 'two_stage',
+    'STAGE_MEMO_SIZE': '512',
+    'DEDUP_ENABLED': 'true',
+    'ANALYSIS_RATE_PER_HOUR': '1000000',
+    'ANALYSIS_BURST': '1000000',
+    'COMMAND_RATE_PER_MINUTE': '1000000',
+    'COMMAND_BURST': '1000000',
+    'OUTBOUND_GLOBAL_RATE': '1000000',
+    'OUTBOUND_CHAT_RATE': '1000000',
+    'OUTBOUND_CHAT_BURST': '1000000',
+    'USER_DAILY_BUDGET_USD': '0',
+    'GLOBAL_DAILY_BUDGET_USD': '0',
+    'LOG_LEVEL': 'ERROR',
+}
+
+_SUMMARY = "# 발명의 명칭\n부하 테스트 발명 {}\n\n# 기술분야\n부하 테스트\n\n# 해결하려는 과제\n응답 시간\n"
+_ANALYSIS = (
+    "# 기술 분석\n부하 테스트 분석\n\n# 시장성\n보통\n\n# 특허 가능성\n보통\n\n# 개선 제안\n없음\n"
+)
+
+
+def form_text(index: int) -> str:
+    """사용자별로 내용이 다른 /submit 양식"""
+    from bot.form_parser import FIELD_LABELS
+
+    return '/submit\n' + '\n'.join(
+        f"{label}: 부하 테스트 {index}번 사용자의 {label} 설명 {index * 7919 % 1000}"
+        for label in FIELD_LABELS.values()
+    )
+
+
+async def load(rate: float, duration: float, base: float, knee: float, repeat: float,
+               timeout: float, seed: int) -> dict:
+    """요청을 보내고 사용자별 응답 시간과 과부하 단계 변화를 반환"""
+    import time
+    import types
+    import asyncio
+
+    from telegram import Update
+
+    import main
+    from bot.conversations import langchain_service, analysis_jobs
+    from services import tracing
+    from services.overload import overload, FULL, TIER_NAMES
+
+    class SlowModel:
+        """동시 호출 수에 비례해 느려지는 가짜 모델 클라이언트"""
+
+        def __init__(self):
+            self.in_flight = 0
+            self.peak = 0
+            self.calls = 0
+            self.messages = self
+
+        async def create(self, **kwargs):
+            self.calls += 1
+            call = self.calls
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                await asyncio.sleep(base * (1 + self.in_flight / knee))
+            finally:
+                self.in_flight -= 1
+            current = tracing.current_span()
+            stage = current.name if current is not None else ''
+            # 명세서 초안은 입력마다 다르게 (상세 분석 단계가 모두 같은 입력으로 메모되지 않도록)
+            text = _SUMMARY.format(call) if stage.endswith('summary') else _ANALYSIS
+            return types.SimpleNamespace(
+                content=[types.SimpleNamespace(type='text', text=text)],
+                stop_reason='end_turn',
+                usage=types.SimpleNamespace(input_tokens=1000, output_tokens=500)
+            )
+
+    # 요청별 시작 시각과 결과 (같은 사용자가 다시 보내면 채팅의 현재 요청이 바뀜)
+    requests: List[dict] = []
+    current: Dict[int, dict] = {}
+    update_ids = iter(range(1, 10 ** 9))
+
+    def message(chat_id: int, text: str, entities=None) -> Update:
+        return Update.de_json({
+            'update_id': next(update_ids),
+            'message': {
+                'message_id': 1,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': chat_id, 'is_bot': False, 'first_name': 'load'},
+                'text': text,
+                **({'entities': entities} if entities else {}),
+            },
+        }, application.bot)
+
+    def on_send(name: str, params: dict):
+        chat_id = int(params.get('chat_id') or 0)
+        outcome = current.get(chat_id)
+        if outcome is None or outcome.get('done'):
+            return
+        text = params.get('text') or ''
+        if text.startswith('♻️ 최근에 분석한'):
+            # 같은 사용자의 재제출: 이전 결과 보기를 고름
+            outcome['result'] = 'duplicate'
+            application.update_queue.put_nowait(message(chat_id, '♻️ 이전 결과 보기'))
+        elif text.startswith('🚦 지금 요청이 많아 새로 분석하지 않고'):
+            outcome['result'] = 'cached'
+        elif text.startswith('🚦 지금 요청이 많아 명세서 초안만'):
+            outcome['result'] = 'summary_only'
+        elif text.startswith('🚦 지금 분석 요청이 많아'):
+            outcome['result'] = 'rejected'
+        elif text.startswith('⚠️'):
+            outcome['result'] = 'error'
+        else:
+            if text != '분석이 완료되었습니다!':
+                return
+        if outcome['result'] in ('rejected', 'error') or text == '분석이 완료되었습니다!':
+            outcome['done'] = True
+            outcome['seconds'] = time.perf_counter() - outcome['started']
+
+    spans: List[dict] = []
+    tracing.setup_tracing(write=spans.extend)
+    model = SlowModel()
+    langchain_service.client = model
+    application = main.build_application(with_updater=False, request=fake_telegram(on_send=on_send))
+    await application.initialize()
+    await application.start()
+
+    # 과부하 단계 기록 (0.2초마다)
+    timeline: List[int] = []
+
+    async def sample():
+        while True:
+            timeline.append(overload.tier())
+            await asyncio.sleep(0.2)
+
+    sampler = asyncio.create_task(sample())
+
+    rng = random.Random(seed)
+    begin = time.perf_counter()
+    sent = 0
+    while True:
+        # 포아송 도착 (지수 분포 간격)
+        await asyncio.sleep(rng.expovariate(rate))
+        if time.perf_counter() - begin >= duration:
+            break
+        sent += 1
+        # 이전 요청이 끝난 사용자가 같은 내용을 다시 보내거나, 새 사용자가 보냄
+        finished = sorted(chat_id for chat_id, outcome in current.items() if outcome.get('done'))
+        chat_id = rng.choice(finished) if rng.random() < repeat and finished else 100000 + sent
+        current[chat_id] = {'result': 'full', 'started': time.perf_counter()}
+        requests.append(current[chat_id])
+        await application.update_queue.put(
+            message(chat_id, form_text(chat_id - 100000), [{'type': 'bot_command', 'offset': 0, 'length': 7}])
+        )
+
+    # 회복 단계: 모든 요청이 끝나고, 과부하 단계가 full 로 돌아올 때까지 기다림
+    stopped_at = time.perf_counter()
+    deadline = stopped_at + timeout
+    drained_at = recovered_at = None
+    while time.perf_counter() < deadline:
+        now = time.perf_counter()
+        if drained_at is None and all(outcome.get('done') for outcome in requests) and not analysis_jobs.active_count():
+            drained_at = now
+        if recovered_at is None and overload.tier() == FULL:
+            recovered_at = now
+        if drained_at is not None and (recovered_at is not None or not overload.enabled):
+            break
+        await asyncio.sleep(0.1)
+    wall_time = (drained_at or time.perf_counter()) - begin
+
+    sampler.cancel()
+    await application.stop()
+    await application.shutdown()
+    tracing.stop_tracing()
+
+    now = time.perf_counter()
+    results: Dict[str, int] = {}
+    seconds = []
+    answered = []
+    for outcome in requests:
+        result = outcome['result'] if outcome.get('done') else 'unfinished'
+        results[result] = results.get(result, 0) + 1
+        elapsed = outcome.get('seconds', now - outcome['started'])
+        seconds.append(elapsed)
+        if result not in ('rejected', 'error', 'unfinished'):
+            answered.append(elapsed)
+
+    def distribution(values: List[float]) -> dict:
+        if not values:
+            return {'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+        return {
+            'p50': round(percentile(values, 0.5), 2),
+            'p90': round(percentile(values, 0.9), 2),
+            'p99': round(percentile(values, 0.99), 2),
+            'max': round(max(values, default=0.0), 2),
+        }
+
+    return {
+        'overload_control': overload.enabled,
+        'rate': rate,
+        'duration': duration,
+        'requests': sent,
+        'results': results,
+        'seconds': distribution(seconds),
+        'answered_seconds': distribution(answered),
+        'model_calls': model.calls,
+        'model_peak_concurrency': model.peak,
+        'tier_time': {
+            name: round(timeline.count(tier) * 0.2, 1) for tier, name in enumerate(TIER_NAMES) if tier in timeline
+        },
+        'wall_time': round(wall_time, 1),
+        # 요청을 멈춘 뒤 밀린 분석이 모두 끝날 때까지 / 단계가 full 로 돌아올 때까지 (초, 제한 시간 안에 안 되면 None)
+        'recovery': {
+            'drained': round(drained_at - stopped_at, 1) if drained_at is not None else None,
+            'full': round(recovered_at - stopped_at, 1) if recovered_at is not None else None,
+        },
+    }
+
+
+def run_overload(args) -> dict:
+    """현재 프로세스에서 한 번 실행 (환경 변수를 먼저 설정하고 프로젝트 모듈을 불러옴)"""
+    import shutil
+    import asyncio
+    import tempfile
+
+    database_dir = tempfile.mkdtemp(prefix='loadtest-')
+    os.environ.update(_LOADTEST_ENV)
+    os.environ.update({
+        'SQLITE_PATH': os.path.join(database_dir, 'loadtest.db'),
+        'OVERLOAD_CONTROL': 'true' if args.overload else 'false',
+        'OVERLOAD_DEPTH_LEVELS': args.depth_levels,
+        'OVERLOAD_LATENCY_LEVELS': args.latency_levels,
+        'OVERLOAD_COOLDOWN': str(args.cooldown),
+        'OVERLOAD_LATENCY_WINDOW': str(args.latency_window),
+        'OVERLOAD_LATENCY_MAX_AGE': str(args.latency_max_age),
+    })
+    try:
+        return asyncio.run(load(args.rate, args.duration, args.base, args.knee, args.repeat, args.timeout, args.seed))
+    finally:
+        shutil.rmtree(database_dir, ignore_errors=True)
+
+
+def child_args(args, overload: bool) -> List[str]:
+    command = [
+        sys.executable, os.path.abspath(__file__), 'overload',
+        '--rate', str(args.rate), '--duration', str(args.duration),
+        '--base', str(args.base), '--knee', str(args.knee), '--repeat', str(args.repeat),
+        '--timeout', str(args.timeout), '--seed', str(args.seed),
+        '--depth-levels', args.depth_levels, '--latency-levels', args.latency_levels,
+        '--cooldown', str(args.cooldown), '--latency-window', str(args.latency_window),
+        '--latency-max-age', str(args.latency_max_age), '--json',
+    ]
+    return command + (['--overload'] if overload else [])
+
+
+def format_report(report: dict) -> str:
+    results = ', '.join(f"{name} {count}" for name, count in sorted(report['results'].items()))
+    tiers = ', '.join(f"{name} {seconds}s" for name, seconds in report['tier_time'].items())
+    recovery = report['recovery']
+
+    def seconds(value) -> str:
+        return '제한 시간 초과' if value is None else f"{value}s"
+
+    return '\n'.join([
+        f"과부하 제어: {'켜짐' if report['overload_control'] else '꺼짐'}",
+        f"  요청 {report['requests']}건 ({report['rate']}/s, {report['duration']}s): {results}",
+        f"  응답 시간 (전체): {_format_distribution(report['seconds'])}",
+        f"  응답 시간 (결과 전송): {_format_distribution(report['answered_seconds'])}",
+        f"  모델 호출 {report['model_calls']}회, 최대 동시 호출 {report['model_peak_concurrency']}",
+        f"  단계별 시간: {tiers or '-'}",
+        f"  회복 (요청을 멈춘 뒤): 밀린 분석 완료 {seconds(recovery['drained'])}, full 복귀 {seconds(recovery['full'])}",
+    ])
+
+
+def _format_distribution(values: dict) -> str:
+    return ' / '.join(f"{name} {value:.2f}s" for name, value in values.items())
+
+
+def overload_command(args):
+    if not args.compare:
+        report = run_overload(args)
+        print(json.dumps(report, ensure_ascii=False) if args.json else format_report(report))
+        bounded = report
+    else:
+        # 설정은 모듈을 불러올 때 읽으므로 경우마다 새 프로세스에서 실행
+        reports = []
+        for overload in (False, True):
+            output = subprocess.run(child_args(args, overload), check=True, capture_output=True, text=True).stdout
+            reports.append(json.loads(output.strip().splitlines()[-1]))
+        print('\n\n'.join(format_report(report) for report in reports))
+        bounded = reports[1]
+
+    if args.max_p99 and bounded['overload_control'] and bounded['seconds']['p99'] > args.max_p99:
+        print(f"\n응답 시간 p99 {bounded['seconds']['p99']:.2f}s 가 기준 {args.max_p99:.2f}s 를 넘었습니다.")
+        sys.exit(1)
+
+
+def serve_fake_bot_api(latency: float, ports):
+    """가짜 봇 API HTTP 서버 실행 (별도 프로세스, 받은 포트를 ports 큐로 전달)"""
+    import asyncio
+
+    from aiohttp import web
+
+    served = 0
+
+    async def handle(request: web.Request) -> web.Response:
+        nonlocal served
+        served += 1
+        if latency:
+            await asyncio.sleep(latency)
+        params = dict(await request.post())
+        return web.json_response({'ok': True, 'result': fake_result(request.match_info['method'], params, served)})
+
+    async def serve():
+        server = web.Application()
+        server.router.add_post('/bot{token}/{method}', handle)
+        runner = web.AppRunner(server, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0, backlog=1024).start()
+        ports.put(runner.addresses[0][1])
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def send(port: int, messages: int, senders: int, pool_size: int, keepalive: float,
+               pool_timeout: float) -> dict:
+    """가짜 봇 API 서버로 메시지를 보내고 전송 처리량과 요청 시간을 반환"""
+    import time
+    import asyncio
+
+    import httpx
+    from telegram import Bot
+    from telegram.error import TimedOut
+
+    from bot.request import PooledRequest
+
+    request = PooledRequest('loadtest', 'bot', pool_size=pool_size, keepalive=keepalive, pool_timeout=pool_timeout)
+    bot = Bot('123456789:loadtest', base_url=f'http://127.0.0.1:{port}/bot', request=request)
+    await bot.initialize()
+
+    remaining = messages
+    seconds: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def sender(index: int):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started_at = time.perf_counter()
+            try:
+                await bot.send_message(100000 + index, f"부하 테스트 메시지 {remaining}")
+                seconds.append(time.perf_counter() - started_at)
+            except TimedOut as e:
+                kind = 'pool_timeout' if isinstance(e.__cause__, httpx.PoolTimeout) else 'timeout'
+                errors[kind] = errors.get(kind, 0) + 1
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    begin = time.perf_counter()
+    await asyncio.gather(*(sender(index) for index in range(senders)))
+    wall_time = time.perf_counter() - begin
+    await bot.shutdown()
+
+    return {
+        'pool_size': pool_size,
+        'messages': messages,
+        'senders': senders,
+        'sent': len(seconds),
+        'errors': errors,
+        'wall_time': round(wall_time, 2),
+        'per_second': round(len(seconds) / wall_time, 1) if wall_time else 0.0,
+        'seconds': {
+            'p50': round(percentile(seconds, 0.5), 3) if seconds else 0.0,
+            'p99': round(percentile(seconds, 0.99), 3) if seconds else 0.0,
+        },
+        'peak_in_flight': request.peak_in_flight,
+    }
+
+
+def send_command(args):
+    import asyncio
+
+    import multiprocessing
+
+    os.environ.update(_LOADTEST_ENV)
+
+    # 가짜 서버는 별도 프로세스에서 실행 (서버 처리 시간이 전송 측 측정에 섞이지 않도록)
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_fake_bot_api, args=(args.latency, ports), daemon=True)
+    server.start()
+    try:
+        port = ports.get(timeout=30)
+        reports = [
+            asyncio.run(send(port, args.messages, args.senders, int(size), args.keepalive, args.pool_timeout))
+            for size in args.pool_sizes.split(',')
+        ]
+    finally:
+        server.terminate()
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False))
+        return
+    print(f"메시지 {args.messages}건, 동시 전송 {args.senders}개, 가짜 서버 응답 지연 {args.latency * 1000:.0f}ms")
+    for report in reports:
+        errors = ', '.join(f"{name} {count}" for name, count in report['errors'].items()) or '없음'
+        print(
+            f"  풀 {report['pool_size']:>4}: 초당 {report['per_second']:>7.1f}건, "
+            f"요청 시간 p50 {report['seconds']['p50'] * 1000:.0f}ms / p99 {report['seconds']['p99'] * 1000:.0f}ms, "
+            f"실패 {errors}"
+        )
+
+
+def report_content(index: int, summary_tokens: int, analysis_tokens: int, chars_per_token: float) -> dict:
+    """모델이 쓸 보고서 내용 (REPORT_TOOL 입력 형식, 두 단계 방식은 같은 내용을 마크다운으로 씀)"""
+    from services.langchain_service import ANALYSIS_SECTIONS
+
+    headings = ['발명의 명칭', '기술 분야', '배경 기술', '해결 과제', '과제 해결 수단', '발명의 효과']
+    # 입력마다 분량이 다르게 (같은 입력은 두 방식에서 같은 분량)
+    scale = random.Random(index).uniform(0.6, 1.4)
+    summary_tokens, analysis_tokens = int(summary_tokens * scale), int(analysis_tokens * scale)
+    summary_line = int(summary_tokens * chars_per_token / (len(headings) * 3))
+    analysis_line = int(analysis_tokens * chars_per_token / (len(ANALYSIS_SECTIONS) * 4))
+
+    def text(length: int, label: str) -> str:
+        return (f"{index}번 입력의 {label} " * max(1, length // (len(label) + 8)))[:length].strip()
+
+    return {
+        'summary': [
+            {'heading': heading, 'lines': [f"- 항목 {line}: {text(summary_line, heading)}" for line in range(3)]}
+            for heading in headings
+        ],
+        **{
+            key: [{'label': f"{title} {item}", 'content': text(analysis_line, title)} for item in range(4)]
+            for key, title in ANALYSIS_SECTIONS
+        },
+    }
+
+
+async def compare_pipelines(inputs: int, summary_tokens: int, analysis_tokens: int, chars_per_token: float,
+                            tool_overhead: int, first_token: float, tokens_per_second: float,
+                            speed: float) -> Dict[str, dict]:
+    """같은 입력을 두 분석 방식으로 분석하고 방식별 분석 시간과 토큰 수 반환"""
+    import time
+    import types
+    import asyncio
+
+    import config
+    from bot.form_parser import FIELD_LABELS
+    from services import tracing
+    from services.langchain_service import LangChainService, ANALYSIS_SECTIONS, REPORT_TOOL, TWO_STAGE, SINGLE
+
+    def tokens(value) -> int:
+        # 영문/기호(JSON 키, 마크다운 기호)는 토큰당 약 4글자, 한국어는 chars_per_token 글자
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        ascii_chars = sum(1 for char in text if char.isascii())
+        return max(1, int(ascii_chars / 4 + (len(text) - ascii_chars) / chars_per_token))
+
+    class TokenModel:
+        """요청/응답 글자 수로 토큰을 세고 출력 토큰 수에 비례해 기다리는 가짜 모델 클라이언트"""
+
+        def __init__(self):
+            self.calls = 0
+            self.messages = self
+
+        async def create(self, **kwargs):
+            self.calls += 1
+            index = int(kwargs['messages'][0]['content'].split('번 입력', 1)[0].rsplit(' ', 1)[-1])
+            content = report_content(index, summary_tokens, analysis_tokens, chars_per_token)
+            stage = tracing.current_span().name
+
+            input_tokens = tokens(kwargs.get('system', '')) + tokens(kwargs['messages'])
+            if stage == 'model.report':
+                input_tokens += tokens(kwargs['tools']) + tool_overhead
+                block = types.SimpleNamespace(type='tool_use', name=REPORT_TOOL['name'], input=content)
+                output_tokens = tokens(content)
+            else:
+                if stage == 'model.summary':
+                    text = '\n\n'.join(
+                        '\n'.join([f"# {section['heading']}"] + section['lines']) for section in content['summary']
+                    )
+                else:
+                    text = '\n\n'.join(
+                        '\n'.join([f"# {title}"] + [f"- {item['label']}: {item['content']}" for item in content[key]])
+                        for key, title in ANALYSIS_SECTIONS
+                    )
+                block = types.SimpleNamespace(type='text', text=text)
+                output_tokens = tokens(text)
+
+            await asyncio.sleep((first_token + output_tokens / tokens_per_second) / speed)
+            return types.SimpleNamespace(
+                content=[block],
+                stop_reason='tool_use' if block.type == 'tool_use' else 'end_turn',
+                usage=types.SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens)
+            )
+
+    tracing.setup_tracing(write=lambda spans: None)
+    forms = [
+        {key: f"비교 {index}번 입력의 {label}: 분석 방식 비교용 설명" for key, label in FIELD_LABELS.items()}
+        for index in range(1, inputs + 1)
+    ]
+
+    reports = {}
+    for mode in (TWO_STAGE, SINGLE):
+        # 방식마다 새 서비스 (단계 결과 메모를 함께 쓰지 않도록)
+        service = LangChainService()
+        service.pipeline_mode = mode
+        model = TokenModel()
+        service.client = model
+        usage = {'input': 0, 'output': 0}
+
+        def on_usage(name, response_usage):
+            usage['input'] += response_usage.input_tokens
+            usage['output'] += response_usage.output_tokens
+
+        async def analyze(data):
+            started_at = time.perf_counter()
+            result = await service.analyze_startup(data, on_usage=on_usage)
+            return (time.perf_counter() - started_at) * speed, result is not None
+
+        done = await asyncio.gather(*(analyze(data) for data in forms))
+        seconds = [elapsed for elapsed, ok in done if ok]
+        cost = (usage['input'] * config.MODEL_INPUT_PRICE + usage['output'] * config.MODEL_OUTPUT_PRICE) / 1_000_000
+        reports[mode] = {
+            'analyses': len(seconds),
+            'failed': len(done) - len(seconds),
+            'model_calls': model.calls,
+            'seconds': {
+                'p50': round(percentile(seconds, 0.5), 2) if seconds else 0.0,
+                'p90': round(percentile(seconds, 0.9), 2) if seconds else 0.0,
+            },
+            'input_tokens': round(usage['input'] / max(1, len(done))),
+            'output_tokens': round(usage['output'] / max(1, len(done))),
+            'cost_usd': round(cost / max(1, len(done)), 5),
+        }
+
+    tracing.stop_tracing()
+    return reports
+
+
+def pipeline_command(args):
+    import asyncio
+
+    os.environ.update(_LOADTEST_ENV)
+    reports = asyncio.run(compare_pipelines(
+        args.inputs, args.summary_tokens, args.analysis_tokens, args.chars_per_token, args.tool_overhead,
+        args.first_token, args.tokens_per_second, args.speed
+    ))
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False))
+        return
+    print(
+        f"입력 {args.inputs}개, 초안 약 {args.summary_tokens} / 상세 분석 약 {args.analysis_tokens} 토큰, "
+        f"첫 토큰 {args.first_token:g}s, 초당 출력 {args.tokens_per_second:g} 토큰"
+    )
+    for mode, report in reports.items():
+        print(
+            f"  {mode:<9}: 분석 시간 p50 {report['seconds']['p50']:.2f}s / p90 {report['seconds']['p90']:.2f}s, "
+            f"호출 {report['model_calls']}회, 분석당 토큰 입력 {report['input_tokens']} / 출력 {report['output_tokens']}, "
+            f"분석당 비용 ${report['cost_usd']:.5f}"
+            + (f", 실패 {report['failed']}" if report['failed'] else '')
+        )
+
+
+def synthetic_result(size: int, seed: int, escape_heavy: bool = False) -> dict:
+    """
+    약 size 글자의 합성 분석 결과 (모델 출력 형식: 요약은 여러 줄 텍스트, 나머지는 항목 목록)
+
+    escape_heavy 이면 이스케이프할 문자만으로 된 긴 줄을 섞음
+    """
+    from bot.renderer import SECTIONS
+
+    rng = random.Random(seed)
+    words = ['배터리', '음극재', '실리콘', '(나노)', '구조', '1.5배', '용량', 'A-B', '**핵심**', '효율', '3.2%', '개선']
+    per_section = max(1, size // len(SECTIONS))
+
+    def line(length: int) -> str:
+        if escape_heavy and rng.random() < 0.3:
+            return ''.join(rng.choice('&<>._*[]()!') for _ in range(length))
+        return ' '.join(rng.choice(words) for _ in range(max(1, length // 5)))
+
+    result = {}
+    for key, _ in SECTIONS:
+        lines = []
+        written = 0
+        while written < per_section:
+            if rng.random() < 0.15:
+                lines.append('# ' + line(rng.randint(5, 40)) + ':')
+            else:
+                # 가끔 한 줄이 메시지 길이 제한보다 긴 경우
+                length = rng.randint(6000, 9000) if rng.random() < 0.02 else rng.randint(40, 400)
+                lines.append('- ' + line(length))
+            written += len(lines[-1])
+        result[key] = '\n'.join(lines) if key == 'summary' else lines
+    return result
+
+
+def render_command(args):
+    import time
+
+    from telegram.constants import ParseMode
+
+    from bot.messages import ElonStyleMessageFormatter
+    from bot.outbound import split_message
+    from bot.renderer import AnalysisRenderer, MAX_MESSAGE_LENGTH
+
+    def timed(render) -> tuple:
+        # 같은 결과를 여러 번 렌더링한 시간의 p50 (밀리초)
+        seconds = []
+        for _ in range(args.iterations):
+            started_at = time.perf_counter()
+            chunks = render()
+            seconds.append(time.perf_counter() - started_at)
+        return chunks, round(percentile(seconds, 0.5) * 1000, 3)
+
+    def formatter(result):
+        # 기존 방식: 일반 텍스트로 만든 뒤 전송할 때 길이 제한으로 분할
+        return split_message(ElonStyleMessageFormatter.format_analysis_result(result))
+
+    failed = []
+    reports = []
+    for size in (int(value) for value in args.sizes.split(',')):
+        for escape_heavy in (False, True):
+            result = synthetic_result(size, args.seed, escape_heavy)
+            cases = [('formatter', False, lambda: formatter(result))]
+            for parse_mode in (ParseMode.HTML, ParseMode.MARKDOWN_V2, None):
+                for compact in (False, True):
+                    renderer = AnalysisRenderer(parse_mode, compact)
+                    cases.append((parse_mode or 'plain', compact, lambda renderer=renderer: renderer.render(result)))
+
+            for name, compact, render in cases:
+                chunks, milliseconds = timed(render)
+                report = {
+                    'size': size,
+                    'escape_heavy': escape_heavy,
+                    'parse_mode': name,
+                    'compact': compact,
+                    'chunks': len(chunks),
+                    'longest': max(map(len, chunks)),
+                    'p50_ms': milliseconds,
+                }
+                reports.append(report)
+                if name != 'formatter' and report['longest'] > MAX_MESSAGE_LENGTH:
+                    failed.append(report)
+
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False))
+    else:
+        print(f"렌더링 {args.iterations}회 p50 (formatter: 기존 format_analysis_result + split_message, 일반 텍스트)")
+        for report in reports:
+            print(
+                f"  {report['size']:>7}자{' (특수문자)' if report['escape_heavy'] else '':<7} "
+                f"{report['parse_mode']:<10}{' compact' if report['compact'] else '':<8}: "
+                f"{report['p50_ms']:>8.3f}ms, 조각 {report['chunks']:>3}개, 최대 {report['longest']}자"
+            )
+    if failed:
+        print(f"메시지 길이 제한({MAX_MESSAGE_LENGTH}자)을 넘는 조각이 있습니다: {len(failed)}건", file=sys.stderr)
+        sys.exit(1)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='부하 테스트')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load_test = commands.add_parser('overload', help='분석 요청을 몰아넣고 과부하 제어 시험')
+    load_test.add_argument('--rate', type=float, default=8, help='초당 분석 요청 수 (평균)')
+    load_test.add_argument('--duration', type=float, default=30, help='요청을 보내는 시간 (초)')
+    load_test.add_argument('--base', type=float, default=0.5, help='부하가 없을 때 모델 호출 한 번의 시간 (초)')
+    load_test.add_argument('--knee', type=float, default=4, help='모델 응답 시간이 두 배가 되는 동시 호출 수')
+    load_test.add_argument('--repeat', type=float, default=0.2, help='이전 요청이 끝난 사용자가 같은 내용을 다시 보내는 비율')
+    load_test.add_argument('--timeout', type=float, default=600, help='요청을 다 보낸 뒤 밀린 분석 완료와 full 복귀를 기다리는 최대 시간 (초)')
+    load_test.add_argument('--seed', type=int, default=1, help='도착 간격 난수 시드')
+    load_test.add_argument('--depth-levels', default='8,16,24', help='과부하 단계별 진행 중인 분석 수 기준')
+    load_test.add_argument('--latency-levels', default='5,10,15', help='과부하 단계별 분석 시간 p90 기준 (초)')
+    load_test.add_argument('--cooldown', type=float, default=3, help='과부하 단계를 한 단계 내리기 전 대기 시간 (초)')
+    load_test.add_argument('--latency-window', type=int, default=20, help='분석 시간 p90 계산 건수')
+    load_test.add_argument('--latency-max-age', type=float, default=20, help='분석 시간 p90 에 넣는 기록의 최대 나이 (초)')
+    load_test.add_argument('--overload', action='store_true', help='과부하 제어 켜기')
+    load_test.add_argument('--compare', action='store_true', help='과부하 제어를 끄고/켜고 차례로 실행해서 비교')
+    load_test.add_argument('--max-p99', type=float, default=0, help='과부하 제어를 켰을 때 허용할 응답 시간 p99 (초, 넘으면 종료 코드 1)')
+    load_test.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+    load_test.set_defaults(handler=overload_command)
+
+    throughput = commands.add_parser('send', help='연결 풀 크기별 메시지 전송 처리량 측정')
+    throughput.add_argument('--messages', type=int, default=2000, help='보낼 메시지 수')
+    throughput.add_argument('--senders', type=int, default=64, help='동시에 보내는 작업 수')
+    throughput.add_argument('--pool-sizes', default='1,8,32,256', help='비교할 연결 풀 크기 (쉼표로 구분)')
+    throughput.add_argument('--keepalive', type=float, default=30, help='유휴 연결 유지 시간 (초)')
+    throughput.add_argument('--pool-timeout', type=float, default=5, help='빈 연결을 기다리는 최대 시간 (초)')
+    throughput.add_argument('--latency', type=float, default=0.05, help='가짜 서버 응답 지연 (초)')
+    throughput.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+    throughput.set_defaults(handler=send_command)
+
+    modes = commands.add_parser('pipeline', help='같은 입력으로 두 분석 방식의 분석 시간과 토큰 비교')
+    modes.add_argument('--inputs', type=int, default=20, help='분석할 입력 수')
+    modes.add_argument('--summary-tokens', type=int, default=700, help='명세서 초안 출력 토큰 수 (대략)')
+    modes.add_argument('--analysis-tokens', type=int, default=1200, help='상세 분석 출력 토큰 수 (대략)')
+    modes.add_argument('--chars-per-token', type=float, default=1.5, help='한국어 토큰당 글자 수 (추정)')
+    modes.add_argument('--tool-overhead', type=int, default=300, help='도구 사용 시 모델 제공자가 더하는 시스템 프롬프트 토큰 수 (모델마다 다름)')
+    modes.add_argument('--first-token', type=float, default=0.6, help='모델 호출마다 첫 토큰까지의 시간 (초)')
+    modes.add_argument('--tokens-per-second', type=float, default=120, help='초당 출력 토큰 수')
+    modes.add_argument('--speed', type=float, default=10, help='기다리는 시간 배속 (보고하는 시간은 원래 척도)')
+    modes.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+    modes.set_defaults(handler=pipeline_command)
+
+    rendering = commands.add_parser('render', help='큰 분석 결과의 렌더링 시간을 기존 포맷터와 비교하고 메시지 조각 길이 확인')
+    rendering.add_argument('--sizes', default='10000,100000', help='합성 분석 결과 크기 (글자 수, 쉼표로 구분)')
+    rendering.add_argument('--iterations', type=int, default=50, help='결과마다 렌더링을 반복할 횟수')
+    rendering.add_argument('--seed', type=int, default=1, help='합성 결과 난수 시드')
+    rendering.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+    rendering.set_defaults(handler=render_command)
+
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    arguments.handler(arguments)
@@ -0,0 +1,218 @@
+"""
+로깅 설정
+
+모든 모듈은 logging.getLogger(__name__) 으로 로그를 남기고,
+실제 출력은 이 모듈의 설정을 따릅니다.
+
+특징:
+1. 큐 기반 비동기 출력: 이벤트 루프에서는 큐에 넣기만 하고, 별도 스레드가 stdout 에 기록
+2. JSON 한 줄 형식 (LOG_FORMAT=text 이면 사람이 읽기 쉬운 형식)
+3. 모듈별 로그 레벨 (LOG_LEVELS="bot.outbound=WARNING,httpx=WARNING")
+4. DEBUG 로그 샘플링 (LOG_DEBUG_SAMPLE_RATE 비율만 기록)
+5. 비밀 값 가리기 (봇 토큰, API 키, DB 비밀번호, 웹훅 비밀 토큰)
+6. 추적 구간 안에서 남긴 로그에 trace_id 추가
+
+extra 로 넘긴 값은 JSON 의 필드로 그대로 기록됩니다.
+    logger.info("분석 완료", extra={'user_id': user_id, 'elapsed': 12.3})
+"""
+
+import re
+import sys
+import json
+import atexit
+import queue
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+import config
+from services.tracing import current_trace_id
+
+# 가리는 값 표시
+REDACTED = '***'
+
+# 설정값과 관계없이 항상 가리는 형식 (봇 토큰, Anthropic API 키, URL 안의 비밀번호)
+_SECRET_PATTERNS = (
+    re.compile(r'\b\d{6,12}:[A-Za-z0-9_-]{30,}\b'),
+    re.compile(r'sk-ant-[A-Za-z0-9_-]{10,}'),
+    re.compile(r'(?<=://)([^:/@\s]+):([^@\s]+)(?=@)'),
+)
+
+# LogRecord 기본 속성 (이외의 속성은 extra 로 넘긴 값)
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class Redactor:
+    """로그 문자열에서 비밀 값 가리기"""
+
+    def __init__(self, secrets: Iterable[Optional[str]] = ()):
+        # 짧은 값은 일반 단어와 겹칠 수 있으므로 제외
+        self.secrets = sorted({secret for secret in secrets if secret and len(secret) >= 8}, key=len, reverse=True)
+
+    def __call__(self, text: str) -> str:
+        for secret in self.secrets:
+            if secret in text:
+                text = text.replace(secret, REDACTED)
+        for pattern in _SECRET_PATTERNS:
+            text = pattern.sub(self._mask, text)
+        return text
+
+    @staticmethod
+    def _mask(match: re.Match) -> str:
+        if match.re is _SECRET_PATTERNS[2]:
+            return f"{match.group(1)}:{REDACTED}"
+        return REDACTED
+
+
+class DebugSampler(logging.Filter):
+    """DEBUG 로그를 rate 비율만 통과시킴 (INFO 이상은 모두 통과)"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class TraceContext(logging.Filter):
+    """현재 추적 구간의 trace_id 를 로그에 추가 (호출한 컨텍스트에서 실행)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace_id = current_trace_id()
+        if trace_id is not None and not hasattr(record, 'trace_id'):
+            record.trace_id = trace_id
+        return True
+
+
+class RedactingQueueHandler(logging.handlers.QueueHandler):
+    """
+    큐 핸들러
+
+    호출한 스레드(이벤트 루프)에서는 메시지 조합과 비밀 값 가리기만 하고 큐에 넣습니다.
+    큐가 가득 차면 기다리지 않고 해당 로그를 버립니다.
+    """
+
+    def __init__(self, log_queue: queue.Queue, redactor: Redactor):
+        super().__init__(log_queue)
+        self.redactor = redactor
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = self.redactor(record.getMessage())
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.redactor(logging.Formatter().formatException(record.exc_info))
+            record.exc_info = None
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and isinstance(value, str):
+                setattr(record, key, self.redactor(value))
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON 한 줄 형식"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """사람이 읽기 쉬운 형식 (extra 값은 key=value 로 뒤에 붙임)"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        extras = ' '.join(f"{key}={value}" for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        return f"{text} {extras}" if extras else text
+
+
+def parse_levels(spec: Optional[str]) -> Dict[str, int]:
+    """'모듈=레벨,모듈=레벨' 형식의 설정 해석"""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        name, level = item.split('=', 1)
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    levels: Optional[str] = None,
+    fmt: Optional[str] = None,
+    debug_sample_rate: Optional[float] = None
+):
+    """
+    로깅 설정 (프로세스마다 한 번 호출)
+
+    설정값을 넘기지 않으면 config 의 LOG_* 값을 사용합니다.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = level or config.LOG_LEVEL
+    levels = config.LOG_LEVELS if levels is None else levels
+    fmt = fmt or config.LOG_FORMAT
+    debug_sample_rate = config.LOG_DEBUG_SAMPLE_RATE if debug_sample_rate is None else debug_sample_rate
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=10000)
+    redactor = Redactor((
+        config.TELEGRAM_TOKEN,
+        config.ANTHROPIC_API_KEY,
+        config.DATABASE_URL,
+        config.WEBHOOK_SECRET,
+        config.RECORD_SALT,
+    ))
+    handler = RedactingQueueHandler(log_queue, redactor)
+    handler.addFilter(DebugSampler(debug_sample_rate))
+    handler.addFilter(TraceContext())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(logging.getLevelName(level.upper()))
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """큐에 남은 로그를 모두 기록하고 출력 스레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,34 +1,413 @@
-import os
+import signal
+import asyncio
+import secrets
 import logging
+from typing import List, Optional
 from telegram import Update
-from telegram.ext import Application
+from telegram.ext import Application, TypeHandler
+from telegram.request import BaseRequest
 from dotenv import load_dotenv
-from bot.conversations import analysis_conversation
+import config
+from logging_config import setup_logging
+from bot.conversations import (
+    command_throttle_handler,
+    setup_tenant,
+    throttle_stats,
+    drain_analyses,
+    resume_pending_analyses,
+    langchain_service,
+    menu_texts
+)
+from bot.update_processor import PerChatUpdateProcessor
+from bot.http_server import HttpServer
+from bot.assets import assets
+from bot.persistence import DatabasePersistence, USER_DATA_KIND
+from bot.sharding import ShardRouter, poll_updates
+from bot.admin import admin_handlers
+from bot.recorder import Anonymizer, TrafficRecorder
+from bot.form_parser import label_words
+from bot.tenants import Tenant, configured_tenants, default_tenant, use_tenant
+from bot.request import bot_request, updates_request, request_stats
+from services.admission import admission
+from services.overload import overload
+from services.metrics import REGISTRY, record_error
+from services.tracing import setup_tracing, exporter_stats
+from services.usage import usage_ledger
+from services.loop_monitor import create_loop_monitor
+from services.langchain_service import FORM_FIELDS
 
 # 환경 변수 로드
 load_dotenv()
 
-# 로깅 설정
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# 로깅, 추적 설정 (작업 프로세스도 이 모듈을 불러오면서 같은 설정 사용)
+setup_logging()
+setup_tracing()
+
+logger = logging.getLogger(__name__)
+
+# 이 프로세스에서 실행 중인 봇 (지표와 상태 확인을 봇별로 나눠 기록)
+running_tenants: List[Tenant] = []
+
+async def post_init(application: Application):
+    """
+    봇 시작 직후 실행 (HTTP 서버 시작, 루프 감시/사용량 기록/세션 정리 시작, 정적 자산 file_id 준비, 중단된 분석 재개)
+
+    HTTP 서버, 루프 감시, 사용량 기록은 프로세스에 하나씩이므로 첫 번째 봇에서만 시작합니다.
+    """
+    tenant = application.bot_data['tenant']
+    http_server = application.bot_data.get('http_server')
+    if http_server:
+        await http_server.start()
+    loop_monitor = application.bot_data.get('loop_monitor')
+    if loop_monitor:
+        await loop_monitor.start()
+    background_tasks = [asyncio.create_task(tenant.session_reaper.run(application), name=f"session-reaper-{tenant.name}")]
+    if http_server:
+        background_tasks.append(asyncio.create_task(usage_ledger.run(), name="usage-flusher"))
+    application.bot_data['background_tasks'] = background_tasks
+    await assets.warm(application.bot, config.ASSET_CACHE_CHAT_ID, names=[tenant.kind('welcome')])
+    with use_tenant(tenant):
+        await resume_pending_analyses(application)
+
+async def post_stop(application: Application):
+    """봇 종료 직전 실행 (진행 중인 분석 마무리, 끝나지 않은 분석 저장, 백그라운드 작업 종료 - 남은 사용량 기록)"""
+    with use_tenant(application.bot_data['tenant']):
+        await drain_analyses(application)
+    background_tasks = application.bot_data.pop('background_tasks', [])
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+async def post_shutdown(application: Application):
+    """봇 종료 후 실행 (HTTP 서버, 루프 감시 종료)"""
+    http_server = application.bot_data.get('http_server')
+    if http_server:
+        await http_server.stop()
+    loop_monitor = application.bot_data.get('loop_monitor')
+    if loop_monitor:
+        await loop_monitor.stop()
+
+async def handle_error(update: object, context):
+    """핸들러에서 처리되지 않은 예외 기록"""
+    record_error('handler', context.error)
+    logger.error("업데이트 처리 중 오류 발생: %r", context.error, exc_info=context.error)
+
+def tenant_gauge(name: str, documentation: str, value):
+    """실행 중인 봇별 값을 tenant 레이블로 나눠 기록하는 게이지"""
+    REGISTRY.gauge(
+        name, documentation, ['tenant'],
+        callback=lambda: {(tenant.name,): value(tenant) for tenant in running_tenants}
+    )
+
+def tenant_stats() -> dict:
+    """봇별 상태 (업데이트 처리, 세션, 분석)"""
+    return {
+        tenant.name: {
+            'update_queue': tenant.application.update_queue.qsize(),
+            'updates': tenant.application.update_processor.stats(),
+            'sessions': tenant.session_reaper.stats(),
+            'analyses_in_flight': tenant.jobs.active_count(),
+        }
+        for tenant in running_tenants
+    }
+
+def create_http_server() -> HttpServer:
+    """
+    상태 확인(/health)과 지표(/metrics)를 제공하는 HTTP 서버 생성 (프로세스에 하나, 모든 봇이 함께 사용)
+
+    웹훅 모드에서는 같은 서버에 웹훅 경로가 추가됩니다.
+    """
+    server = HttpServer(port=config.PORT)
+    server.add_health_check('mode', lambda: 'polling')
+    server.add_health_check('tenants', tenant_stats)
+    server.add_health_check('admission', admission.stats)
+    server.add_health_check('overload', overload.stats)
+    server.add_health_check('telegram_requests', request_stats)
+    server.add_health_check('throttle', throttle_stats)
+    server.add_health_check('tracing', exporter_stats)
+    server.enable_metrics(REGISTRY.render)
+
+    tenant_gauge('bot_analyses_in_flight', '진행 중인 분석 수', lambda tenant: tenant.jobs.active_count())
+    tenant_gauge(
+        'bot_update_queue_depth', '처리 대기 중인 업데이트 수 (수신 큐)',
+        lambda tenant: tenant.application.update_queue.qsize()
+    )
+    tenant_gauge(
+        'bot_updates_in_flight', '처리 중인 업데이트 수',
+        lambda tenant: tenant.application.update_processor.in_flight
+    )
+    tenant_gauge(
+        'bot_updates_waiting', '같은 채팅의 순서를 기다리는 업데이트 수',
+        lambda tenant: tenant.application.update_processor.stats()['queued']
+    )
+    tenant_gauge('bot_sessions_live', '메모리에 있는 사용자 세션 수', lambda tenant: len(tenant.application.user_data))
+    tenant_gauge(
+        'bot_sessions_active_conversations', '작성 중인 대화 수',
+        lambda tenant: tenant.session_reaper.active_conversations
+    )
+    tenant_gauge(
+        'bot_session_bytes', '사용자 세션 크기 합계 추정 (바이트, 마지막 정리 시점)',
+        lambda tenant: tenant.session_reaper.bytes_held
+    )
+    return server
+
+def webhook_secret():
+    """웹훅 요청 검증용 비밀 토큰"""
+    secret_token = config.WEBHOOK_SECRET
+    if not secret_token and config.WEBHOOK_URL:
+        # 웹훅을 직접 등록하는 경우 비밀 토큰을 자동 생성
+        secret_token = secrets.token_urlsafe(32)
+    if not secret_token:
+        logger.warning("WEBHOOK_SECRET 이 없어 웹훅 요청을 검증하지 않습니다.")
+    return secret_token
+
+def webhook_path(tenant: Tenant) -> str:
+    """봇의 웹훅 수신 경로 (기본 봇은 WEBHOOK_PATH, 다른 봇은 WEBHOOK_PATH/<봇 이름>)"""
+    if tenant.is_default:
+        return config.WEBHOOK_PATH
+    return f"{config.WEBHOOK_PATH.rstrip('/')}/{tenant.name}"
+
+async def register_webhook(bot, secret_token, path: str = config.WEBHOOK_PATH):
+    """WEBHOOK_URL 이 있으면 텔레그램에 웹훅 주소 등록"""
+    if config.WEBHOOK_URL:
+        webhook_url = config.WEBHOOK_URL.rstrip('/') + path
+        await bot.set_webhook(
+            url=webhook_url,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES
+        )
+        logger.info("웹훅이 등록되었습니다: %s", webhook_url)
+
+def stop_event_on_signals() -> asyncio.Event:
+    """종료 신호(SIGINT, SIGTERM)를 받으면 설정되는 이벤트"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    return stop_event
+
+async def run_applications(applications: List[Application]):
+    """
+    봇 실행 (웹훅 모드, 또는 여러 봇을 한 프로세스에서 실행할 때)
+
+    모든 봇을 같은 이벤트 루프에서 실행하며 모델 클라이언트, 데이터베이스 연결,
+    분석 실행 순서, HTTP 서버를 함께 사용합니다.
+    - 폴링 모드: 봇마다 업데이트를 따로 받음
+    - 웹훅 모드: config.PORT 의 HTTP 서버에서 봇별 경로(webhook_path)로 받고,
+      WEBHOOK_URL 이 있으면 텔레그램에 봇별 웹훅 주소를 등록
+    """
+    webhook = config.BOT_MODE == 'webhook'
+    secret_token = webhook_secret() if webhook else None
+
+    # 상태 확인/지표 서버 (첫 번째 봇의 post_init 에서 시작)
+    server = applications[0].bot_data['http_server']
+    server.add_health_check('mode', lambda: config.BOT_MODE)
+    if webhook:
+        for application in applications:
+            async def enqueue_update(data: dict, application=application):
+                await application.update_queue.put(Update.de_json(data, application.bot))
+
+            # 서버 시작 전에 봇별 웹훅 경로 추가
+            server.enable_webhook(webhook_path(application.bot_data['tenant']), enqueue_update, secret_token)
+
+    # 종료 신호 처리
+    stop_event = stop_event_on_signals()
+
+    started = []
+    try:
+        for application in applications:
+            await application.initialize()
+            started.append(application)
+            if application.post_init:
+                await application.post_init(application)
+            await application.start()
+            if webhook:
+                await register_webhook(application.bot, secret_token, webhook_path(application.bot_data['tenant']))
+            else:
+                await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+
+        logger.info(
+            "봇 %d개가 %s 모드로 시작되었습니다. Ctrl+C를 눌러 종료할 수 있습니다.",
+            len(applications), config.BOT_MODE,
+            extra={'tenants': [application.bot_data['tenant'].name for application in applications]}
+        )
+        await stop_event.wait()
+    finally:
+        # HTTP 서버를 가진 첫 번째 봇이 마지막에 종료되도록 역순으로 종료
+        for application in reversed(started):
+            if application.updater and application.updater.running:
+                await application.updater.stop()
+            if application.running:
+                await application.stop()
+                if application.post_stop:
+                    await application.post_stop(application)
+            await application.shutdown()
+            if application.post_shutdown:
+                await application.post_shutdown(application)
+
+async def run_sharded(application: Application):
+    """
+    작업 프로세스 분산 모드 실행
+
+    이 프로세스는 업데이트 수신(폴링 또는 웹훅)과 분배만 맡고,
+    대화 처리는 WORKER_PROCESSES 개의 작업 프로세스가 chat_id 별로 나눠서 합니다.
+    """
+    router = ShardRouter(config.WORKER_PROCESSES, build_application)
+    router.start()
+    supervisor = asyncio.create_task(router.supervise())
+    stop_event = stop_event_on_signals()
+
+    server = HttpServer(port=config.PORT)
+    server.add_health_check('mode', lambda: f'sharded-{config.BOT_MODE}')
+    server.add_health_check('sharding', router.stats)
+    server.add_health_check('telegram_requests', request_stats)
+    server.enable_metrics(REGISTRY.render)
+    REGISTRY.gauge(
+        'bot_shard_routed_updates', '작업 프로세스별 전달한 업데이트 수', ['worker'],
+        callback=lambda: {(str(index),): count for index, count in enumerate(router.routed)}
+    )
+    REGISTRY.gauge('bot_shard_restarts', '작업 프로세스 재시작 횟수', callback=lambda: router.restarts)
+
+    bot = application.bot
+    await bot.initialize()
+    poller = None
+    try:
+        if config.BOT_MODE == 'webhook':
+            secret_token = webhook_secret()
+
+            async def route_update(data: dict):
+                router.route(data)
+
+            server.enable_webhook(config.WEBHOOK_PATH, route_update, secret_token)
+            await server.start()
+            await register_webhook(bot, secret_token)
+        else:
+            await server.start()
+            poller = asyncio.create_task(poll_updates(bot, router.route, stop_event))
+
+        logger.info("봇이 작업 프로세스 %d개로 시작되었습니다. Ctrl+C를 눌러 종료할 수 있습니다.", config.WORKER_PROCESSES)
+        await stop_event.wait()
+    finally:
+        if poller is not None:
+            poller.cancel()
+            await asyncio.gather(poller, return_exceptions=True)
+        await server.stop()
+        supervisor.cancel()
+        # 작업 프로세스는 큐에 남은 업데이트를 처리한 뒤 종료
+        await asyncio.to_thread(router.stop)
+        await bot.shutdown()
+
+def create_recorder() -> Optional[TrafficRecorder]:
+    """RECORD_FILE 이 있으면 업데이트/모델 응답 기록기 생성"""
+    if not config.RECORD_FILE:
+        return None
+    anonymizer = Anonymizer(
+        keep_texts=menu_texts(),
+        keep_words=label_words(FORM_FIELDS) + ['txt', 'md'],
+        salt=config.RECORD_SALT.encode() if config.RECORD_SALT else None
+    )
+    return TrafficRecorder(config.RECORD_FILE, anonymizer)
+
+def build_application(
+    with_updater: bool = True,
+    request: Optional[BaseRequest] = None,
+    tenant: Optional[Tenant] = None,
+    primary: bool = True
+) -> Application:
+    """
+    핸들러가 등록된 Application 생성
+
+    Args:
+        with_updater: False 이면 업데이트를 직접 받지 않음 (작업 프로세스용)
+        request: 봇 API 요청 객체 (재생 도구가 가짜 텔레그램 서버를 쓸 때 지정)
+        tenant: 실행할 봇 (미지정 시 TELEGRAM_TOKEN 의 기본 봇)
+        primary: 프로세스에 하나씩인 HTTP 서버, 루프 감시, 트래픽 기록을 이 봇이 맡을지 여부
+            (여러 봇을 실행하면 첫 번째 봇만 True)
+    """
+    tenant = setup_tenant(tenant or default_tenant)
+
+    # 봇 생성 (업데이트 수신과 봇 API 호출은 따로 설정한 연결 풀 사용)
+    builder = Application.builder().token(tenant.token)
+    if request is not None:
+        builder = builder.request(request)
+    else:
+        builder = builder.request(bot_request(tenant.name))
+        if with_updater:
+            builder = builder.get_updates_request(updates_request(tenant.name))
+    builder = builder.post_init(post_init).post_stop(post_stop).post_shutdown(post_shutdown)
+    if not with_updater:
+        builder = builder.updater(None)
+
+    # 대화 상태를 데이터베이스에 저장 (재시작, 작업 프로세스 분산 시 유지)
+    if config.PERSIST_CONVERSATIONS:
+        builder = builder.persistence(
+            DatabasePersistence(config.PERSISTENCE_INTERVAL, user_data_kind=tenant.kind(USER_DATA_KIND))
+        )
+
+    # 채팅 간에는 동시에, 같은 채팅 안에서는 순서대로 업데이트 처리
+    # (CONCURRENT_UPDATES=1 이면 순차 처리, 핸들러 처리 시간 측정을 위해 항상 사용)
+    # 처리하는 동안 이 봇이 현재 봇(current_tenant)으로 지정됨
+    processor = PerChatUpdateProcessor(max(1, config.CONCURRENT_UPDATES), tenant=tenant)
+    builder = builder.concurrent_updates(processor)
+
+    application = builder.build()
+    application.bot_data['tenant'] = tenant
+    tenant.application = application
+    if tenant not in running_tenants:
+        running_tenants.append(tenant)
+
+    if primary:
+        application.bot_data['http_server'] = create_http_server()
+        loop_monitor = create_loop_monitor()
+        if loop_monitor:
+            application.bot_data['loop_monitor'] = loop_monitor
+            application.bot_data['http_server'].add_health_check('event_loop', loop_monitor.stats)
+
+        # 트래픽 기록 (다른 핸들러보다 먼저 실행)
+        recorder = create_recorder()
+        if recorder:
+            application.add_handler(TypeHandler(Update, recorder.record_update), group=-3)
+            langchain_service.client = recorder.wrap_model_client(langchain_service.client)
+            application.bot_data['http_server'].add_health_check('recorder', recorder.stats)
+
+    # 대화 핸들러 등록 (입력 시각 기록과 요청 제한은 먼저 실행되도록 앞선 그룹에 등록)
+    application.add_handler(TypeHandler(Update, tenant.session_reaper.touch_update), group=-2)
+    application.add_handler(command_throttle_handler, group=-1)
+    application.add_handler(tenant.conversation)
+    for handler in admin_handlers:
+        application.add_handler(handler)
+    application.add_error_handler(handle_error)
+    return application
 
 def main():
     """봇 실행"""
-    # 토큰 확인
-    token = os.getenv('TELEGRAM_TOKEN')
-    print(f"\n현재 사용 중인 토큰: {token}\n")
-    
-    # 봇 생성 (타임아웃 설정 추가)
-    application = Application.builder().token(token).connect_timeout(30.0).read_timeout(30.0).write_timeout(30.0).build()
-    
-    # 대화 핸들러 등록
-    # 봇 실행
-    application.add_handler(analysis_conversation)
-    
-    print("봇이 시작되었습니다. Ctrl+C를 눌러 종료할 수 있습니다.")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    tenants = configured_tenants()
+
+    if config.WORKER_PROCESSES > 1:
+        if config.BOTS_CONFIG:
+            raise ValueError("BOTS_CONFIG 로 여러 봇을 실행할 때는 WORKER_PROCESSES=1 이어야 합니다.")
+        # 입구 프로세스는 봇 API 호출만 사용 (대화 처리는 작업 프로세스에서)
+        ingress = (
+            Application.builder().token(config.TELEGRAM_TOKEN)
+            .request(bot_request(default_tenant.name))
+            .get_updates_request(updates_request(default_tenant.name))
+            .updater(None)
+            .build()
+        )
+        asyncio.run(run_sharded(ingress))
+        return
+
+    applications = [
+        build_application(tenant=tenant, primary=index == 0)
+        for index, tenant in enumerate(tenants)
+    ]
+
+    if len(applications) > 1 or config.BOT_MODE == 'webhook':
+        asyncio.run(run_applications(applications))
+        return
+
+    logger.info("봇이 시작되었습니다. Ctrl+C를 눌러 종료할 수 있습니다.")
+    applications[0].run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == '__main__':
 
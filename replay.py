@@ -0,0 +1,396 @@
+"""
+트래픽 재생 도구
+
+RECORD_FILE 로 기록한 업데이트/모델 응답을 실제 Application 에 다시 흘려보내
+단계별 처리 시간을 측정하고, 두 코드 버전의 결과를 비교합니다.
+텔레그램 서버와 모델 API 는 가짜로 대체하며, 데이터베이스는 임시 SQLite 파일을 사용합니다.
+
+사용법:
+    # 기록된 간격대로 재생 (--speed 2 는 두 배 빠르게, --fast 는 기다리지 않고 최대한 빠르게)
+    python replay.py run data/traffic.jsonl.gz --report before.json
+    python replay.py run data/traffic.jsonl.gz --fast --report after.json
+
+    # 두 결과 비교
+    python replay.py compare before.json after.json
+
+    # 두 리비전을 각각 git worktree 로 꺼내 같은 로그로 재생한 뒤 비교
+    python replay.py revisions data/traffic.jsonl.gz main HEAD --fast
+
+단계별 처리 시간은 추적 구간(telegram.update, handle_step, model.summary, db.save_analysis 등)으로 측정하므로
+재생할 리비전에는 추적 모듈과 build_application(request=...) 이 있어야 합니다.
+요청 제한, 비용 한도 등은 환경 변수 설정을 그대로 따르므로 --fast 재생 시 필요하면 함께 조정하세요.
+모델 응답은 단계(구간 이름)별로 재생하므로 분석 방식(PIPELINE_MODE)은 기록할 때와 같아야 합니다.
+두 방식을 비교하려면 방식마다 기록한 로그를 재생한 뒤 compare 로 비교합니다.
+(같은 입력으로 두 방식의 분석 시간과 토큰을 바로 비교하려면 python loadtest.py pipeline)
+"""
+
+import os
+import sys
+import json
+import gzip
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List
+
+# 재생 중에는 실제 봇/모델/데이터베이스를 사용하지 않음 (프로젝트 모듈을 불러오기 전에 설정)
+_REPLAY_ENV = {
+    'TELEGRAM_TOKEN': '123456789:replay',
+    'ANTHROPIC_API_KEY': 'replay',
+    'DB_BACKEND': 'sqlite',
+    'DATABASE_URL': '',
+    'WEBHOOK_URL': '',
+    'WORKER_PROCESSES': '1',
+    'PERSIST_CONVERSATIONS': 'false',
+    'RECORD_FILE': '',
+    'TRACE_EXPORT': '',
+    'LOOP_MONITOR': 'false',
+}
+
+
+def load_events(path: str) -> List[dict]:
+    """기록 파일 읽기 (시간 순서로 정렬)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    events = []
+    with opener(path, 'rt', encoding='utf-8') as source:
+        for line in source:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    events.sort(key=lambda event: event['t'])
+    return events
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def summarize(spans: List[dict]) -> Dict[str, dict]:
+    """구간 이름별 처리 시간 (밀리초) 과 토큰 합계 요약"""
+    durations: Dict[str, List[float]] = {}
+    tokens: Dict[str, List[int]] = {}
+    for item in spans:
+        durations.setdefault(item['name'], []).append(item['duration'] / 1000)
+        tags = item.get('tags', {})
+        if 'input_tokens' in tags or 'output_tokens' in tags:
+            total = tokens.setdefault(item['name'], [0, 0])
+            total[0] += int(tags.get('input_tokens', 0))
+            total[1] += int(tags.get('output_tokens', 0))
+
+    summary = {}
+    for name, values in sorted(durations.items()):
+        summary[name] = {
+            'count': len(values),
+            'mean': round(sum(values) / len(values), 3),
+            'p50': round(percentile(values, 0.5), 3),
+            'p95': round(percentile(values, 0.95), 3),
+            'max': round(max(values), 3),
+        }
+        if name in tokens:
+            summary[name]['input_tokens'], summary[name]['output_tokens'] = tokens[name]
+    return summary
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def fake_result(name: str, params: dict, message_id: int = 1):
+    """봇 API 메서드의 그럴듯한 응답 결과"""
+    import time
+
+    if name == 'getMe':
+        return {'id': 1, 'is_bot': True, 'first_name': 'replay', 'username': 'replay_bot'}
+    if name == 'getFile':
+        return {'file_id': params.get('file_id', ''), 'file_unique_id': 'replay', 'file_path': 'replay.txt'}
+    if name.startswith(('send', 'edit', 'copy', 'forward')):
+        result = {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(params.get('chat_id') or 0), 'type': 'private'},
+            'text': params.get('text', ''),
+        }
+        if name == 'sendPhoto':
+            result['photo'] = [{'file_id': 'replay', 'file_unique_id': 'replay', 'width': 1, 'height': 1}]
+        return result
+    return True
+
+
+def fake_telegram(latency: float = 0.0, on_send=None):
+    """
+    봇 API 가짜 서버 생성
+
+    Args:
+        latency: 요청마다 기다릴 시간 (초)
+        on_send: 메시지 전송/수정 요청마다 (메서드 이름, 요청 인자) 로 호출할 함수
+    """
+    import asyncio
+
+    from telegram.request import BaseRequest
+
+    class FakeTelegram(BaseRequest):
+        """봇 API 가짜 서버 (보낸 요청 수만 세고 그럴듯한 응답 반환)"""
+
+        def __init__(self):
+            self.calls = 0
+            self._message_id = 0
+
+        async def initialize(self):
+            pass
+
+        async def shutdown(self):
+            pass
+
+        async def do_request(self, url, method, request_data=None, read_timeout=None,
+                             write_timeout=None, connect_timeout=None, pool_timeout=None):
+            self.calls += 1
+            if latency:
+                await asyncio.sleep(latency)
+            if '/file/bot' in url:
+                return 200, b''
+
+            name = url.rsplit('/', 1)[-1]
+            params = request_data.json_parameters if request_data else {}
+            if name.startswith(('send', 'edit', 'copy', 'forward')):
+                self._message_id += 1
+                if on_send:
+                    on_send(name, params)
+            result = fake_result(name, params, self._message_id)
+            return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+    return FakeTelegram()
+
+
+async def replay(events: List[dict], speed: float, telegram_latency: float, timeout: float) -> dict:
+    """기록을 Application 에 재생하고 결과 요약 반환"""
+    import time
+    import types
+    import asyncio
+    from collections import deque
+
+    from telegram import Update
+
+    import main
+    from bot.conversations import langchain_service, analysis_jobs
+    from services import tracing
+
+    spans: List[dict] = []
+    tracing.setup_tracing(write=spans.extend)
+
+    class FakeModel:
+        """기록된 모델 응답을 단계별로 순서대로 돌려주는 가짜 모델 클라이언트"""
+
+        def __init__(self, recorded: List[dict]):
+            self.responses: Dict[str, deque] = {}
+            self.last: Dict[str, dict] = {}
+            self.calls = 0
+            for event in recorded:
+                self.responses.setdefault(event['s'], deque()).append(event)
+            self.messages = self
+
+        async def create(self, **kwargs):
+            self.calls += 1
+            current = tracing.current_span()
+            stage = current.name if current is not None else 'model'
+            queue = self.responses.get(stage)
+            event = queue.popleft() if queue else self.last.get(stage)
+            if event is None:
+                event = {'l': 0, 'i': 0, 'o': 0, 'x': ''}
+            self.last[stage] = event
+            if speed:
+                await asyncio.sleep(event['l'] / speed)
+            if 'j' in event:
+                block = types.SimpleNamespace(type='tool_use', name=kwargs.get('tool_choice', {}).get('name'), input=event['j'])
+            else:
+                block = types.SimpleNamespace(type='text', text=event['x'])
+            return types.SimpleNamespace(
+                content=[block],
+                stop_reason='end_turn',
+                usage=types.SimpleNamespace(input_tokens=event['i'], output_tokens=event['o'])
+            )
+
+    updates = [event for event in events if event['k'] == 'u']
+    model = FakeModel([event for event in events if event['k'] == 'm'])
+    langchain_service.client = model
+    telegram = fake_telegram(telegram_latency)
+
+    application = main.build_application(with_updater=False, request=telegram)
+    await application.initialize()
+    await application.start()
+
+    started = time.perf_counter()
+    first = updates[0]['t'] if updates else 0.0
+    for event in updates:
+        if speed:
+            delay = (event['t'] - first) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await application.update_queue.put(Update.de_json(event['u'], application.bot))
+
+    # 대기 중인 업데이트와 분석 작업이 모두 끝날 때까지 기다림
+    deadline = time.perf_counter() + timeout
+    idle_checks = 0
+    while idle_checks < 3 and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+        processing = application.update_processor.stats()
+        busy = (
+            application.update_queue.qsize()
+            or processing['in_flight']
+            or processing['queued']
+            or analysis_jobs.active_count()
+        )
+        idle_checks = 0 if busy else idle_checks + 1
+    wall_time = time.perf_counter() - started
+
+    await application.stop()
+    await application.shutdown()
+    tracing.stop_tracing()
+
+    return {
+        'revision': git_revision(),
+        'pipeline_mode': getattr(langchain_service, 'pipeline_mode', 'two_stage'),
+        'speed': speed,
+        'updates': len(updates),
+        'model_calls': model.calls,
+        'telegram_calls': telegram.calls,
+        'wall_time': round(wall_time, 3),
+        'timed_out': idle_checks < 3,
+        'steps': summarize(spans),
+    }
+
+
+def run_command(args):
+    for key, value in _REPLAY_ENV.items():
+        os.environ[key] = value
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    database_dir = tempfile.mkdtemp(prefix='replay-')
+    os.environ['SQLITE_PATH'] = os.path.join(database_dir, 'replay.db')
+
+    import asyncio
+
+    try:
+        speed = 0.0 if args.fast else args.speed
+        report = asyncio.run(replay(load_events(args.log), speed, args.telegram_latency, args.timeout))
+    finally:
+        shutil.rmtree(database_dir, ignore_errors=True)
+
+    report['log'] = args.log
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as output:
+            output.write(text)
+    print(text)
+
+
+def compare(before: dict, after: dict) -> str:
+    """두 재생 결과의 단계별 처리 시간 비교표"""
+    def change(old: float, new: float) -> str:
+        if not old:
+            return '-'
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    lines = [
+        f"비교: {before.get('revision')} ({before.get('pipeline_mode')}) -> "
+        f"{after.get('revision')} ({after.get('pipeline_mode')}) "
+        f"(전체 {before.get('wall_time')}초 -> {after.get('wall_time')}초)",
+        f"{'구간':<28}{'횟수':>12}{'p50 (ms)':>26}{'p95 (ms)':>26}",
+    ]
+    names = sorted(set(before['steps']) | set(after['steps']))
+    for name in names:
+        old = before['steps'].get(name, {})
+        new = after['steps'].get(name, {})
+        old_p50, new_p50 = old.get('p50', 0), new.get('p50', 0)
+        old_p95, new_p95 = old.get('p95', 0), new.get('p95', 0)
+        lines.append(
+            f"{name:<28}{old.get('count', 0):>5} -> {new.get('count', 0):<5}"
+            f"{old_p50:>9.2f} -> {new_p50:<9.2f}{change(old_p50, new_p50):>7}"
+            f"{old_p95:>9.2f} -> {new_p95:<9.2f}{change(old_p95, new_p95):>7}"
+        )
+
+    def total_tokens(report: dict) -> int:
+        return sum(
+            step.get('input_tokens', 0) + step.get('output_tokens', 0)
+            for name, step in report['steps'].items() if name.startswith('model.')
+        )
+
+    lines.append(
+        f"모델 토큰 합계: {total_tokens(before)} -> {total_tokens(after)} "
+        f"({change(total_tokens(before), total_tokens(after))})"
+    )
+    return '\n'.join(lines)
+
+
+def compare_command(args):
+    with open(args.before, encoding='utf-8') as source:
+        before = json.load(source)
+    with open(args.after, encoding='utf-8') as source:
+        after = json.load(source)
+    print(compare(before, after))
+
+
+def revisions_command(args):
+    """두 리비전을 git worktree 로 꺼내 같은 로그를 재생하고 비교"""
+    log = os.path.abspath(args.log)
+    harness = os.path.abspath(__file__)
+    reports = []
+    for revision in (args.before, args.after):
+        worktree = tempfile.mkdtemp(prefix='replay-worktree-')
+        report = os.path.join(worktree, 'replay-report.json')
+        subprocess.run(['git', 'worktree', 'add', '--detach', worktree, revision], check=True)
+        try:
+            # 두 리비전 모두 현재 버전의 재생 도구로 실행해 측정 방식을 같게 유지
+            shutil.copy(harness, os.path.join(worktree, 'replay_harness.py'))
+            command = [sys.executable, 'replay_harness.py', 'run', log, '--report', report,
+                       '--speed', str(args.speed), '--telegram-latency', str(args.telegram_latency),
+                       '--timeout', str(args.timeout)]
+            if args.fast:
+                command.append('--fast')
+            subprocess.run(command, cwd=worktree, check=True, stdout=subprocess.DEVNULL)
+            with open(report, encoding='utf-8') as source:
+                reports.append(json.load(source))
+        finally:
+            subprocess.run(['git', 'worktree', 'remove', '--force', worktree], check=False)
+    print(compare(*reports))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="기록한 트래픽 재생 및 성능 비교")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_replay_options(command):
+        command.add_argument('log', help="RECORD_FILE 로 기록한 파일")
+        command.add_argument('--speed', type=float, default=1.0, help="재생 속도 배율 (1 = 기록된 간격 그대로)")
+        command.add_argument('--fast', action='store_true', help="기다리지 않고 최대한 빠르게 재생")
+        command.add_argument('--telegram-latency', type=float, default=0.0, help="가짜 텔레그램 응답 지연 (초)")
+        command.add_argument('--timeout', type=float, default=600.0, help="재생 후 작업 완료를 기다리는 최대 시간 (초)")
+
+    run = commands.add_parser('run', help="한 번 재생하고 단계별 처리 시간 출력")
+    add_replay_options(run)
+    run.add_argument('--report', help="결과를 저장할 JSON 파일")
+    run.set_defaults(handler=run_command)
+
+    diff = commands.add_parser('compare', help="두 재생 결과 비교")
+    diff.add_argument('before')
+    diff.add_argument('after')
+    diff.set_defaults(handler=compare_command)
+
+    both = commands.add_parser('revisions', help="두 리비전을 같은 기록으로 재생하고 비교")
+    add_replay_options(both)
+    both.add_argument('before', help="기준 리비전")
+    both.add_argument('after', help="비교할 리비전")
+    both.set_defaults(handler=revisions_command)
+
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    arguments.handler(arguments)
@@ -0,0 +1,185 @@
+"""
+분석 실행 순서 관리 모듈 (admission)
+
+한 프로세스에서 여러 봇을 실행하면 모델 호출을 함께 사용하므로,
+한 봇에 요청이 몰려도 다른 봇의 분석이 밀리지 않도록 실행 순서를 나눠 줍니다.
+
+동작 방식:
+1. 전체 동시 실행 수(capacity)와 봇별 동시 실행 수(limit)를 넘지 않는 동안은 바로 실행
+2. 자리가 없으면 봇별 대기열에 줄을 섬
+3. 자리가 나면 대기 중인 봇을 돌아가며(가중치만큼 연속으로) 한 건씩 실행
+   - 봇별 한도에 걸린 봇은 건너뜀
+   - 같은 봇 안에서는 먼저 온 순서대로 실행
+
+지표:
+- bot_admission_wait_seconds{tenant}: 실행까지 기다린 시간
+- bot_admission_waiting{tenant} / bot_admission_running{tenant}: 현재 대기/실행 수
+"""
+
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Tuple
+
+import config
+from services.metrics import REGISTRY
+
+ADMISSION_WAIT = REGISTRY.histogram(
+    'bot_admission_wait_seconds', '분석 실행까지 기다린 시간 (초)', ['tenant'],
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+
+
+class AdmissionScheduler:
+    """
+    봇별 공정 실행 순서 관리
+
+    Args:
+        capacity: 전체 동시 실행 수 (0 이면 제한 없음 - 봇별 한도만 적용)
+    """
+
+    def __init__(self, capacity: int = 0):
+        self.capacity = capacity
+        self._running: Dict[str, int] = {}
+        self._waiting: Dict[str, Deque[Tuple[asyncio.Future, int]]] = {}
+        # 대기 중인 봇의 차례 (앞에서부터) 와 이번 차례에 남은 실행 수
+        self._turns: Deque[str] = deque()
+        self._credits: Dict[str, int] = {}
+        self._weights: Dict[str, int] = {}
+
+        # 통계
+        self.admitted = 0
+        self.queued = 0
+
+    def _total_running(self) -> int:
+        return sum(self._running.values())
+
+    def _has_room(self) -> bool:
+        return self.capacity <= 0 or self._total_running() < self.capacity
+
+    def _under_limit(self, tenant: str, limit: int) -> bool:
+        return limit <= 0 or self._running.get(tenant, 0) < limit
+
+    def available(self, tenant: str, limit: int = 0) -> bool:
+        """지금 요청하면 기다리지 않고 실행되는지 확인"""
+        return self._has_room() and self._under_limit(tenant, limit) and not self._waiting.get(tenant)
+
+    def _grant(self, tenant: str, future: asyncio.Future):
+        self._running[tenant] = self._running.get(tenant, 0) + 1
+        future.set_result(None)
+
+    def _dispatch(self):
+        """자리가 남아 있는 동안 대기 중인 봇을 돌아가며 실행"""
+        skipped = 0
+        while self._turns and self._has_room() and skipped < len(self._turns):
+            tenant = self._turns[0]
+            queue = self._waiting.get(tenant)
+            # 취소된 대기는 버림
+            while queue and queue[0][0].done():
+                queue.popleft()
+            if not queue:
+                self._turns.popleft()
+                self._waiting.pop(tenant, None)
+                self._credits.pop(tenant, None)
+                continue
+
+            future, limit = queue[0]
+            if not self._under_limit(tenant, limit):
+                # 봇별 한도에 걸린 봇은 다음 차례로
+                self._turns.rotate(-1)
+                skipped += 1
+                continue
+
+            queue.popleft()
+            self._grant(tenant, future)
+            skipped = 0
+            self._credits[tenant] = self._credits.get(tenant, self._weights.get(tenant, 1)) - 1
+            if not queue:
+                self._turns.popleft()
+                self._waiting.pop(tenant, None)
+                self._credits.pop(tenant, None)
+            elif self._credits[tenant] <= 0:
+                # 가중치만큼 실행했으면 다음 봇 차례
+                self._credits[tenant] = self._weights.get(tenant, 1)
+                self._turns.rotate(-1)
+
+    def _release(self, tenant: str):
+        self._running[tenant] -= 1
+        if self._running[tenant] <= 0:
+            del self._running[tenant]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def admit(self, tenant: str, limit: int = 0, weight: int = 1):
+        """
+        실행 차례를 기다린 뒤 블록 실행 (끝나면 다음 차례에 자리를 넘김)
+
+        Args:
+            tenant: 봇 이름
+            limit: 봇별 동시 실행 수 (0 이면 제한 없음)
+            weight: 봇의 상대적 몫
+        """
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._weights[tenant] = max(1, weight)
+        queue = self._waiting.get(tenant)
+        if queue is None:
+            queue = self._waiting[tenant] = deque()
+            self._turns.append(tenant)
+        queue.append((future, limit))
+        self._dispatch()
+
+        if not future.done():
+            self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 차례를 받은 직후에 취소되면 자리를 돌려줌
+                self._release(tenant)
+            else:
+                future.cancel()
+                self._dispatch()
+            raise
+
+        self.admitted += 1
+        ADMISSION_WAIT.labels(tenant).observe(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            self._release(tenant)
+
+    def waiting(self) -> Dict[str, int]:
+        """봇별 대기 수"""
+        return {
+            tenant: sum(1 for future, _ in queue if not future.done())
+            for tenant, queue in self._waiting.items()
+        }
+
+    def running(self) -> Dict[str, int]:
+        """봇별 실행 수"""
+        return dict(self._running)
+
+    def stats(self) -> dict:
+        """실행 순서 상태"""
+        return {
+            'capacity': self.capacity,
+            'running': self.running(),
+            'waiting': self.waiting(),
+            'admitted': self.admitted,
+            'queued': self.queued,
+        }
+
+
+# 모든 봇이 함께 사용하는 분석 실행 순서 관리자
+admission = AdmissionScheduler(config.ANALYSIS_CONCURRENCY)
+
+REGISTRY.gauge(
+    'bot_admission_waiting', '실행 차례를 기다리는 분석 수', ['tenant'],
+    callback=lambda: {(tenant,): count for tenant, count in admission.waiting().items()}
+)
+REGISTRY.gauge(
+    'bot_admission_running', '실행 중인 분석 수', ['tenant'],
+    callback=lambda: {(tenant,): count for tenant, count in admission.running().items()}
+)
@@ -9,6 +9,17 @@ LangChain 서비스 모듈
 2. 상세 분석 및 제안 생성
 3. 결과 파싱 및 구조화
 
+분석 방식 (PIPELINE_MODE):
+- two_stage: 명세서 초안을 받은 뒤 초안으로 상세 분석을 요청 (모델 호출 2회, 마크다운 응답 파싱)
+- single: 초안과 분석 네 항목을 tool use 의 JSON 형식으로 한 번에 받음 (모델 호출 1회, 파싱 없음)
+
+항목 하나 수정 (revise_startup):
+- 명세서 초안은 입력 항목 전체에, 상세 분석은 초안에만 의존합니다 (STAGE_INPUTS).
+- 이전 결과와 바뀐 항목을 주고 영향을 받는 섹션만 다시 쓰게 한 뒤 이전 결과에 합칩니다.
+- 초안에서 바뀐 섹션이 없으면 상세 분석은 다시 하지 않습니다.
+- 단계 결과는 사용자별로 그 단계의 입력으로 메모해 두므로 (StageMemo) 같은 사용자의 같은 입력이 다시 오면 모델을 호출하지 않습니다.
+  (사용자가 새로 분석하기를 고르면 fresh=True 로 메모를 읽지 않고 다시 분석합니다)
+
 사용자 정의:
 - 프롬프트 템플릿 수정
 - 분석 섹션 구성 변경
@@ -16,12 +27,21 @@ LangChain 서비스 모듈
 """
 
 import os
-import asyncio
-from typing import Dict, Optional
+import re
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 import anthropic
 from dotenv import load_dotenv
 from langchain.prompts import ChatPromptTemplate
 import warnings
+import config
+from services.metrics import REGISTRY, track, record_usage, record_error
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
 
 # SQLite 관련 경고 무시
 warnings.filterwarnings('ignore', category=UserWarning, module='langchain')
@@ -29,6 +49,187 @@ warnings.filterwarnings('ignore', category=UserWarning, module='langchain')
 # 환경 변수 로드
 load_dotenv()
 
+# 사용자 입력 항목 키 (대화 순서대로)
+FORM_FIELDS = (
+    'idea',
+    'problem',
+    'mechanism',
+    'difference',
+    'components',
+    'effects',
+    'limitations',
+    'industry',
+    'specifications',
+    'status',
+)
+
+# 단계별 입력 (이 값이 바뀌면 단계를 다시 계산)
+STAGE_INPUTS = {
+    'summary': FORM_FIELDS,
+    'analysis': ('summary',),
+}
+
+# 분석 방식
+TWO_STAGE = 'two_stage'
+SINGLE = 'single'
+PIPELINE_MODES = (TWO_STAGE, SINGLE)
+
+# 분석 섹션 (결과 키, 응답 제목)
+ANALYSIS_SECTIONS = (
+    ('case_studies', '선행기술 분석'),
+    ('feasibility', '기술적 실현성'),
+    ('development_plan', '기술 발전성'),
+    ('improvements', '보완 사항'),
+)
+
+# 분석 항목 (레이블: 내용) JSON 형식
+_ANALYSIS_ITEMS = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'label': {'type': 'string', 'description': "항목 이름 (예: 구현성, 청구항)"},
+            'content': {'type': 'string', 'description': "항목 내용"},
+        },
+        'required': ['label', 'content'],
+    },
+}
+
+# 한 번 호출 방식에서 모델이 채워서 보내는 보고서 형식 (tool use 입력으로 받음)
+REPORT_TOOL = {
+    'name': 'submit_patent_report',
+    'description': "특허 명세서 초안과 심사 관점의 분석 결과를 제출합니다.",
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'summary': {
+                'type': 'array',
+                'description': (
+                    "명세서 초안 섹션 목록 (발명의 명칭, 기술 분야, 배경 기술, 해결 과제, 과제 해결 수단, 발명의 효과 순서)"
+                ),
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'heading': {'type': 'string', 'description': "섹션 제목"},
+                        'lines': {
+                            'type': 'array',
+                            'items': {'type': 'string'},
+                            'description': "섹션 내용 줄 (목록 항목은 '- 레이블: 내용' 형식)",
+                        },
+                    },
+                    'required': ['heading', 'lines'],
+                },
+            },
+            'case_studies': {**_ANALYSIS_ITEMS, 'description': "선행기술 분석 (기술별 특허번호, 기술적 특징, 차이점)"},
+            'feasibility': {**_ANALYSIS_ITEMS, 'description': "기술적 실현성 (구현성, 완성도, 검증, 제약)"},
+            'development_plan': {**_ANALYSIS_ITEMS, 'description': "기술 발전성 (개선점, 응용, 확장, 최적화)"},
+            'improvements': {**_ANALYSIS_ITEMS, 'description': "보완 사항 (명세서, 청구항, 도면, 실시예)"},
+        },
+        'required': ['summary', 'case_studies', 'feasibility', 'development_plan', 'improvements'],
+    },
+}
+
+# 단계 결과 메모 사용 결과 (hit: 모델 호출 생략)
+STAGE_MEMO = REGISTRY.counter('bot_stage_memo_total', '단계 결과 메모 조회 수', ['stage', 'result'])
+
+# 수정 요청 시 시스템 프롬프트 뒤에 붙이는 안내
+_REVISE_INSTRUCTIONS = """
+
+            지금은 이미 작성된 결과를 고치는 중입니다.
+            입력 중 일부가 바뀌었으니, 바뀐 내용의 영향을 받는 섹션만 위 형식 그대로 다시 작성해주세요.
+            - 섹션 제목은 기존 결과의 제목과 글자 그대로 같게 작성
+            - 영향을 받지 않는 섹션은 출력하지 않음
+            - 고칠 섹션이 없으면 아무것도 출력하지 않음"""
+
+
+def split_sections(text: str) -> List[Tuple[str, List[str]]]:
+    """'# 제목' 기준으로 (제목, 내용 줄 목록) 나누기 (첫 제목 앞의 줄은 제목 '' 로)"""
+    sections: List[Tuple[str, List[str]]] = []
+    for line in (text or '').split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('# '):
+            sections.append((stripped[2:].strip(), []))
+        elif stripped:
+            if not sections:
+                sections.append(('', []))
+            sections[-1][1].append(stripped)
+    return sections
+
+
+def join_sections(sections: List[Tuple[str, List[str]]]) -> str:
+    """split_sections 결과를 다시 텍스트로"""
+    blocks = []
+    for heading, lines in sections:
+        blocks.append('\n'.join(([f"# {heading}"] if heading else []) + lines))
+    return '\n\n'.join(blocks)
+
+
+def merge_sections(text: str, revised: str) -> Tuple[str, List[str]]:
+    """
+    이전 결과에 다시 쓴 섹션 합치기
+
+    제목이 같은 섹션만 바꾸고, 이전 결과에 없는 제목은 버립니다 (형식 유지).
+
+    Returns:
+        (합친 텍스트, 내용이 바뀐 섹션 제목 목록)
+    """
+    sections = split_sections(text)
+    positions = {heading: index for index, (heading, _) in enumerate(sections) if heading}
+    changed = []
+    for heading, lines in split_sections(revised):
+        index = positions.get(heading)
+        if index is None or not lines:
+            if heading:
+                logger.debug("다시 쓴 섹션 제목이 이전 결과에 없어 무시: %s", heading)
+            continue
+        if sections[index][1] != lines:
+            sections[index] = (heading, lines)
+            changed.append(heading)
+    return join_sections(sections), changed
+
+
+class StageMemo:
+    """
+    단계 결과 메모 (LRU)
+
+    사용자, 단계 이름, 모델, 시스템 프롬프트, 단계 입력(STAGE_INPUTS)이 같으면 같은 결과를 돌려줍니다.
+    사용자 키를 함께 넣어 키를 만들므로 다른 사용자의 결과는 재사용하지 않습니다.
+
+    Args:
+        capacity: 최대 보관 수 (0 이면 메모하지 않음)
+    """
+
+    def __init__(self, capacity: int = 512):
+        self.capacity = capacity
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+
+    @staticmethod
+    def key(stage: str, model: str, system: str, inputs: Dict[str, str], user_key: Optional[str] = None) -> str:
+        encoded = json.dumps(
+            [user_key or '', stage, model, system, [str(inputs.get(name, '')).strip() for name in STAGE_INPUTS[stage]]],
+            ensure_ascii=False
+        ).encode('utf-8')
+        return hashlib.sha1(encoded).hexdigest()
+
+    def get(self, stage: str, key: str) -> Optional[str]:
+        value = self._items.get(key)
+        STAGE_MEMO.labels(stage, 'hit' if value is not None else 'miss').inc()
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str):
+        if self.capacity <= 0:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
 class LangChainService:
     """
     LangChain 서비스 클래스
@@ -55,9 +256,17 @@ class LangChainService:
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY가 설정되지 않았습니다.")
         
-        # Anthropic 클라이언트 설정
-        self.client = anthropic.Client(api_key=self.api_key)
+        # Anthropic 클라이언트 설정 (비동기 - 작업 취소 시 진행 중인 요청도 함께 중단)
+        self.client = anthropic.AsyncAnthropic(api_key=self.api_key)
         self.model = "claude-3-haiku-20240307"
+
+        # 분석 방식
+        self.pipeline_mode = config.PIPELINE_MODE
+        if self.pipeline_mode not in PIPELINE_MODES:
+            raise ValueError(f"지원하지 않는 PIPELINE_MODE 입니다: {self.pipeline_mode}")
+
+        # 단계 결과 메모 (항목 하나 수정, 같은 입력 재분석 시 모델 호출 생략)
+        self.memo = StageMemo(config.STAGE_MEMO_SIZE)
         
         # 1단계: 기본 정보 정리 및 요약
         self.summary_prompt = ChatPromptTemplate.from_messages([
@@ -150,7 +359,33 @@ class LangChainService:
             ("human", """사업계획서 요약: {summary}""")
         ])
 
-    def _get_summary(self, data):
+        # 입력 항목 이름 (1단계 입력의 '이름: {항목}' 줄에서, 수정 요청에 바뀐 항목을 표시할 때 사용)
+        self.field_labels = {
+            field: label.strip()
+            for label, field in re.findall(r'([^\s:][^:\n]*):\s*\{(\w+)\}', self.summary_prompt.messages[1].prompt.template)
+        }
+
+        # 한 번 호출 방식: 명세서 초안과 상세 분석을 함께 작성 (입력은 1단계와 같음)
+        self.report_prompt = """당신은 특허 명세서 작성과 특허 심사 전문가입니다.
+            제공된 기술 정보를 바탕으로 특허 명세서 초안을 작성하고,
+            작성한 초안을 심사 관점에서 분석해 보완점을 제시한 뒤
+            submit_patent_report 도구로 결과를 제출해주세요.
+
+            명세서 초안 (summary):
+            - 발명의 명칭, 기술 분야, 배경 기술, 해결 과제, 과제 해결 수단, 발명의 효과 순서로 작성
+            - 배경 기술은 종래 기술/문제점/필요성, 과제 해결 수단은 구성/특징/효과,
+              발명의 효과는 기술적/경제적/산업적 효과를 '- 레이블: 내용' 형식의 줄로 작성
+
+            분석 (case_studies, feasibility, development_plan, improvements):
+            - 각 항목은 레이블과 내용으로 작성
+            - 선행기술 분석은 기술 3개 이상, 나머지는 설명에 적힌 레이블을 모두 포함
+
+            주의사항:
+            1. 기술 용어를 정확하게 사용
+            2. 구체적인 수치와 실시예 포함
+            3. 실제 특허 사례와 기술 동향을 반영하여 구체적인 분석 제시"""
+
+    async def _get_summary(self, data, on_usage=None, system=None):
         """
         1단계: 기본 정보 정리 및 요약
         
@@ -167,13 +402,16 @@ class LangChainService:
                 - implementation: 구현 방식
                 - goals: 목표
                 - needs: 필요 사항
+            on_usage: 토큰 사용량을 받을 함수 (모델 이름, usage)
+            system: 기본 대신 사용할 시스템 프롬프트 (봇별 프롬프트)
         
         Returns:
             str: 구조화된 요약 텍스트
         """
-        response = self.client.messages.create(
-            model=self.model,
-            system=self.summary_prompt.messages[0].prompt.template,
+        response = await self._create(
+            'summary',
+            on_usage,
+            system=system or self.summary_prompt.messages[0].prompt.template,
             messages=[
                 {"role": "user", "content": self.summary_prompt.messages[1].prompt.template.format(**data)}
             ],
@@ -181,7 +419,7 @@ class LangChainService:
         )
         return response.content[0].text
 
-    def _get_analysis(self, summary):
+    async def _get_analysis(self, summary, on_usage=None, system=None):
         """
         2단계: 상세 분석 및 제안
         
@@ -195,13 +433,16 @@ class LangChainService:
         
         Args:
             summary (str): 1단계에서 생성된 요약
+            on_usage: 토큰 사용량을 받을 함수 (모델 이름, usage)
+            system: 기본 대신 사용할 시스템 프롬프트 (봇별 프롬프트)
             
         Returns:
             str: 상세 분석 결과 텍스트
         """
-        response = self.client.messages.create(
-            model=self.model,
-            system=self.analysis_prompt.messages[0].prompt.template,
+        response = await self._create(
+            'analysis',
+            on_usage,
+            system=system or self.analysis_prompt.messages[0].prompt.template,
             messages=[
                 {"role": "user", "content": f"사업계획서 요약: {summary}"}
             ],
@@ -209,22 +450,103 @@ class LangChainService:
         )
         return response.content[0].text
 
+    async def _get_report(self, data, on_usage=None, system=None) -> Dict:
+        """
+        한 번 호출 방식: 명세서 초안과 상세 분석을 한 번에 생성
+
+        도구 호출을 강제해서 REPORT_TOOL 의 JSON 형식으로 응답을 받으므로
+        제목 줄을 찾는 파싱 없이 결과 dict 로 바로 변환합니다.
+
+        Args:
+            data (Dict): 사용자 입력 데이터
+            on_usage: 토큰 사용량을 받을 함수 (모델 이름, usage)
+            system: 기본 대신 사용할 시스템 프롬프트 (봇별 프롬프트)
+
+        Returns:
+            Dict: summary (텍스트) 와 분석 섹션별 항목 목록
+        """
+        response = await self._create(
+            'report',
+            on_usage,
+            system=system or self.report_prompt,
+            messages=[
+                {"role": "user", "content": self.summary_prompt.messages[1].prompt.template.format(**data)}
+            ],
+            tools=[REPORT_TOOL],
+            tool_choice={"type": "tool", "name": REPORT_TOOL['name']},
+            max_tokens=4096
+        )
+        report = next(
+            (block.input for block in response.content if getattr(block, 'type', None) == 'tool_use'),
+            None
+        )
+        if not isinstance(report, dict):
+            raise ValueError(f"구조화된 응답이 없습니다 (stop_reason={getattr(response, 'stop_reason', None)})")
+        return self._report_to_result(report)
+
+    @staticmethod
+    def _report_to_result(report: Dict) -> Dict:
+        """
+        구조화된 응답을 두 단계 방식과 같은 결과 형식으로 변환
+
+        - summary: '# 제목' 과 내용 줄로 이어 붙인 텍스트
+        - 분석 섹션: 항목마다 ['# 레이블', '- 내용'] (_parse_section_content 결과와 같은 형식)
+        """
+        summary_lines = []
+        for section in report.get('summary') or []:
+            if not isinstance(section, dict):
+                continue
+            if summary_lines:
+                summary_lines.append('')
+            summary_lines.append(f"# {str(section.get('heading', '')).strip()}")
+            summary_lines.extend(str(line).strip() for line in section.get('lines') or [] if str(line).strip())
+
+        result = {'summary': '\n'.join(summary_lines)}
+        for key, _ in ANALYSIS_SECTIONS:
+            items = []
+            for item in report.get(key) or []:
+                if not isinstance(item, dict):
+                    continue
+                label = str(item.get('label', '')).strip()
+                content = str(item.get('content', '')).strip()
+                if label:
+                    items.append(f"# {label}")
+                if content:
+                    items.append(f"- {content}")
+            result[key] = items
+        return result
+
+    async def _create(self, stage: str, on_usage=None, **request):
+        """
+        모델 호출 (단계별 처리 시간, 추적 구간, 토큰 사용량 기록)
+
+        Args:
+            stage: 단계 이름 (지표 레이블과 'model.<단계>' 구간 이름에 사용)
+            on_usage: 토큰 사용량을 받을 함수 (모델 이름, usage)
+            **request: messages.create 인자 (model 제외)
+        """
+        with track(stage), span(f'model.{stage}', model=self.model) as current:
+            response = await self.client.messages.create(model=self.model, **request)
+            usage = getattr(response, 'usage', None)
+            current.set(
+                input_tokens=getattr(usage, 'input_tokens', None),
+                output_tokens=getattr(usage, 'output_tokens', None)
+            )
+        record_usage(self.model, usage)
+        if on_usage and usage is not None:
+            on_usage(self.model, usage)
+        return response
+
     async def debug_chain(self, data: Dict) -> None:
         try:
-            summary_result = await asyncio.to_thread(self._get_summary, data)
-            print("\n=== Summary Chain Result ===")
-            print(f"Content: {summary_result}")
+            summary_result = await self._get_summary(data)
+            logger.debug("요약 결과: %s", summary_result)
             
-            analysis_result = await asyncio.to_thread(self._get_analysis, summary_result)
-            print("\n=== Analysis Chain Result ===")
-            print(f"Content: {analysis_result}")
+            analysis_result = await self._get_analysis(summary_result)
+            logger.debug("분석 결과: %s", analysis_result)
             
-        except Exception as e:
-            print(f"\n=== Chain Debug Error ===")
-            print(f"Error: {e}")
-            print(f"Error Type: {type(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+        except Exception:
+            logger.exception("체인 디버그 중 오류 발생")
 
     def _parse_section_content(self, content: str) -> list:
         """
@@ -273,88 +595,301 @@ class LangChainService:
         
         return result
 
-    async def analyze_startup(self, data: Dict) -> Optional[Dict]:
-        """스타트업 분석 수행"""
-        try:
-            # 디버깅 실행
-            await self.debug_chain(data)
+    def _parse_analysis(self, analysis: str) -> Dict:
+        """2단계 마크다운 응답을 섹션별 항목 목록으로 변환 ('# 섹션 제목' 기준)"""
+        analysis_result = {key: [] for key, _ in ANALYSIS_SECTIONS}
 
-            # 체인 실행
-            print("\n=== Chain Execution ===")
-            summary = await asyncio.to_thread(self._get_summary, data)
-            analysis = await asyncio.to_thread(self._get_analysis, summary)
-            
-            # 결과를 직접 구성
-            analysis_result = {
-                'summary': summary,
-                'case_studies': [],
-                'feasibility': [],
-                'development_plan': [],
-                'improvements': []
-            }
-            
-            # 섹션 매핑 정의
-            section_mapping = {
-                '선행기술 분석': 'case_studies',
-                '기술적 실현성': 'feasibility',
-                '기술 발전성': 'development_plan',
-                '보완 사항': 'improvements'
-            }
-            
-            # 분석 결과 파싱
-            current_section = None
-            current_content = []
-            
-            print("\n=== Parsing Analysis Result ===")
-            
-            for line in analysis.split('\n'):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                if line.startswith('# '):
-                    # 이전 섹션의 내용을 처리
-                    if current_section and current_content:
-                        parsed_content = self._parse_section_content('\n'.join(current_content))
-                        if current_section in section_mapping:
-                            mapped_section = section_mapping[current_section]
-                            print(f"\nProcessing section: {current_section} -> {mapped_section}")
-                            print(f"Parsed content: {parsed_content}")
-                            analysis_result[mapped_section] = parsed_content
-                    
-                    # 새로운 섹션 시작
-                    current_section = line[2:].strip()
-                    print(f"\nNew section: {current_section}")
-                    current_content = []
-                else:
-                    current_content.append(line)
-                    print(f"Added content: {line}")
-            
-            # 마지막 섹션 처리
+        # 섹션 매핑 정의
+        section_mapping = {title: key for key, title in ANALYSIS_SECTIONS}
+
+        current_section = None
+        current_content = []
+
+        def flush_section():
             if current_section and current_content:
                 parsed_content = self._parse_section_content('\n'.join(current_content))
                 if current_section in section_mapping:
                     mapped_section = section_mapping[current_section]
-                    print(f"\nProcessing final section: {current_section} -> {mapped_section}")
-                    print(f"Parsed content: {parsed_content}")
+                    logger.debug("섹션 파싱: %s -> %s (%d개 항목)", current_section, mapped_section, len(parsed_content))
                     analysis_result[mapped_section] = parsed_content
 
+        for line in analysis.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith('# '):
+                # 이전 섹션의 내용을 처리하고 새로운 섹션 시작
+                flush_section()
+                current_section = line[2:].strip()
+                current_content = []
+            else:
+                current_content.append(line)
+
+        # 마지막 섹션 처리
+        flush_section()
+        return analysis_result
+
+    def _system(self, stage: str, prompts: Optional[Dict[str, str]] = None) -> str:
+        """단계의 시스템 프롬프트 (봇별 프롬프트가 없으면 기본 프롬프트)"""
+        custom = (prompts or {}).get(stage)
+        if custom:
+            return custom
+        if stage == 'summary':
+            return self.summary_prompt.messages[0].prompt.template
+        if stage == 'analysis':
+            return self.analysis_prompt.messages[0].prompt.template
+        return self.report_prompt
+
+    async def _memoized(self, stage: str, system: str, inputs: Dict, compute: Callable[[], Awaitable[str]],
+                        user_key: Optional[str] = None, fresh: bool = False) -> str:
+        """단계 결과를 사용자의 메모에서 찾고, 없으면 계산해서 메모 (fresh 이면 찾지 않고 다시 계산)"""
+        key = self.memo.key(stage, self.model, system, inputs, user_key)
+        value = None if fresh else self.memo.get(stage, key)
+        if value is None:
+            value = await compute()
+            self.memo.put(key, value)
+        return value
+
+    async def _analyze_two_stage(self, data: Dict, progress=None, on_usage=None, prompts=None,
+                                 user_key=None, fresh=False) -> Dict:
+        """두 단계 방식: 명세서 초안 작성 후 초안으로 상세 분석"""
+        summary_system = self._system('summary', prompts)
+        analysis_system = self._system('analysis', prompts)
+        if progress:
+            await progress('summary')
+        summary = await self._memoized(
+            'summary', summary_system, data,
+            lambda: self._get_summary(data, on_usage, summary_system),
+            user_key, fresh
+        )
+        if progress:
+            await progress('analysis')
+        analysis = await self._memoized(
+            'analysis', analysis_system, {'summary': summary},
+            lambda: self._get_analysis(summary, on_usage, analysis_system),
+            user_key, fresh
+        )
+        return {'summary': summary, **self._parse_analysis(analysis)}
+
+    async def _analyze_summary_only(self, data: Dict, progress=None, on_usage=None, prompts=None,
+                                    user_key=None, fresh=False) -> Dict:
+        """초안만 작성 (과부하 시, 상세 분석 섹션은 비우고 partial 표시)"""
+        summary_system = self._system('summary', prompts)
+        if progress:
+            await progress('summary')
+        summary = await self._memoized(
+            'summary', summary_system, data,
+            lambda: self._get_summary(data, on_usage, summary_system),
+            user_key, fresh
+        )
+        return {'summary': summary, **{key: [] for key, _ in ANALYSIS_SECTIONS}, 'partial': True}
+
+    def cached_result(self, data: Dict, prompts: Optional[Dict[str, str]] = None,
+                      user_key: Optional[str] = None) -> Optional[Dict]:
+        """이 사용자의 같은 입력의 초안과 상세 분석이 모두 메모에 있으면 모델 호출 없이 결과 반환 (없으면 None)"""
+        summary = self.memo.get(
+            'summary', self.memo.key('summary', self.model, self._system('summary', prompts), data, user_key)
+        )
+        if summary is None:
+            return None
+        analysis = self.memo.get(
+            'analysis',
+            self.memo.key('analysis', self.model, self._system('analysis', prompts), {'summary': summary}, user_key)
+        )
+        if analysis is None:
+            return None
+        result = {'summary': summary, **self._parse_analysis(analysis)}
+        result.update({key: data.get(key, '') for key in FORM_FIELDS})
+        return result
+
+    @staticmethod
+    def _analysis_text(result: Dict) -> str:
+        """결과의 분석 섹션을 2단계 응답 형식의 마크다운으로 되돌리기 (이전 분석을 고칠 때 사용)"""
+        sections = []
+        for key, title in ANALYSIS_SECTIONS:
+            lines = []
+            label = None
+            for item in result.get(key) or []:
+                if item.startswith('# '):
+                    if label:
+                        lines.append(f"- {label}:")
+                    label = item[2:].strip()
+                    continue
+                content = item[2:].strip() if item.startswith('- ') else item.strip()
+                lines.append(f"- {label}: {content}" if label else f"- {content}")
+                label = None
+            if label:
+                lines.append(f"- {label}:")
+            sections.append((title, lines))
+        return join_sections(sections)
+
+    async def _revise(self, stage: str, system: str, previous: str, changes: str, on_usage=None) -> str:
+        """
+        이전 결과에서 바뀐 입력의 영향을 받는 섹션만 다시 쓰게 한 뒤 합치기
+
+        다시 쓴 섹션만 출력하게 하므로 처음부터 작성할 때보다 출력 토큰이 적습니다.
+        """
+        response = await self._create(
+            f'revise_{stage}',
+            on_usage,
+            system=system + _REVISE_INSTRUCTIONS,
+            messages=[
+                {"role": "user", "content": f"기존 결과:\n{previous}\n\n{changes}"}
+            ],
+            max_tokens=2000
+        )
+        revised = ''.join(getattr(block, 'text', '') for block in response.content or [])
+        merged, changed = merge_sections(previous, revised)
+        logger.debug("%s 수정: %d개 섹션", stage, len(changed), extra={'sections': changed})
+        return merged
+
+    async def revise_startup(
+        self,
+        data: Dict,
+        previous_inputs: Dict,
+        previous_result: Dict,
+        progress: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_usage: Optional[Callable[[str, object], None]] = None,
+        prompts: Optional[Dict[str, str]] = None,
+        user_key: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        일부 항목만 바뀐 입력으로 이전 결과 고치기
+
+        바뀐 항목의 영향을 받는 단계만 다시 계산합니다 (STAGE_INPUTS).
+        1. 명세서 초안: 메모에 같은 입력의 초안이 있으면 사용, 없으면 이전 초안에서 바뀐 섹션만 다시 작성
+        2. 상세 분석: 초안이 그대로면 이전 분석 사용, 바뀌었으면 바뀐 초안 섹션의 영향을 받는 섹션만 다시 작성
+        처리 시간은 bot_stage_duration_seconds{stage="pipeline_revise"} 와 'pipeline.revise' 구간으로 기록합니다.
+
+        Args:
+            data (Dict): 수정한 입력 데이터
+            previous_inputs: 이전 결과를 만든 입력 데이터
+            previous_result: 이전 결과 (summary 와 분석 섹션)
+            progress: 단계가 바뀔 때 호출할 코루틴 함수 ('revise_summary' / 'revise_analysis')
+            on_usage: 모델 호출마다 (모델 이름, 응답의 usage) 로 호출할 함수
+            prompts: 단계별로 기본 대신 사용할 시스템 프롬프트 ('summary' / 'analysis')
+            user_key: 단계 결과 메모를 구분할 사용자 키
+
+        Returns:
+            analyze_startup 과 같은 형식의 결과 (실패 시 None)
+        """
+        changed_fields = [
+            field for field in FORM_FIELDS
+            if str(data.get(field, '')).strip() != str(previous_inputs.get(field, '')).strip()
+        ]
+        try:
+            with track('pipeline_revise'), span('pipeline.revise', fields=','.join(changed_fields)) as current:
+                previous_summary = previous_result.get('summary', '')
+                previous_analysis = self._analysis_text(previous_result)
+
+                summary_system = self._system('summary', prompts)
+                summary_key = self.memo.key('summary', self.model, summary_system, data, user_key)
+                summary = self.memo.get('summary', summary_key)
+                if summary is None:
+                    if progress:
+                        await progress('revise_summary')
+                    changes = '\n'.join(
+                        f"- {self.field_labels.get(field, field)}: {previous_inputs.get(field, '')} → {data.get(field, '')}"
+                        for field in changed_fields
+                    )
+                    summary = await self._revise(
+                        'summary', summary_system, previous_summary,
+                        f"바뀐 입력:\n{changes}\n\n전체 입력:\n"
+                        + self.summary_prompt.messages[1].prompt.template.format(**data),
+                        on_usage
+                    )
+                    self.memo.put(summary_key, summary)
+
+                # 상세 분석은 초안에만 의존하므로 초안이 그대로면 다시 하지 않음
+                previous_sections = dict(split_sections(previous_summary))
+                changed_sections = [
+                    (heading, lines) for heading, lines in split_sections(summary)
+                    if previous_sections.get(heading) != lines
+                ]
+                current.set(summary_sections_changed=len(changed_sections))
+                if not changed_sections:
+                    analysis = previous_analysis
+                else:
+                    analysis_system = self._system('analysis', prompts)
+                    analysis = await self._memoized(
+                        'analysis', analysis_system, {'summary': summary},
+                        lambda: self._revise_analysis(
+                            analysis_system, previous_analysis, changed_sections, progress, on_usage
+                        ),
+                        user_key
+                    )
+
+            analysis_result = {'summary': summary, **self._parse_analysis(analysis)}
+            analysis_result.update({key: data.get(key, '') for key in FORM_FIELDS})
+            return analysis_result
+
+        except Exception as e:
+            record_error('analyze', e)
+            logger.exception("분석 수정 중 오류 발생")
+            return None
+
+    async def _revise_analysis(self, system: str, previous: str, changed_sections, progress=None, on_usage=None) -> str:
+        """바뀐 초안 섹션을 주고 이전 상세 분석 고치기"""
+        if progress:
+            await progress('revise_analysis')
+        return await self._revise(
+            'analysis', system, previous,
+            f"바뀐 명세서 초안 섹션:\n{join_sections(changed_sections)}",
+            on_usage
+        )
+
+    async def _analyze_single(self, data: Dict, progress=None, on_usage=None, prompts=None) -> Dict:
+        """한 번 호출 방식: 초안과 분석을 구조화된 응답 하나로 생성"""
+        if progress:
+            await progress('report')
+        return await self._get_report(data, on_usage, (prompts or {}).get('report'))
+
+    async def analyze_startup(
+        self,
+        data: Dict,
+        progress: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_usage: Optional[Callable[[str, object], None]] = None,
+        prompts: Optional[Dict[str, str]] = None,
+        summary_only: bool = False,
+        user_key: Optional[str] = None,
+        fresh: bool = False
+    ) -> Optional[Dict]:
+        """
+        스타트업 분석 수행
+
+        PIPELINE_MODE 에 따라 두 단계 또는 한 번 호출로 분석하며, 결과 형식은 같습니다.
+        방식별 전체 처리 시간은 bot_stage_duration_seconds{stage="pipeline_<방식>"} 과
+        'pipeline.<방식>' 추적 구간으로, 토큰 사용량은 'model.<단계>' 구간 태그로 비교할 수 있습니다.
+        실행 중인 작업이 취소되면 진행 중인 API 요청도 함께 중단됩니다.
+
+        Args:
+            data (Dict): 사용자 입력 데이터
+            progress: 단계가 바뀔 때 호출할 코루틴 함수 ('summary' / 'analysis', 한 번 호출 방식은 'report')
+            on_usage: 모델 호출마다 (모델 이름, 응답의 usage) 로 호출할 함수
+            prompts: 단계별로 기본 대신 사용할 시스템 프롬프트 ('summary' / 'analysis' / 'report')
+            summary_only: True 이면 명세서 초안만 작성 (과부하 시, 결과에 partial 표시)
+            user_key: 단계 결과 메모를 구분할 사용자 키 (다른 사용자의 메모는 사용하지 않음)
+            fresh: True 이면 메모된 단계 결과를 쓰지 않고 다시 분석 (사용자가 새로 분석하기를 고른 경우)
+        """
+        try:
+            mode = 'summary_only' if summary_only else self.pipeline_mode
+            with track(f'pipeline_{mode}'), span(f'pipeline.{mode}'):
+                if summary_only:
+                    analysis_result = await self._analyze_summary_only(
+                        data, progress, on_usage, prompts, user_key, fresh
+                    )
+                elif self.pipeline_mode == SINGLE:
+                    analysis_result = await self._analyze_single(data, progress, on_usage, prompts)
+                else:
+                    analysis_result = await self._analyze_two_stage(data, progress, on_usage, prompts, user_key, fresh)
+
             # 원본 입력 데이터를 결과에 포함
-            analysis_result.update({
-                'idea': data.get('idea', ''),
-                'problem': data.get('problem', ''),
-                'mechanism': data.get('mechanism', ''),
-                'difference': data.get('difference', ''),
-                'components': data.get('components', ''),
-                'effects': data.get('effects', ''),
-                'limitations': data.get('limitations', ''),
-                'industry': data.get('industry', ''),
-                'specifications': data.get('specifications', ''),
-                'status': data.get('status', '')
-            })
+            analysis_result.update({key: data.get(key, '') for key in FORM_FIELDS})
             
             return analysis_result
             
         except Exception as e:
-            print(f"분석 중 오류 발생: {e}")
+            record_error('analyze', e)
+            logger.exception("분석 중 오류 발생")
             return None
@@ -0,0 +1,282 @@
+"""
+이벤트 루프 지연 감시 모듈
+
+핸들러 안에서 동기 DB 호출처럼 오래 걸리는 작업을 실행하면
+그동안 이벤트 루프가 멈춰 다른 채팅의 업데이트도 모두 늦어집니다.
+이 모듈은 루프가 멈춘 시간과 멈추게 한 코드를 찾아 기록합니다.
+
+구성:
+1. 심장 박동: 루프에서 interval 마다 깨어나며 예정보다 늦게 깨어난 시간(지연)을 측정
+2. 감시 스레드: 심장 박동이 threshold 이상 멈추면 루프 스레드의 실행 중인 스택을 캡처
+3. 원인 추정: 캡처한 스택에서 실행 중인 태스크의 가장 바깥(처리 함수)과
+   가장 안쪽(멈춘 지점) 프로젝트 코드를 찾아 지표와 로그에 기록
+4. 샘플링 프로파일러 (선택): 루프 스레드 스택을 주기적으로 모아
+   flamegraph.pl / speedscope 에서 읽을 수 있는 접힌 스택(folded) 형식으로 저장
+
+지표:
+- bot_event_loop_lag_seconds: 루프 지연 분포
+- bot_event_loop_stalls_total{culprit}: threshold 를 넘은 지연 횟수 (멈춘 지점별)
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import Counter as Tally
+from typing import Dict, List, Optional
+
+import config
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# 프로젝트 코드 위치 (원인 추정 시 라이브러리 코드와 구분)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 로그에 남길 최대 스택 깊이
+STACK_LOG_DEPTH = 15
+
+# 프로파일 파일 저장 주기 (초)
+PROFILE_WRITE_INTERVAL = 10.0
+
+LOOP_LAG = REGISTRY.histogram(
+    'bot_event_loop_lag_seconds', '이벤트 루프 지연 (초)',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+LOOP_STALLS = REGISTRY.counter(
+    'bot_event_loop_stalls_total', '기준 시간을 넘은 이벤트 루프 지연 횟수', ['culprit']
+)
+
+
+def _is_project_frame(filename: str) -> bool:
+    return (
+        filename.startswith(PROJECT_ROOT)
+        and 'site-packages' not in filename
+        and filename != __file__
+    )
+
+
+def _frame_label(frame: traceback.FrameSummary) -> str:
+    """'모듈경로:함수' 형식 (프로젝트 코드는 상대 경로)"""
+    filename = frame.filename
+    if filename.startswith(PROJECT_ROOT):
+        filename = os.path.relpath(filename, PROJECT_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{frame.name}"
+
+
+def _task_frames(stack: List[traceback.FrameSummary]) -> List[traceback.FrameSummary]:
+    """루프 스택에서 현재 실행 중인 콜백/태스크에 해당하는 부분만 추출"""
+    for index in range(len(stack) - 1, -1, -1):
+        frame = stack[index]
+        if frame.name == '_run' and frame.filename.endswith(os.path.join('asyncio', 'events.py')):
+            return stack[index + 1:]
+    return stack
+
+
+def attribute(stack: List[traceback.FrameSummary]) -> Dict[str, str]:
+    """
+    스택으로 지연 원인 추정
+
+    Returns:
+        {'culprit': 멈춘 지점(가장 안쪽 프로젝트 함수), 'handler': 처리 중이던 함수(가장 바깥 프로젝트 함수)}
+    """
+    frames = _task_frames(stack)
+    project = [frame for frame in frames if _is_project_frame(frame.filename)]
+    if not project:
+        innermost = frames[-1] if frames else None
+        label = _frame_label(innermost) if innermost else 'unknown'
+        return {'culprit': label, 'handler': label}
+    return {'culprit': _frame_label(project[-1]), 'handler': _frame_label(project[0])}
+
+
+class LoopMonitor:
+    """
+    이벤트 루프 지연 감시
+
+    Args:
+        threshold: 멈춤으로 판단할 지연 시간 (초)
+        interval: 심장 박동 주기 (초)
+        log_interval: 같은 지점의 멈춤 로그를 다시 남기기까지의 최소 간격 (초)
+        profile_path: 샘플링 프로파일 저장 경로 (None 이면 프로파일링하지 않음)
+        profile_interval: 프로파일 샘플링 주기 (초)
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.25,
+        interval: float = 0.1,
+        log_interval: float = 60.0,
+        profile_path: Optional[str] = None,
+        profile_interval: float = 0.01
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.log_interval = log_interval
+        self.profile_path = profile_path
+        self.profile_interval = profile_interval
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+
+        # 마지막 심장 박동 시각과 감시 스레드가 캡처한 멈춤 정보
+        self._beat = time.perf_counter()
+        self._captured: Optional[dict] = None
+
+        # 지점별 마지막 로그 시각과 그사이 생략한 횟수
+        self._logged: Dict[str, List[float]] = {}
+
+        # 프로파일 (접힌 스택 -> 샘플 수)
+        self._profile = Tally()
+
+        # 통계
+        self.stalls = 0
+        self.max_lag = 0.0
+
+    async def start(self):
+        """감시 시작 (이벤트 루프 안에서 호출)"""
+        if self._heartbeat_task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stopping.clear()
+        self._beat = time.perf_counter()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat(), name="loop-monitor")
+
+        self._threads = [threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)]
+        if self.profile_path:
+            self._threads.append(threading.Thread(target=self._sample, name="loop-profiler", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    async def stop(self):
+        """감시 종료 (프로파일은 파일에 저장)"""
+        if self._heartbeat_task is None:
+            return
+        self._stopping.set()
+        self._heartbeat_task.cancel()
+        await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+        self._heartbeat_task = None
+        for thread in self._threads:
+            await asyncio.to_thread(thread.join, 2.0)
+        if self.profile_path:
+            await asyncio.to_thread(self.write_profile)
+
+    async def _heartbeat(self):
+        lag_histogram = LOOP_LAG.labels()
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            previous, self._beat = self._beat, now
+
+            lag = max(0.0, now - expected)
+            lag_histogram.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag >= self.threshold:
+                captured = self._captured
+                self._captured = None
+                if captured is None or captured['beat'] != previous:
+                    captured = None
+                self._report(lag, captured)
+
+    def _capture_stack(self) -> List[traceback.FrameSummary]:
+        frame = sys._current_frames().get(self._loop_thread)
+        return traceback.extract_stack(frame) if frame is not None else []
+
+    def _watch(self):
+        """감시 스레드: 심장 박동이 멈추면 루프 스레드 스택 캡처 (멈춤마다 한 번)"""
+        check_interval = min(self.interval, self.threshold) / 2
+        while not self._stopping.wait(check_interval):
+            beat = self._beat
+            stalled = time.perf_counter() - beat - self.interval
+            if stalled < self.threshold:
+                continue
+            if self._captured is not None and self._captured['beat'] == beat:
+                continue
+
+            stack = self._capture_stack()
+            task = asyncio.current_task(self._loop) if self._loop is not None else None
+            self._captured = {
+                'beat': beat,
+                'stack': stack,
+                'task': task.get_name() if task is not None else None,
+                **attribute(stack),
+            }
+
+    def _report(self, lag: float, captured: Optional[dict]):
+        """멈춤 기록 (지표는 항상, 로그는 지점별로 log_interval 마다 한 번)"""
+        culprit = captured['culprit'] if captured else 'unknown'
+        self.stalls += 1
+        LOOP_STALLS.labels(culprit).inc()
+
+        now = time.monotonic()
+        logged = self._logged.setdefault(culprit, [0.0, 0])
+        if now - logged[0] < self.log_interval:
+            logged[1] += 1
+            return
+        suppressed = logged[1]
+        self._logged[culprit] = [now, 0]
+
+        extra = {'lag': round(lag, 3), 'culprit': culprit, 'suppressed': suppressed}
+        if captured:
+            extra['handler'] = captured['handler']
+            extra['task'] = captured['task']
+            extra['stack'] = ''.join(traceback.format_list(_task_frames(captured['stack'])[-STACK_LOG_DEPTH:]))
+        logger.warning(
+            "이벤트 루프가 %.3f초 멈췄습니다: %s (처리 중: %s, 이전 로그 이후 %d회 더 발생)",
+            lag, culprit, extra.get('handler', 'unknown'), suppressed, extra=extra
+        )
+
+    def _sample(self):
+        """프로파일러 스레드: 루프 스레드 스택을 주기적으로 수집"""
+        last_written = time.monotonic()
+        while not self._stopping.wait(self.profile_interval):
+            stack = self._capture_stack()
+            if stack:
+                self._profile[';'.join(_frame_label(frame) for frame in stack)] += 1
+            if time.monotonic() - last_written >= PROFILE_WRITE_INTERVAL:
+                self.write_profile()
+                last_written = time.monotonic()
+
+    def write_profile(self):
+        """지금까지의 프로파일을 접힌 스택 형식으로 저장 (한 줄에 '스택 샘플수')"""
+        if not self.profile_path or not self._profile:
+            return
+        directory = os.path.dirname(os.path.abspath(self.profile_path))
+        os.makedirs(directory, exist_ok=True)
+        lines = [f"{stack} {count}\n" for stack, count in list(self._profile.items())]
+        temporary = f"{self.profile_path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as output:
+            output.writelines(lines)
+        os.replace(temporary, self.profile_path)
+
+    def stats(self) -> dict:
+        """감시 상태"""
+        return {
+            'running': self._heartbeat_task is not None,
+            'stalls': self.stalls,
+            'max_lag': round(self.max_lag, 3),
+            'threshold': self.threshold,
+        }
+
+
+def create_loop_monitor() -> Optional[LoopMonitor]:
+    """설정값으로 감시기 생성 (LOOP_MONITOR 가 꺼져 있으면 None)"""
+    if not config.LOOP_MONITOR:
+        return None
+    return LoopMonitor(
+        threshold=config.LOOP_LAG_THRESHOLD,
+        interval=config.LOOP_MONITOR_INTERVAL,
+        log_interval=config.LOOP_STALL_LOG_INTERVAL,
+        profile_path=config.LOOP_PROFILE_FILE or None,
+        profile_interval=config.LOOP_PROFILE_INTERVAL
+    )
@@ -0,0 +1,307 @@
+"""
+지표 수집 모듈
+
+처리 시간, 토큰 사용량, 오류 수 등을 메모리에 모아
+Prometheus 텍스트 형식(/metrics)으로 내보냅니다.
+
+지표 종류:
+1. Counter   : 계속 증가하는 값 (토큰 수, 오류 수)
+2. Gauge     : 현재 값 (진행 중인 분석 수, 대기열 길이) - 값을 직접 설정하거나 조회 함수 등록
+3. Histogram : 처리 시간 분포 (구간별 누적 개수, 합계, 개수)
+
+기록 비용을 줄이기 위해 라벨 조합별 객체를 한 번만 만들어 재사용하며,
+기록 시에는 잠금 하나와 덧셈 몇 번만 수행합니다.
+
+사용 예시:
+    with track('summary'):
+        response = await client.messages.create(...)
+    record_usage(model, response.usage)
+"""
+
+import time
+import asyncio
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 처리 시간 히스토그램 기본 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """지표 공통 (이름, 설명, 라벨별 값)"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """라벨 값 조합에 해당하는 기록 객체 (처음 요청할 때 생성 후 재사용)"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} 지표의 라벨은 {self.labelnames} 입니다.")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _Value:
+    """카운터/게이지 값 하나"""
+
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    """계속 증가하는 값"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        """라벨이 없는 카운터 증가"""
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """
+    현재 값
+
+    callback 을 지정하면 내보낼 때마다 호출해서 값을 얻습니다.
+    라벨이 있으면 callback 은 {라벨 값 튜플: 값} 을 반환해야 합니다.
+    """
+
+    kind = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], object]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        """라벨이 없는 게이지 값 설정"""
+        self.labels().set(value)
+
+    def render(self) -> List[str]:
+        if self.callback is None:
+            return super().render()
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        value = self.callback()
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for key, item in items:
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(item)}")
+        return lines
+
+
+class _HistogramValue:
+    """히스토그램 값 하나 (구간별 개수, 합계)"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """처리 시간 분포"""
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def _render_child(self, key, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    """지표 목록과 Prometheus 텍스트 변환"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """지표 등록 (같은 이름이 있으면 새 지표로 교체)"""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], object]] = None
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식으로 변환"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} 수집 실패: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+# 전역 지표 목록
+REGISTRY = Registry()
+
+# 단계별 처리 시간 (summary, analysis, save_analysis, telegram_send, handler_dispatch)
+STAGE_LATENCY = REGISTRY.histogram(
+    'bot_stage_duration_seconds', '단계별 처리 시간 (초)', ['stage']
+)
+
+# 모델별 토큰 사용량 (direction: input / output)
+MODEL_TOKENS = REGISTRY.counter(
+    'bot_model_tokens_total', '모델별 입력/출력 토큰 수', ['model', 'direction']
+)
+
+# 단계별 오류 수 (type: 예외 클래스 이름)
+ERRORS = REGISTRY.counter(
+    'bot_errors_total', '단계별 오류 수', ['stage', 'type']
+)
+
+
+class track:
+    """
+    단계 처리 시간 기록 (with 문)
+
+    예외가 발생하면 오류 수도 함께 기록합니다 (작업 취소는 오류로 세지 않음).
+    """
+
+    __slots__ = ('stage', 'histogram', 'started_at')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.histogram = STAGE_LATENCY.labels(stage)
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started_at)
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            ERRORS.labels(self.stage, exc_type.__name__).inc()
+        return False
+
+
+def record_error(stage: str, error: BaseException):
+    """처리 중 잡은 예외를 오류 수에 기록"""
+    ERRORS.labels(stage, type(error).__name__).inc()
+
+
+def record_usage(model: str, usage) -> None:
+    """모델 응답의 토큰 사용량 기록"""
+    if usage is None:
+        return
+    MODEL_TOKENS.labels(model, 'input').inc(getattr(usage, 'input_tokens', 0) or 0)
+    MODEL_TOKENS.labels(model, 'output').inc(getattr(usage, 'output_tokens', 0) or 0)
@@ -0,0 +1,186 @@
+"""
+과부하 제어 모듈
+
+모델 응답이 느려지거나 분석이 밀리면 모든 사용자가 똑같이 오래 기다리다 떠나게 되므로,
+부하에 따라 분석 수준을 단계적으로 낮춰 응답 시간을 일정 범위 안에 묶어 둡니다.
+
+단계 (tier):
+0. full: 평소대로 분석 (PIPELINE_MODE)
+1. summary_only: 명세서 초안만 작성 (상세 분석 생략, 모델 호출 1회)
+2. cached_only: 새로 분석하지 않고 같은 입력의 메모된 결과나 비슷한 이전 결과가 있을 때만 전송
+3. reject: 다시 시도할 시간을 안내하고 받지 않음
+
+신호:
+- 진행 중인 분석 수 (실행 순서 대기 + 실행 중)
+- 최근 분석 시간 (analyze_startup 소요 시간의 p90, 최근 latency_window 건)
+신호마다 summary_only / cached_only / reject 로 올라가는 기준값 3개를 두고,
+둘 중 높은 단계로 바로 올라갑니다. 내려갈 때는 cooldown 동안 더 낮은 단계에 머물러야
+한 단계씩 내려갑니다 (단계가 자주 바뀌지 않도록).
+
+cached_only / reject 단계에서는 새 분석이 거의 끝나지 않아 분석 시간 기록이 갱신되지 않으므로,
+cooldown 동안 끝난 분석이 없으면 분석 시간 신호는 오래된 값으로 보고 진행 중인 분석 수만으로 단계를 정합니다
+(부하가 풀려도 오래된 p90 때문에 latency_max_age 가 지날 때까지 높은 단계에 머물지 않도록).
+
+지표:
+- bot_overload_tier: 현재 단계 (0~3)
+- bot_overload_transitions_total{from_tier, to_tier}: 단계 변경 횟수
+- bot_overload_shed_total{tier}: 단계 때문에 낮춘 (또는 거절한) 분석 요청 수
+- bot_overload_latency_p90_seconds: 최근 분석 시간 p90 (단계 결정에 쓰는 값, 오래된 기록뿐이면 0)
+"""
+
+import time
+import logging
+from collections import deque
+from typing import Callable, Deque, Optional, Sequence, Tuple
+
+import config
+from services.admission import admission
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# 단계
+FULL = 0
+SUMMARY_ONLY = 1
+CACHED_ONLY = 2
+REJECT = 3
+TIER_NAMES = ('full', 'summary_only', 'cached_only', 'reject')
+
+TRANSITIONS = REGISTRY.counter(
+    'bot_overload_transitions_total', '과부하 단계 변경 횟수', ['from_tier', 'to_tier']
+)
+SHED = REGISTRY.counter(
+    'bot_overload_shed_total', '과부하 단계 때문에 낮추거나 거절한 분석 요청 수', ['tier']
+)
+
+
+class OverloadController:
+    """
+    과부하 단계 결정
+
+    Args:
+        depth: 진행 중인 분석 수를 돌려주는 함수
+        depth_levels: summary_only / cached_only / reject 로 올라가는 진행 중인 분석 수
+        latency_levels: summary_only / cached_only / reject 로 올라가는 최근 분석 시간 p90 (초)
+        cooldown: 한 단계 내려가기 전에 더 낮은 단계에 머물러야 하는 시간 (초)
+        latency_window: 분석 시간 p90 을 계산할 최근 건수
+        latency_max_age: 이보다 오래된 분석 시간은 계산에서 제외 (초)
+            (cooldown 동안 끝난 분석이 없으면 분석 시간 신호 자체를 쓰지 않음)
+        enabled: False 이면 신호만 기록하고 항상 full
+    """
+
+    def __init__(
+        self,
+        depth: Callable[[], int],
+        depth_levels: Sequence[float] = (16, 32, 64),
+        latency_levels: Sequence[float] = (60, 120, 180),
+        cooldown: float = 60.0,
+        latency_window: int = 50,
+        latency_max_age: float = 300.0,
+        enabled: bool = True
+    ):
+        if len(depth_levels) != 3 or len(latency_levels) != 3:
+            raise ValueError("과부하 기준값은 summary_only, cached_only, reject 순서로 3개여야 합니다.")
+        self.depth = depth
+        self.depth_levels = tuple(depth_levels)
+        self.latency_levels = tuple(latency_levels)
+        self.cooldown = cooldown
+        self.latency_max_age = latency_max_age
+        self.enabled = enabled
+
+        self._latencies: Deque[Tuple[float, float]] = deque(maxlen=latency_window)
+        self.current = FULL
+        self._calm_since: Optional[float] = None
+        self.changed_at = time.monotonic()
+
+    def observe(self, seconds: float, now: Optional[float] = None):
+        """분석 한 건의 소요 시간 기록"""
+        self._latencies.append((time.monotonic() if now is None else now, seconds))
+
+    def latency_p90(self, now: Optional[float] = None) -> float:
+        """최근 분석 시간 p90 (기록이 3건 미만이거나 cooldown 동안 끝난 분석이 없으면 0)"""
+        now = time.monotonic() if now is None else now
+        if not self._latencies or now - self._latencies[-1][0] > self.cooldown:
+            return 0.0
+        recent = sorted(seconds for at, seconds in self._latencies if now - at <= self.latency_max_age)
+        if len(recent) < 3:
+            return 0.0
+        return recent[min(len(recent) - 1, int(len(recent) * 0.9))]
+
+    @staticmethod
+    def _level(value: float, levels: Sequence[float]) -> int:
+        return sum(1 for level in levels if level > 0 and value >= level)
+
+    def target(self, now: Optional[float] = None) -> int:
+        """지금 신호만으로 정한 단계"""
+        return max(
+            self._level(self.depth(), self.depth_levels),
+            self._level(self.latency_p90(now), self.latency_levels)
+        )
+
+    def _move(self, tier: int, now: float):
+        logger.warning(
+            "과부하 단계 변경: %s -> %s", TIER_NAMES[self.current], TIER_NAMES[tier],
+            extra={'depth': self.depth(), 'latency_p90': round(self.latency_p90(now), 2)}
+        )
+        TRANSITIONS.labels(TIER_NAMES[self.current], TIER_NAMES[tier]).inc()
+        self.current = tier
+        self.changed_at = now
+
+    def tier(self, now: Optional[float] = None) -> int:
+        """현재 단계 (신호를 확인해 필요하면 단계 변경)"""
+        if not self.enabled:
+            return FULL
+        now = time.monotonic() if now is None else now
+        target = self.target(now)
+        if target > self.current:
+            self._calm_since = None
+            self._move(target, now)
+        elif target < self.current:
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.cooldown:
+                self._calm_since = now
+                self._move(self.current - 1, now)
+        else:
+            self._calm_since = None
+        return self.current
+
+    def shed(self, tier: int):
+        """단계 때문에 분석 수준을 낮추거나 거절한 요청 기록"""
+        SHED.labels(TIER_NAMES[tier]).inc()
+
+    def retry_after(self) -> float:
+        """거절할 때 안내할 다시 시도 시간 (초, 한 단계 내려갈 수 있는 가장 빠른 시점과 최근 분석 시간 p90 중 긴 쪽)"""
+        return max(self.cooldown, self.latency_p90())
+
+    def stats(self) -> dict:
+        """과부하 상태"""
+        return {
+            'enabled': self.enabled,
+            'tier': TIER_NAMES[self.current],
+            'target': TIER_NAMES[self.target()],
+            'depth': self.depth(),
+            'latency_p90': round(self.latency_p90(), 3),
+            'seconds_in_tier': round(time.monotonic() - self.changed_at, 1),
+        }
+
+
+def analyses_in_progress() -> int:
+    """모든 봇의 진행 중인 분석 수 (실행 순서 대기 + 실행 중)"""
+    return sum(admission.waiting().values()) + sum(admission.running().values())
+
+
+# 모든 봇이 함께 사용하는 과부하 제어
+overload = OverloadController(
+    analyses_in_progress,
+    depth_levels=config.OVERLOAD_DEPTH_LEVELS,
+    latency_levels=config.OVERLOAD_LATENCY_LEVELS,
+    cooldown=config.OVERLOAD_COOLDOWN,
+    latency_window=config.OVERLOAD_LATENCY_WINDOW,
+    latency_max_age=config.OVERLOAD_LATENCY_MAX_AGE,
+    enabled=config.OVERLOAD_CONTROL
+)
+
+REGISTRY.gauge('bot_overload_tier', '과부하 단계 (0 full, 1 summary_only, 2 cached_only, 3 reject)', callback=lambda: overload.current)
+REGISTRY.gauge('bot_overload_latency_p90_seconds', '최근 분석 시간 p90 (초)', callback=overload.latency_p90)
@@ -0,0 +1,199 @@
+"""
+유사 제출물 인덱스 모듈
+
+같은 발명을 문구만 조금 바꿔 다시 제출하는 경우를 찾아
+이전 분석 결과를 바로 재사용할 수 있게 합니다.
+
+동작 방식:
+1. 입력 항목을 정규화한 뒤 문자 3-gram 으로 슁글링
+2. MinHash 시그니처 생성 후 LSH 밴드 버킷에 등록
+3. 조회 시 같은 버킷의 후보만 골라 실제 Jaccard 유사도로 검증
+
+인덱스는 메모리에만 유지되며, 저장된 분석이 추가될 때마다 갱신되고
+시작 시 최근 분석 결과로 다시 채워집니다.
+다른 사용자의 발명 내용이 노출되지 않도록 같은 사용자 안에서만 매칭합니다.
+"""
+
+import re
+import time
+import calendar
+import zlib
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+# MinHash 해시 계산용 메르센 소수
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# 한글/영문/숫자만 남기는 정규화 패턴
+_NON_WORD = re.compile(r'[^0-9a-z가-힣]+')
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH 기반 유사 제출물 인덱스
+
+    Args:
+        fields: 비교에 사용할 입력 항목 키 목록
+        threshold: 재사용으로 판단할 최소 Jaccard 유사도
+        num_perm: MinHash 순열 개수 (bands * rows)
+        bands: LSH 밴드 개수
+        shingle_size: 문자 n-gram 길이
+        capacity: 유지할 최대 항목 수 (초과 시 오래된 것부터 제거)
+        max_age: 재사용 가능한 결과의 최대 나이 (초)
+    """
+
+    def __init__(
+        self,
+        fields: Iterable[str],
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        capacity: int = 2000,
+        max_age: float = 72 * 3600,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm 은 bands 의 배수여야 합니다.")
+
+        self.fields = tuple(fields)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.capacity = capacity
+        self.max_age = max_age
+
+        # 고정 시드로 순열 계수 생성 (프로세스마다 같은 시그니처)
+        rng = random.Random(1234)
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+        self._entries = OrderedDict()  # key -> entry
+        self._buckets = {}             # (telegram_id, band, band_hash) -> set(key)
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    def _normalize(self, input_data: Dict) -> str:
+        parts = []
+        for field in self.fields:
+            value = input_data.get(field) or ''
+            parts.append(_NON_WORD.sub(' ', str(value).lower()).strip())
+        return ' | '.join(parts)
+
+    def _shingles(self, text: str) -> frozenset:
+        size = self.shingle_size
+        if len(text) <= size:
+            return frozenset([text]) if text else frozenset()
+        return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+    def _signature(self, shingles: frozenset) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles]
+        if not hashes:
+            return tuple([_MAX_HASH] * len(self._perms))
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def _bucket_keys(self, telegram_id: str, signature: Tuple[int, ...]):
+        rows = self.rows
+        for band in range(self.bands):
+            yield (telegram_id, band, hash(signature[band * rows:(band + 1) * rows]))
+
+    def _remove(self, key: int):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for bucket_key in entry['buckets']:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+    def add(self, telegram_id, input_data: Dict, result: Dict, created_at: float = None):
+        """분석 결과를 인덱스에 추가 (과부하로 일부만 작성한 결과는 재사용하지 않으므로 제외)"""
+        if not input_data or not result or result.get('partial'):
+            return
+
+        telegram_id = str(telegram_id)
+        shingles = self._shingles(self._normalize(input_data))
+        if not shingles:
+            return
+        signature = self._signature(shingles)
+        buckets = list(self._bucket_keys(telegram_id, signature))
+
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = {
+                'telegram_id': telegram_id,
+                'shingles': shingles,
+                'buckets': buckets,
+                'result': result,
+                'created_at': created_at if created_at is not None else time.time(),
+            }
+            for bucket_key in buckets:
+                self._buckets.setdefault(bucket_key, set()).add(key)
+
+            while len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
+
+    def find(self, telegram_id, input_data: Dict) -> Optional[Tuple[float, Dict]]:
+        """
+        가장 유사한 이전 분석 결과 조회
+
+        Returns:
+            (유사도, 분석 결과) 또는 임계값 이상의 결과가 없으면 None
+        """
+        telegram_id = str(telegram_id)
+        shingles = self._shingles(self._normalize(input_data))
+        if not shingles:
+            return None
+        signature = self._signature(shingles)
+        oldest = time.time() - self.max_age
+
+        with self._lock:
+            candidates = set()
+            for bucket_key in self._bucket_keys(telegram_id, signature):
+                candidates.update(self._buckets.get(bucket_key, ()))
+
+            best = None
+            for key in candidates:
+                entry = self._entries[key]
+                if entry['created_at'] < oldest:
+                    continue
+                union = len(shingles | entry['shingles'])
+                similarity = len(shingles & entry['shingles']) / union if union else 0.0
+                if similarity >= self.threshold and (best is None or similarity > best[0]
+                                                     or (similarity == best[0] and key > best[2])):
+                    best = (similarity, entry['result'], key)
+
+        if best is None:
+            return None
+        return best[0], best[1]
+
+    def warm(self, rows: Iterable[Dict]):
+        """저장된 분석 결과로 인덱스 채우기 (오래된 것부터 전달)"""
+        count = 0
+        for row in rows:
+            created_at = row.get('created_at')
+            # 저장소의 created_at 은 UTC 기준
+            if isinstance(created_at, str):
+                try:
+                    created_at = calendar.timegm(time.strptime(created_at[:19], '%Y-%m-%d %H:%M:%S'))
+                except ValueError:
+                    created_at = None
+            elif created_at is not None and hasattr(created_at, 'timetuple'):
+                created_at = calendar.timegm(created_at.timetuple())
+            self.add(row.get('telegram_id'), row.get('input_data') or {}, row.get('result') or {}, created_at)
+            count += 1
+        return count
+
+    def __len__(self):
+        return len(self._entries)
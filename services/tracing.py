@@ -0,0 +1,282 @@
+"""
+요청 추적 모듈
+
+텔레그램 업데이트 하나가 일으킨 작업(핸들러 단계, 모델 호출, 저장)을
+같은 trace_id 로 묶어 구간(span)별 처리 시간을 기록합니다.
+
+동작 방식:
+1. 업데이트 처리를 시작할 때 최상위 구간을 열면 새 trace_id 가 만들어짐
+2. 안쪽에서 연 구간은 현재 구간을 부모로 가짐 (contextvars 로 전달)
+3. asyncio.create_task, asyncio.to_thread 는 현재 컨텍스트를 복사하므로
+   분석 작업 태스크나 스레드에서 연 구간도 같은 trace 에 속함
+   (run_in_executor 나 직접 만든 스레드는 wrap() 으로 감싸서 넘김)
+4. 끝난 구간은 TRACE_EXPORT 설정에 따라 파일 또는 Zipkin 수집기로 내보냄
+
+내보내는 형식은 Zipkin v2 JSON 이며, 파일은 한 줄에 구간 하나씩 기록합니다.
+내보내기를 끄더라도 trace_id 는 만들어져 로그와 분석 결과에 남습니다.
+
+사용 예시:
+    with span('model.summary', model=self.model) as current:
+        response = await client.messages.create(...)
+        current.set(output_tokens=response.usage.output_tokens)
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+import urllib.request
+from functools import wraps
+from typing import Callable, List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# 현재 구간
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """
+    처리 구간 하나 (with 문으로 사용)
+
+    부모 구간이 없으면 새 trace 를 시작합니다.
+    예외로 끝나면 error 태그에 예외 클래스 이름을 남깁니다 (작업 취소 포함).
+    """
+
+    __slots__ = (
+        'name', 'trace_id', 'span_id', 'parent_id', 'sampled',
+        'attributes', 'timestamp', 'duration', '_started_at', '_token'
+    )
+
+    def __init__(self, name: str, **attributes):
+        parent = _current_span.get()
+        self.name = name
+        self.span_id = _new_id(64)
+        if parent is None:
+            self.trace_id = _new_id(128)
+            self.parent_id = None
+            self.sampled = random.random() < config.TRACE_SAMPLE_RATE
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.sampled = parent.sampled
+        self.attributes = attributes
+        self.timestamp = 0.0
+        self.duration = 0.0
+        self._started_at = 0.0
+        self._token = None
+
+    def set(self, **attributes):
+        """태그 추가"""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> 'Span':
+        self.timestamp = time.time()
+        self._started_at = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._started_at
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        if self.sampled and _exporter is not None:
+            _exporter.export(self)
+        return False
+
+    def to_zipkin(self) -> dict:
+        """Zipkin v2 JSON 형식으로 변환"""
+        data = {
+            'traceId': self.trace_id,
+            'id': self.span_id,
+            'name': self.name,
+            'timestamp': int(self.timestamp * 1_000_000),
+            'duration': max(1, int(self.duration * 1_000_000)),
+            'localEndpoint': {'serviceName': config.TRACE_SERVICE_NAME},
+            'tags': {key: str(value) for key, value in self.attributes.items() if value is not None},
+        }
+        if self.parent_id:
+            data['parentId'] = self.parent_id
+        return data
+
+
+def span(name: str, **attributes) -> Span:
+    """구간 열기 (with span('이름', 태그=값): ...)"""
+    return Span(name, **attributes)
+
+
+def traced(name: Optional[str] = None):
+    """코루틴 함수 전체를 구간으로 기록하는 데코레이터 (이름 미지정 시 함수 이름)"""
+    def decorator(func: Callable):
+        span_name = name or func.__name__
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with Span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    """현재 구간 (없으면 None)"""
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """현재 trace_id (구간 밖이면 None)"""
+    current = _current_span.get()
+    return current.trace_id if current is not None else None
+
+
+def wrap(func: Callable) -> Callable:
+    """현재 컨텍스트를 유지한 채 다른 스레드에서 실행할 함수로 감쌈"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+class SpanExporter:
+    """
+    끝난 구간을 모아서 백그라운드 스레드로 내보냄
+
+    호출한 쪽에서는 큐에 넣기만 하며, 큐가 가득 차면 해당 구간을 버립니다.
+
+    Args:
+        write: 구간 목록(Zipkin JSON)을 받아 기록하는 함수 (백그라운드 스레드에서 호출)
+        batch_size: 한 번에 내보낼 최대 구간 수
+        interval: 모인 구간을 내보내는 주기 (초)
+    """
+
+    def __init__(self, write: Callable[[List[dict]], None], batch_size: int = 100, interval: float = 1.0):
+        self.write = write
+        self.batch_size = batch_size
+        self.interval = interval
+        self.exported = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._loop, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, finished: Span):
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            self.dropped += 1
+
+    def _loop(self):
+        while True:
+            batch = []
+            stop = False
+            try:
+                item = self._queue.get(timeout=self.interval)
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    item = self._queue.get_nowait()
+                stop = item is None
+            except queue.Empty:
+                pass
+
+            if batch:
+                try:
+                    self.write([item.to_zipkin() for item in batch])
+                    self.exported += len(batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    logger.warning("추적 구간 내보내기 실패 (%d건 버림): %s", len(batch), e)
+            if stop:
+                return
+
+    def close(self, timeout: float = 5.0):
+        """남은 구간을 내보내고 종료"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+def file_writer(path: str) -> Callable[[List[dict]], None]:
+    """구간을 JSON 한 줄씩 파일에 추가하는 함수"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    def write(spans: List[dict]):
+        with open(path, 'a', encoding='utf-8') as output:
+            for item in spans:
+                output.write(json.dumps(item, ensure_ascii=False) + '\n')
+    return write
+
+
+def zipkin_writer(url: str, timeout: float = 5.0) -> Callable[[List[dict]], None]:
+    """구간을 Zipkin 수집기(/api/v2/spans)로 보내는 함수"""
+    def write(spans: List[dict]):
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(spans).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+    return write
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def setup_tracing(export: Optional[str] = None, write: Optional[Callable[[List[dict]], None]] = None):
+    """
+    구간 내보내기 설정 (프로세스마다 한 번 호출)
+
+    Args:
+        export: 'file' / 'zipkin' / '' (미지정 시 config.TRACE_EXPORT)
+        write: 구간 목록을 직접 받을 함수 (지정하면 export 무시, 재생 도구 등에서 사용)
+    """
+    global _exporter
+    if _exporter is not None:
+        return
+
+    if write is None:
+        export = (config.TRACE_EXPORT if export is None else export).lower()
+        if not export:
+            return
+        if export == 'file':
+            write = file_writer(config.TRACE_FILE)
+        elif export == 'zipkin':
+            if not config.TRACE_ZIPKIN_URL:
+                raise ValueError("TRACE_EXPORT=zipkin 이면 TRACE_ZIPKIN_URL 이 필요합니다.")
+            write = zipkin_writer(config.TRACE_ZIPKIN_URL)
+        else:
+            raise ValueError(f"지원하지 않는 TRACE_EXPORT 입니다: {export}")
+
+    _exporter = SpanExporter(write)
+    atexit.register(stop_tracing)
+
+
+def stop_tracing():
+    """남은 구간을 모두 내보내고 내보내기 종료"""
+    global _exporter
+    if _exporter is not None:
+        _exporter.close()
+        _exporter = None
+
+
+def exporter_stats() -> dict:
+    """내보내기 상태"""
+    if _exporter is None:
+        return {'enabled': False}
+    return {'enabled': True, 'exported': _exporter.exported, 'dropped': _exporter.dropped}
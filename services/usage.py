@@ -0,0 +1,233 @@
+"""
+모델 사용량/비용 집계 모듈
+
+모델 호출마다 응답의 usage(입력/출력 토큰)를 받아 비용을 계산하고,
+사용자별/일별로 메모리에 모았다가 주기적으로 데이터베이스(model_usage)에 한 번에 기록합니다.
+
+예산:
+- USER_DAILY_BUDGET_USD: 사용자 한 명의 하루 비용 한도
+- GLOBAL_DAILY_BUDGET_USD: 전체 사용자의 하루 비용 한도
+- 봇별 하루 한도: 여러 봇을 함께 실행할 때 BOTS_CONFIG 의 daily_budget_usd
+(0 이면 제한 없음, 날짜는 UTC 기준)
+
+사용자 키가 '봇이름:사용자ID' 형식이면 해당 봇의 사용량으로도 집계합니다.
+
+여러 작업 프로세스로 나눠 실행하는 경우에도 기록할 때마다 데이터베이스의
+오늘 합계를 다시 읽어오므로, 한도 판단은 기록 주기만큼만 늦어집니다.
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import config
+from database import add_usage, get_daily_usage, get_top_usage
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# 모델별/봇별 비용 (USD)
+MODEL_COST = REGISTRY.counter('bot_model_cost_usd_total', '모델별 누적 비용 (USD)', ['model', 'tenant'])
+
+# 한도 초과 종류
+USER_BUDGET = 'user'
+TENANT_BUDGET = 'tenant'
+GLOBAL_BUDGET = 'global'
+
+# 봇 이름이 없는 사용자 키의 봇 (BOTS_CONFIG 없이 실행하는 기본 봇)
+DEFAULT_TENANT = 'default'
+
+
+def tenant_of(user_key) -> str:
+    """사용자 키가 속한 봇 이름 ('봇이름:사용자ID' 형식이 아니면 기본 봇)"""
+    name, separator, _ = str(user_key).rpartition(':')
+    return name if separator else DEFAULT_TENANT
+
+
+def utc_day(offset_days: int = 0) -> str:
+    """UTC 기준 날짜 (YYYY-MM-DD)"""
+    return (datetime.now(timezone.utc) + timedelta(days=offset_days)).strftime('%Y-%m-%d')
+
+
+class UsageLedger:
+    """
+    사용자별/일별 사용량 집계 및 예산 확인
+
+    Args:
+        input_price: 입력 토큰 100만 개당 비용 (USD)
+        output_price: 출력 토큰 100만 개당 비용 (USD)
+        user_budget: 사용자별 하루 한도 (USD, 0 이면 제한 없음)
+        global_budget: 전체 하루 한도 (USD, 0 이면 제한 없음)
+        flush_interval: 데이터베이스 기록 주기 (초)
+    """
+
+    def __init__(
+        self,
+        input_price: float,
+        output_price: float,
+        user_budget: float = 0.0,
+        global_budget: float = 0.0,
+        flush_interval: float = 10.0
+    ):
+        self.input_price = input_price
+        self.output_price = output_price
+        self.user_budget = user_budget
+        self.global_budget = global_budget
+        self.flush_interval = flush_interval
+
+        # 모델 호출 콜백은 이벤트 루프, 기록은 스레드에서 실행되므로 잠금으로 보호
+        self._lock = threading.Lock()
+        # 아직 기록하지 않은 증가분: (사용자 ID, 날짜) -> [호출 수, 입력 토큰, 출력 토큰, 비용]
+        self._pending: Dict[Tuple[str, str], list] = {}
+        # 오늘의 사용자별 비용 (데이터베이스 합계 + 기록 대기분)
+        self._day = utc_day()
+        self._today: Dict[str, float] = {}
+
+        # 통계
+        self.rejected = {USER_BUDGET: 0, TENANT_BUDGET: 0, GLOBAL_BUDGET: 0}
+
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        """토큰 수로 비용 계산 (USD)"""
+        return (input_tokens * self.input_price + output_tokens * self.output_price) / 1_000_000
+
+    def _roll_day(self, day: str):
+        if day != self._day:
+            self._day = day
+            self._today = {}
+
+    def record(self, user_id, model: str, usage) -> float:
+        """
+        모델 호출 한 번의 사용량 기록
+
+        Returns:
+            이번 호출 비용 (USD)
+        """
+        input_tokens = getattr(usage, 'input_tokens', 0) or 0
+        output_tokens = getattr(usage, 'output_tokens', 0) or 0
+        cost = self.cost(input_tokens, output_tokens)
+        user = str(user_id)
+        day = utc_day()
+
+        with self._lock:
+            self._roll_day(day)
+            entry = self._pending.setdefault((user, day), [0, 0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += input_tokens
+            entry[2] += output_tokens
+            entry[3] += cost
+            self._today[user] = self._today.get(user, 0.0) + cost
+
+        MODEL_COST.labels(model, tenant_of(user)).inc(cost)
+        return cost
+
+    def spent_today(self, user_id=None) -> float:
+        """오늘 사용한 비용 (user_id 미지정 시 전체)"""
+        with self._lock:
+            self._roll_day(utc_day())
+            if user_id is None:
+                return sum(self._today.values())
+            return self._today.get(str(user_id), 0.0)
+
+    def spent_by_tenant(self) -> Dict[str, float]:
+        """오늘 봇별 사용한 비용"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            self._roll_day(utc_day())
+            for user, cost in self._today.items():
+                tenant = tenant_of(user)
+                totals[tenant] = totals.get(tenant, 0.0) + cost
+        return totals
+
+    def check(self, user_id, tenant_budget: float = 0.0) -> Optional[str]:
+        """
+        분석 시작 전 예산 확인
+
+        Args:
+            user_id: 사용자 키 (여러 봇을 실행하면 '봇이름:사용자ID')
+            tenant_budget: 사용자가 속한 봇의 하루 한도 (0 이면 제한 없음)
+
+        Returns:
+            한도를 넘었으면 USER_BUDGET / TENANT_BUDGET / GLOBAL_BUDGET, 아니면 None
+        """
+        if self.global_budget > 0 and self.spent_today() >= self.global_budget:
+            self.rejected[GLOBAL_BUDGET] += 1
+            return GLOBAL_BUDGET
+        if tenant_budget > 0 and self.spent_by_tenant().get(tenant_of(user_id), 0.0) >= tenant_budget:
+            self.rejected[TENANT_BUDGET] += 1
+            return TENANT_BUDGET
+        if self.user_budget > 0 and self.spent_today(user_id) >= self.user_budget:
+            self.rejected[USER_BUDGET] += 1
+            return USER_BUDGET
+        return None
+
+    def load(self):
+        """데이터베이스에서 오늘 합계 불러오기 (기록 대기분 포함)"""
+        day = utc_day()
+        stored = get_daily_usage(day)
+        with self._lock:
+            self._roll_day(day)
+            today = {str(user): float(cost) for user, cost in stored.items()}
+            for (user, pending_day), entry in self._pending.items():
+                if pending_day == day:
+                    today[user] = today.get(user, 0.0) + entry[3]
+            self._today = today
+
+    def flush(self):
+        """모아둔 사용량을 데이터베이스에 기록하고 오늘 합계 갱신"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if pending:
+            rows = [(user, day, *entry) for (user, day), entry in pending.items()]
+            try:
+                add_usage(rows)
+            except Exception as e:
+                # 다음 기록 때 다시 시도
+                with self._lock:
+                    for key, entry in pending.items():
+                        current = self._pending.setdefault(key, [0, 0, 0, 0.0])
+                        for index, value in enumerate(entry):
+                            current[index] += value
+                logger.error("사용량 기록 실패 (다음 주기에 다시 시도): %s", e)
+                return
+        self.load()
+
+    async def run(self):
+        """주기적으로 사용량 기록 (작업이 취소되면 마지막으로 한 번 더 기록)"""
+        try:
+            await asyncio.to_thread(self.load)
+        except Exception as e:
+            logger.warning("오늘 사용량 조회 실패 (무시하고 계속 진행): %s", e)
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await asyncio.to_thread(self.flush)
+        finally:
+            await asyncio.to_thread(self.flush)
+
+    def top(self, days: int = 1, limit: int = 10):
+        """최근 days 일 동안 비용이 많은 사용자 (기록 대기분을 먼저 반영)"""
+        self.flush()
+        return get_top_usage(utc_day(1 - days), limit)
+
+    def stats(self) -> dict:
+        """사용량 상태"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'spent_today': round(self.spent_today(), 4),
+            'spent_by_tenant': {tenant: round(cost, 4) for tenant, cost in self.spent_by_tenant().items()},
+            'pending_rows': pending,
+            'rejected': dict(self.rejected),
+        }
+
+
+# 전역 사용량 집계기
+usage_ledger = UsageLedger(
+    config.MODEL_INPUT_PRICE,
+    config.MODEL_OUTPUT_PRICE,
+    user_budget=config.USER_DAILY_BUDGET_USD,
+    global_budget=config.GLOBAL_DAILY_BUDGET_USD,
+    flush_interval=config.USAGE_FLUSH_INTERVAL
+)